@@ -5,9 +5,16 @@
 from .access_leg import AccessLeg
 from .detailed_itineraries import DetailedItineraries
 from .direct_leg import DirectLeg
+from .edge_geometries import EdgeGeometries
 from .egress_leg import EgressLeg
 from .elevation_cost_function import ElevationCostFunction
+from .hop_geometry_cache import HopGeometryCache
 from .isochrones import Isochrones
+from .itinerary_columns import ItineraryColumns, LegFields
+from .itinerary_router import ItineraryRouter
+from .itinerary_writer import ItineraryWriter
+from .od_pairs import OdPairs
+from .origin_transit_search import OriginTransitSearch
 from .regional_task import RegionalTask
 from .scenario import Scenario
 from .street_layer import StreetLayer
@@ -23,9 +30,17 @@ __all__ = [
     "AccessLeg",
     "DetailedItineraries",
     "DirectLeg",
+    "EdgeGeometries",
     "EgressLeg",
     "ElevationCostFunction",
+    "HopGeometryCache",
     "Isochrones",
+    "ItineraryColumns",
+    "ItineraryRouter",
+    "ItineraryWriter",
+    "LegFields",
+    "OdPairs",
+    "OriginTransitSearch",
     "RegionalTask",
     "Scenario",
     "StreetLayer",
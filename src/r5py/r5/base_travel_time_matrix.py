@@ -14,7 +14,7 @@ import numpy
 import pandas
 import shapely
 
-from ..util import Config, check_od_data_set
+from ..util import Config, check_od_data_set, Instrumentation
 from .regional_task import RegionalTask
 from .transport_network import TransportNetwork
 
@@ -42,7 +42,9 @@ class BaseTravelTimeMatrix(geopandas.GeoDataFrame):
         "_destinations_crs",
         "_origins",
         "_origins_crs",
+        "_request_arguments",
         "destinations",
+        "instrumentation",
         "origins",
         "request",
         "snap_to_network",
@@ -126,7 +128,8 @@ class BaseTravelTimeMatrix(geopandas.GeoDataFrame):
             ``transport_modes``, ``access_modes``, ``egress_modes``,
             ``max_time``, ``max_time_walking``, ``max_time_cycling``,
             ``max_time_driving``, ``speed_cycling``, ``speed_walking``,
-            ``max_public_transport_rides``, ``max_bicycle_traffic_stress``
+            ``max_public_transport_rides``, ``max_bicycle_traffic_stress``,
+            ``instrumentation``
         """
 
         super_parameters = inspect.signature(geopandas.GeoDataFrame).parameters
@@ -138,21 +141,30 @@ class BaseTravelTimeMatrix(geopandas.GeoDataFrame):
         }
         super().__init__(**super_kwargs)
 
+        self.instrumentation = Instrumentation.from_argument(
+            kwargs.pop("instrumentation", None)
+        )
+
         if not isinstance(transport_network, TransportNetwork):
-            transport_network = TransportNetwork(*transport_network)
+            with self.instrumentation.phase("load_transport_network"):
+                transport_network = TransportNetwork(*transport_network)
         self.transport_network = transport_network
 
         self.snap_to_network = snap_to_network
 
-        self.origins = origins
-        self.destinations = destinations
+        with self.instrumentation.phase("validate_origins_destinations"):
+            self.origins = origins
+            self.destinations = destinations
 
         self.request = RegionalTask(
             transport_network,
             origin=None,
             destinations=None,
+            instrumentation=self.instrumentation,
             **kwargs,
         )
+        # (to create equivalent requests, e.g., in worker processes)
+        self._request_arguments = kwargs
 
         self.verbose = Config().arguments.verbose
 
@@ -215,28 +227,30 @@ class BaseTravelTimeMatrix(geopandas.GeoDataFrame):
                 )
 
         if self.snap_to_network:
-            for which_end in ("origins", "destinations"):
-                points = getattr(self, f"_{which_end}")
-                points.geometry = self.transport_network.snap_to_network(
-                    points.geometry
-                )
-                if len(points[points.geometry == shapely.Point()]):
-                    # if there are origins/destinations for which
-                    # no snapped point could be found
-                    points = points[points.geometry != shapely.Point()]
-                    warnings.warn(
-                        f"Some {which_end[:-1]} points could not be "
-                        "snapped to the street network",
-                        RuntimeWarning,
-                        stacklevel=1,
+            with self.instrumentation.phase("snap_to_network"):
+                for which_end in ("origins", "destinations"):
+                    points = getattr(self, f"_{which_end}")
+                    points.geometry = self.transport_network.snap_to_network(
+                        points.geometry
                     )
-
-                    if points.empty:
-                        raise ValueError(
-                            f"After snapping, no valid {which_end[:-1]} points remain"
+                    if len(points[points.geometry == shapely.Point()]):
+                        # if there are origins/destinations for which
+                        # no snapped point could be found
+                        points = points[points.geometry != shapely.Point()]
+                        warnings.warn(
+                            f"Some {which_end[:-1]} points could not be "
+                            "snapped to the street network",
+                            RuntimeWarning,
+                            stacklevel=1,
                         )
 
-                setattr(self, f"_{which_end}", points.copy())
+                        if points.empty:
+                            raise ValueError(
+                                f"After snapping, no valid {which_end[:-1]} "
+                                "points remain"
+                            )
+
+                    setattr(self, f"_{which_end}", points.copy())
 
     @property
     def origins(self):
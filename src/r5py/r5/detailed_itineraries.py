@@ -3,16 +3,20 @@
 
 """Calculate detailed itineraries between many origins and destinations."""
 
-import copy
+import math
 import warnings
 
 import geopandas
-import joblib
-import pandas
 
 from .base_travel_time_matrix import BaseTravelTimeMatrix
-from .trip import Trip
-from .trip_planner import TripPlanner
+from .itinerary_columns import ItineraryColumns
+from .itinerary_router import (
+    ItineraryRouter,
+    route_in_worker_process,
+    worker_config_arguments,
+)
+from .itinerary_writer import ItineraryWriter
+from .od_pairs import OdPairs
 
 __all__ = ["DetailedItineraries"]
 
@@ -20,11 +24,17 @@ __all__ = ["DetailedItineraries"]
 class DetailedItineraries(BaseTravelTimeMatrix):
     """Compute detailed itineraries between many origins and destinations."""
 
-    COLUMNS = ["from_id", "to_id", "option"] + Trip.COLUMNS
+    COLUMNS = ItineraryColumns.COLUMNS
 
     _r5py_attributes = BaseTravelTimeMatrix._r5py_attributes + [
+        "_od_pairs",
         "all_to_all",
-        "od_pairs",
+        "backend",
+        "chunk_size",
+        "max_options",
+        "output_file",
+        "transit_search_per_origin",
+        "with_geometry",
     ]
 
     def __init__(
@@ -34,6 +44,12 @@ class DetailedItineraries(BaseTravelTimeMatrix):
         destinations=None,
         snap_to_network=False,
         force_all_to_all=False,
+        transit_search_per_origin=False,
+        geometry=True,
+        max_options=None,
+        backend="threads",
+        chunk_size=None,
+        output_file=None,
         **kwargs,
     ):
         """
@@ -71,16 +87,72 @@ class DetailedItineraries(BaseTravelTimeMatrix):
             Set ``force_all_to_all=True`` to route from each origin to all
             destinations (this is the default, if ``origins`` and ``destinations``
             have different lengths, or if ``destinations`` is omitted)
+        transit_search_per_origin : bool, default False
+            Run one public transport search per origin, and extract the routes
+            to all of its destinations from it, instead of one search per
+            origin/destination pair. This is much faster when routing from
+            each origin to many destinations. Both report the same routes:
+            for each departure time, the one that arrives first (with the
+            fewest transfers, if several arrive at the same time).
+        geometry : bool, default True
+            Construct the geometries of all trip legs. Set ``geometry=False``
+            if only the transport modes, routes, stops, times and distances
+            of the legs are needed: this is considerably faster and the
+            results use less memory. The ``geometry`` column is then empty,
+            distances are computed nonetheless.
+        max_options : int, optional
+            Report at most ``max_options`` route alternatives (‘options’) per
+            origin/destination pair: the fastest ones (overall travel and
+            wait time), and, if they are equally fast, the ones with fewer
+            transfers, ordered by these criteria. By default, report all
+            alternatives found.
+        backend : str, default "threads"
+            How to compute itineraries in parallel: ``"threads"`` runs
+            ``NUM_THREADS`` threads in this process, which share one transport
+            network, but also Python’s global interpreter lock.
+            ``"processes"`` runs ``NUM_THREADS`` worker processes, each of
+            which starts its own JVM and loads the transport network from its
+            cache file. This uses considerably more memory, but keeps more CPU
+            cores busy when computing many itineraries. The worker processes
+            use the same configuration as this process; a relative
+            ``--max-memory`` is shared between this process and the
+            workers.
+        chunk_size : int, optional
+            With ``backend="processes"``, send the origin/destination pairs
+            to the worker processes in chunks of about this many pairs (all
+            pairs of an origin end up in the same chunk). By default, split
+            the pairs into four chunks per worker process.
+        output_file : str | pathlib.Path, optional
+            Write the itineraries to this GeoParquet file, batch by batch, as
+            they are computed, instead of keeping all of them in memory. The
+            ``DetailedItineraries`` themselves then remain empty. Read the
+            file with ``geopandas.read_parquet()``; transport modes are
+            stored as their names (e.g., ``"WALK"``), geometries in
+            EPSG:4326. Requires ``pyarrow`` (``pip install "r5py[parquet]"``);
+            if it is missing, an ``ImportError`` is raised before any
+            itineraries are computed.
         **kwargs : mixed
             Any arguments than can be passed to r5py.RegionalTask:
             ``departure``, ``departure_time_window``, ``percentiles``,
             ``transport_modes``, ``access_modes``, ``egress_modes``,
             ``max_time``, ``max_time_walking``, ``max_time_cycling``,
             ``max_time_driving``, ``speed_cycling``, ``speed_walking``,
-            ``max_public_transport_rides``, ``max_bicycle_traffic_stress`` Note
-            that not all arguments might make sense in this context, and the
-            underlying R5 engine might ignore some of them.
+            ``max_public_transport_rides``, ``max_bicycle_traffic_stress``,
+            ``instrumentation`` (record the time of each phase of the
+            computation in the ``instrumentation`` attribute, see
+            ``r5py.util.Instrumentation``). Note that not all arguments might
+            make sense in this context, and the underlying R5 engine might
+            ignore some of them.
         """
+        if max_options is not None and max_options < 1:
+            raise ValueError("`max_options` must be a positive integer or `None`")
+        if backend not in ("threads", "processes"):
+            raise ValueError('`backend` must be one of "threads" or "processes"')
+        if chunk_size is not None and chunk_size < 1:
+            raise ValueError("`chunk_size` must be a positive integer or `None`")
+        if output_file is not None:
+            ItineraryWriter.check_dependencies()
+
         super().__init__(
             transport_network,
             origins,
@@ -119,7 +191,13 @@ class DetailedItineraries(BaseTravelTimeMatrix):
         else:
             self.all_to_all = force_all_to_all
 
-        self.od_pairs = None
+        self._od_pairs = None
+        self.transit_search_per_origin = transit_search_per_origin
+        self.with_geometry = geometry
+        self.max_options = max_options
+        self.backend = backend
+        self.chunk_size = chunk_size
+        self.output_file = output_file
 
         data = self._compute()
         with warnings.catch_warnings():
@@ -152,75 +230,144 @@ class DetailedItineraries(BaseTravelTimeMatrix):
 
             The data frame comprises of the following columns: `from_id`,
             `to_id`, `option` (`int`), `segment` (`int`), `transport_mode`
-            (`r5py.TransportMode`), `departure_time` (`datetime.datetime`),
-            `distance` (`float`, metres), `travel_time` (`datetime.timedelta`),
-            `wait_time` (`datetime.timedelta`), `feed` (`str`, the feed name
-            used), `agency_id` (`str` the public transport agency identifier),
-            `route_id` (`str`, public transport route ID), `start_stop_id`
-            (`str`, the GTFS stop_id for boarding), `end_stop_id` (`str`, the
-            GTFS stop_id for alighting), `geometry` (`shapely.LineString`)
+            (categorical of `r5py.TransportMode`), `departure_time`
+            (`datetime.datetime`), `distance` (`float`, metres), `travel_time`
+            (`datetime.timedelta`), `wait_time` (`datetime.timedelta`), `feed`
+            (categorical of `str`, the feed name used), `agency_id`
+            (categorical of `str` the public transport agency identifier),
+            `route_id` (categorical of `str`, public transport route ID),
+            `start_stop_id` (categorical of `str`, the GTFS stop_id for
+            boarding), `end_stop_id` (categorical of `str`, the GTFS stop_id
+            for alighting), `geometry` (`shapely.LineString`)
+            If `output_file` is set, the data frame is empty.
         """
         self._prepare_origins_destinations()
 
-        # loop over all origin/destination pairs, modify the request, and
-        # compute times, distance, and other details for each trip
+        if self.backend == "processes":
+            itineraries = self._compute_in_processes()
+        else:
+            itineraries = self._compute_in_threads()
+
+        # (`itineraries` is a generator, results are collected or written as
+        # soon as each origin or chunk of origins is finished)
+        od_matrix = ItineraryColumns()
+        if self.output_file is not None:
+            with ItineraryWriter(self.output_file) as writer:
+                for chunk_itineraries in itineraries:
+                    with self.instrumentation.phase("write_results"):
+                        writer.write(chunk_itineraries)
+        else:
+            for chunk_itineraries in itineraries:
+                with self.instrumentation.phase("concatenate_results"):
+                    od_matrix.extend(chunk_itineraries)
+
+        with self.instrumentation.phase("concatenate_results"):
+            od_matrix = od_matrix.to_frame()
+
+        od_matrix = geopandas.GeoDataFrame(od_matrix, crs=self._origins_crs)
+        return od_matrix
+
+    @property
+    def od_pairs(self):
+        """All pairs of origin and destination IDs (`pandas.DataFrame`)."""
+        if self._od_pairs is None:
+            return None
+        return self._od_pairs.to_frame()
+
+    @property
+    def _router_arguments(self):
+        return {
+            "transit_search_per_origin": self.transit_search_per_origin,
+            "geometry": self.with_geometry,
+            "max_options": self.max_options,
+            "all_to_all": self.all_to_all,
+        }
+
+    def _compute_in_threads(self):
+        """Compute itineraries per origin in threads, yield ItineraryColumns."""
+        import joblib  # load only when needed
+
+        router = ItineraryRouter(
+            self.transport_network,
+            self.request,
+            self.origins,
+            self.destinations,
+            **self._router_arguments,
+        )
+
+        # split the destinations of each origin into parts, so that all
+        # threads are kept busy even when routing from only a few origins
+        max_destinations = max(
+            math.ceil(len(self._od_pairs) / (self.NUM_THREADS * 4)), 1
+        )
+
+        # loop over all origins, and all destinations of each origin, modify
+        # the request, and compute times, distance, and other details for each
+        # trip; the street searches from an origin to the public transport
+        # stops, and from the stops to a destination are shared between tasks
         with joblib.Parallel(
             prefer="threads",
             verbose=(10 * self.verbose),  # joblib has a funny verbosity scale
             n_jobs=self.NUM_THREADS,
+            return_as="generator",
         ) as parallel:
-            matrices = parallel(
-                joblib.delayed(self._travel_details_per_od_pair)(from_id, to_id)
-                for _, (from_id, to_id) in self.od_pairs.iterrows()
-            )
-            od_matrix = pandas.concat(
-                [matrix.astype(matrices[0].dtypes) for matrix in matrices],
-                ignore_index=True,
+            yield from parallel(
+                joblib.delayed(router.route_from_origin)(from_id, to_ids)
+                for from_id, to_ids in self._od_pairs.per_origin(max_destinations)
             )
+        self.transport_network.transfer_legs.save()
 
-        od_matrix = geopandas.GeoDataFrame(od_matrix, crs=self._origins_crs)
-        return od_matrix
+    def _compute_in_processes(self):
+        """Compute itineraries in worker processes, yield ItineraryColumns."""
+        import joblib  # load only when needed
 
-    def _prepare_origins_destinations(self):
-        """Make sure we received enough information."""
-        super()._prepare_origins_destinations()
+        chunk_size = self.chunk_size or max(
+            math.ceil(len(self._od_pairs) / (self.NUM_THREADS * 4)), 1
+        )
 
-        if self.all_to_all:
-            # manually create a list of all all-to-all permutations
-            self.od_pairs = self.origins[["id"]].join(
-                self.destinations[["id"]],
-                how="cross",
-                lsuffix="_origin",
-                rsuffix="_destination",
-            )
-        else:
-            # origins and destinations are same length, run one-to-one routing
-            self.od_pairs = pandas.DataFrame(
-                {
-                    "id_origin": self.origins.id.values,
-                    "id_destination": self.destinations.id.values,
-                }
-            )
+        if self.with_geometry:
+            # export the edge geometries once, the workers load them from the
+            # cache file
+            _ = self.transport_network.edge_geometries
 
-    def _travel_details_per_od_pair(self, from_id, to_id):
-        origin = self.origins[self.origins.id == from_id]
-        destination = self.destinations[self.destinations.id == to_id]
+        # the worker processes start their own JVMs: pass on this process’s
+        # configuration, and share the memory between all of them
+        config_arguments = worker_config_arguments(self.NUM_THREADS)
 
-        request = copy.copy(self.request)
-        request._regional_task.fromLat = origin.geometry.item().y
-        request._regional_task.fromLon = origin.geometry.item().x
-        request._regional_task.toLat = destination.geometry.item().y
-        request._regional_task.toLon = destination.geometry.item().x
+        with joblib.Parallel(
+            backend="loky",
+            verbose=(10 * self.verbose),
+            n_jobs=self.NUM_THREADS,
+            return_as="generator",
+        ) as parallel:
+            results = parallel(
+                joblib.delayed(route_in_worker_process)(
+                    self.transport_network.cache_file,
+                    self._request_arguments,
+                    self.origins[self.origins.id.isin(od_pairs.id_origin)],
+                    self.destinations[
+                        self.destinations.id.isin(od_pairs.id_destination)
+                    ],
+                    od_pairs,
+                    config_arguments=config_arguments,
+                    instrumentation=self.instrumentation.enabled,
+                    **self._router_arguments,
+                )
+                for od_pairs in self._od_pairs.chunks(chunk_size)
+            )
 
-        trip_planner = TripPlanner(self.transport_network, request)
-        trips = trip_planner.trips
+            for chunk_itineraries, timings in results:
+                for timing in timings:
+                    self.instrumentation.record(*timing)
+                yield chunk_itineraries
 
-        # fmt: off
-        trips = [
-            [from_id, to_id, option] + segment
-            for option, trip in enumerate(trips)
-            for segment in trip.as_table()
-        ]
-        # fmt: on
+    def _prepare_origins_destinations(self):
+        """Make sure we received enough information."""
+        super()._prepare_origins_destinations()
 
-        return pandas.DataFrame(trips, columns=self.COLUMNS)
+        # all-to-all: each origin with each destination, otherwise origins
+        # and destinations are same length, run one-to-one routing; the pairs
+        # are generated only when needed, origin by origin
+        self._od_pairs = OdPairs(
+            self.origins.id, self.destinations.id, all_to_all=self.all_to_all
+        )
@@ -5,8 +5,6 @@
 
 import datetime
 
-import shapely
-
 from .trip_leg import TripLeg
 
 __all__ = ["DirectLeg"]
@@ -28,11 +26,10 @@ class DirectLeg(TripLeg):
         """
         distance = street_segment.distance / 1000.0  # millimetres!
         travel_time = datetime.timedelta(seconds=street_segment.duration)
-        geometry = shapely.from_wkt(str(street_segment.geometry))
 
         super().__init__(
             transport_mode=transport_mode,
             distance=distance,
             travel_time=travel_time,
-            geometry=geometry,
+            geometry=street_segment.geometry,
         )
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+
+"""Keep the geometries of all street edges in flat coordinate arrays."""
+
+import os
+
+import filelock
+import numpy
+import shapely
+
+__all__ = ["EdgeGeometries"]
+
+
+class EdgeGeometries:
+    """Keep the geometries of all street edges in flat coordinate arrays."""
+
+    def __init__(self, street_layer, path=None):
+        """
+        Keep the geometries of all street edges in flat coordinate arrays.
+
+        Reading the geometry of a street edge from R5 takes a round trip
+        through the JVM and a WKT string per edge. `EdgeGeometries` exports
+        the geometries of all edges of a street layer at once, and assembles
+        the geometries of street paths from slices of its coordinate array.
+
+        R5 stores edges in pairs (forward and backward); both edges of a pair
+        share one geometry, which backward edges traverse in reverse.
+
+        Arguments
+        ---------
+        street_layer : r5py.r5.StreetLayer
+            The street layer whose edges to export
+        path : pathlib.Path | None
+            Where to cache the exported arrays: if the file exists, load them
+            from it, otherwise export them from `street_layer`, and save them.
+            `None`: do not cache the arrays on disk.
+        """
+        if path is not None and path.exists():
+            with numpy.load(path) as arrays:
+                self.coordinates = arrays["coordinates"]
+                self.offsets = arrays["offsets"]
+        else:
+            self.coordinates, self.offsets = self._export(street_layer)
+            if path is not None:
+                self._save(path)
+
+    def __len__(self):
+        """Count the edges (of both directions)."""
+        return (len(self.offsets) - 1) * 2
+
+    @staticmethod
+    def _export(street_layer):
+        import com.conveyal.r5
+
+        fixed_factor = com.conveyal.r5.streets.VertexStore.FIXED_FACTOR
+
+        edge_store = street_layer._street_layer.edgeStore
+        vertex_store = street_layer._street_layer.vertexStore
+
+        from_vertices = numpy.asarray(edge_store.fromVertices.toArray())
+        to_vertices = numpy.asarray(edge_store.toVertices.toArray())
+        vertices = (
+            numpy.column_stack(
+                (
+                    numpy.asarray(vertex_store.fixedLons.toArray()),
+                    numpy.asarray(vertex_store.fixedLats.toArray()),
+                )
+            )
+            / fixed_factor
+        )
+
+        # intermediate points are fixed-point (lat, lon) pairs
+        intermediates = [numpy.asarray(geometry) for geometry in edge_store.geometries]
+        number_of_points = (
+            numpy.fromiter(
+                (len(points) for points in intermediates),
+                dtype=numpy.int64,
+                count=len(intermediates),
+            )
+            // 2
+            + 2
+        )
+        offsets = numpy.r_[0, numpy.cumsum(number_of_points)]
+
+        coordinates = numpy.empty((offsets[-1], 2))
+        coordinates[offsets[:-1]] = vertices[from_vertices]
+        coordinates[offsets[1:] - 1] = vertices[to_vertices]
+
+        is_intermediate = numpy.ones(offsets[-1], dtype=bool)
+        is_intermediate[offsets[:-1]] = False
+        is_intermediate[offsets[1:] - 1] = False
+        if is_intermediate.any():
+            coordinates[is_intermediate] = (
+                numpy.concatenate(intermediates).reshape(-1, 2)[:, ::-1] / fixed_factor
+            )
+
+        return coordinates, offsets
+
+    def _save(self, path):
+        with filelock.FileLock(path.parent / f"{path.name}.lock"):
+            temporary_path = path.with_name(f"{path.name}.{os.getpid():d}.npz")
+            try:
+                numpy.savez(
+                    temporary_path, coordinates=self.coordinates, offsets=self.offsets
+                )
+                temporary_path.replace(path)
+            finally:
+                temporary_path.unlink(missing_ok=True)
+
+    def covers(self, edges):
+        """
+        Check whether all `edges` are part of the exported street layer.
+
+        Arguments
+        ---------
+        edges : numpy.ndarray
+            Edge indices
+        """
+        return len(edges) == 0 or (edges.min() >= 0 and edges.max() < len(self))
+
+    def geometry(self, edges):
+        """
+        Assemble the geometry of a sequence of edges.
+
+        Arguments
+        ---------
+        edges : numpy.ndarray
+            Edge indices, in the order they are traversed
+
+        Returns
+        -------
+        shapely.LineString
+            The geometry of the edges, joined into one LineString, in
+            EPSG:4326
+        """
+        pairs = edges // 2
+        backward = (edges % 2).astype(bool)
+
+        starts = self.offsets[pairs]
+        number_of_points = self.offsets[pairs + 1] - starts
+
+        edge = numpy.repeat(numpy.arange(len(edges)), number_of_points)
+        position = numpy.arange(number_of_points.sum()) - numpy.repeat(
+            numpy.cumsum(number_of_points) - number_of_points, number_of_points
+        )
+        position = numpy.where(
+            backward[edge], number_of_points[edge] - 1 - position, position
+        )
+        coordinates = self.coordinates[starts[edge] + position]
+
+        # consecutive edges share their end and start points, keep only one
+        if len(coordinates):
+            repeated = numpy.r_[
+                False, (coordinates[1:] == coordinates[:-1]).all(axis=1)
+            ]
+            coordinates = coordinates[~repeated]
+
+        if len(coordinates) < 2:
+            return shapely.LineString()
+        return shapely.LineString(coordinates)
@@ -7,16 +7,9 @@ import enum
 
 import jpype
 
-from ..util import start_jvm
-
-import com.conveyal.r5
-
 __all__ = ["ElevationCostFunction"]
 
 
-start_jvm()
-
-
 class ElevationCostFunction(enum.Enum):
     """
     Elevation cost functions.
@@ -45,6 +38,8 @@ class ElevationCostFunction(enum.Enum):
     exact=ElevationCostFunction,
 )
 def _cast_LegMode(java_class, object_):
+    import com.conveyal.r5
+
     return com.conveyal.r5.analyst.scenario.RasterCost.CostFunction.valueOf(
         object_.name
     )
@@ -7,16 +7,10 @@ import collections.abc
 import hashlib
 import pathlib
 
-import rasterio
-import rasterio.merge
-
 from .elevation_cost_function import ElevationCostFunction
 from .file_storage import FileStorage
 from ..util import FileDigest, WorkingCopy
 
-import com.conveyal.analysis
-import com.conveyal.r5
-
 __all__ = ["ElevationModel"]
 
 
@@ -40,6 +34,9 @@ class ElevationModel:
             which algorithm to use to compute the added effort and travel time
             of slopes
         """
+        import com.conveyal.analysis
+        import com.conveyal.r5
+
         if isinstance(elevation_model, collections.abc.Iterable):
             elevation_model = self._merge_tiffs(
                 [WorkingCopy(e) for e in elevation_model]
@@ -73,6 +70,7 @@ class ElevationModel:
         # javax.imagio does not allow all compression/predictor
         # combinations of TIFFs
         # to work around it, convert the input to a format known to work.
+        import rasterio  # expensive to import, load only when needed
 
         input_tiff = tiff.with_stem(f".{tiff.stem}")
         output_tiff = tiff.with_suffix(".tif")
@@ -101,6 +99,9 @@ class ElevationModel:
 
     @staticmethod
     def _merge_tiffs(input_tiffs):
+        import rasterio  # expensive to import, load only when needed
+        import rasterio.merge
+
         input_tiffs = [pathlib.Path(input_tiff) for input_tiff in input_tiffs]
         # a hash representing all input files
         digest = hashlib.sha256(
@@ -5,18 +5,10 @@
 
 import jpype
 
-from ..util import start_jvm
-
-import com.conveyal.file
-import java.io.File
-
 __all__ = ["FileStorage"]
 
 
-start_jvm()
-
-
-@jpype.JImplements(com.conveyal.file.FileStorage)
+@jpype.JImplements("com.conveyal.file.FileStorage", deferred=True)
 class FileStorage:
     """A thin layer around com.conveyal.r5.file.FileStorage."""
 
@@ -40,6 +32,8 @@ class FileStorage:
         java.io.File
             The file identified by file_storage_key
         """
+        import java.io
+
         return java.io.File(file_storage_key.path)
 
     @jpype.JOverride
@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+
+
+"""Create a reduced copy of an OpenStreetMap extract in a cache directory."""
+
+import array
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+
+import filelock
+import jpype
+import numpy
+import shapely
+
+from .transport_mode import TransportMode
+from ..util import Config, FileDigest
+
+__all__ = ["FilteredOsmPbf"]
+
+
+config = Config()
+config.argparser.add(
+    "--osm-filter-tool",
+    help="""
+        Tool to reduce OpenStreetMap extracts to the study area (`clip`) and
+        to routable entities (`routable_osm_only`) with: osmium (osmium-tool,
+        has to be installed), osmlib (part of R5, slower), or auto (osmium, if
+        installed, otherwise osmlib)
+    """,
+    choices=["auto", "osmium", "osmlib"],
+    default="auto",
+)
+
+
+CHUNK_SIZE = 100_000  # nodes to process at a time
+
+# Tags of the OpenStreetMap entities that R5 reads when building a street
+# layer (`None`: any value except ‘no’), cf. `StreetLayer.loadFromOsm()`
+ROUTABLE_WAY_TAGS = {
+    "highway": None,
+    "park_ride": None,
+    "public_transport": {"platform"},
+    "railway": {"platform"},
+}
+ROUTABLE_NODE_TAGS = {
+    "amenity": {"bicycle_rental"},
+    "park_ride": None,
+}
+ROUTABLE_RELATION_TAGS = {
+    "type": {"restriction"},
+}
+
+# Which `com.conveyal.r5.streets.EdgeStore.EdgeFlag` permits which street mode,
+# and which street modes leg modes need
+EDGE_FLAGS = {
+    TransportMode.BICYCLE: "ALLOWS_BIKE",
+    TransportMode.CAR: "ALLOWS_CAR",
+    TransportMode.WALK: "ALLOWS_PEDESTRIAN",
+}
+STREET_MODES_OF_LEG_MODES = {
+    TransportMode.BICYCLE_RENT: {TransportMode.BICYCLE, TransportMode.WALK},
+    TransportMode.CAR_PARK: {TransportMode.CAR, TransportMode.WALK},
+}
+
+
+class FilteredOsmPbf(pathlib.Path):
+    """Create a reduced copy of an OpenStreetMap extract in a cache directory."""
+
+    def __new__(cls, path, clip=None, routable_only=False, street_modes=None):
+        """
+        Create a reduced copy of an OpenStreetMap extract in a cache directory.
+
+        If osmium-tool is installed (cf. `--osm-filter-tool`), `osmium
+        extract` and `osmium tags-filter` clip the extract and keep only
+        routable entities. Otherwise, and to keep only the streets that allow
+        `street_modes`, the (already reduced) extract is streamed through R5’s
+        osmlib twice: first, to decide which nodes, ways, and relations to
+        keep, then to write them to a new PBF file. This way, R5 never imports
+        the parts of the extract that are not needed into its database. The
+        result is cached, and reused if the same extract is filtered the same
+        way again.
+
+        Arguments
+        ---------
+        path : str | pathlib.Path
+            The OpenStreetMap extract (in PBF format) to filter.
+        clip : shapely.Geometry
+            Keep only the ways that have at least one node within this
+            polygon (in `EPSG:4326`). Ways that cross the boundary of `clip`
+            are kept completely, including their nodes outside `clip`.
+        routable_only : bool
+            Keep only the entities R5 uses for routing: streets, paths,
+            platforms, and park-and-ride facilities (and their nodes), bike
+            rental stations, and turn restrictions. Drop, for instance,
+            buildings, land use, and points of interest.
+        street_modes : collections.abc.Iterable[r5py.TransportMode]
+            Keep only the streets and paths that allow at least one of
+            these modes, as determined by R5’s traversal permission labeler.
+
+        Returns
+        -------
+        pathlib.Path
+            The path of the filtered OpenStreetMap extract, or `path` if no
+            filter applies.
+        """
+        path = pathlib.Path(path)
+        street_modes = cls.normalise_street_modes(street_modes)
+        if clip is None and not routable_only and street_modes is None:
+            return path
+
+        digest = hashlib.sha256(
+            "".join(
+                [FileDigest(path)]
+                + ([shapely.to_wkb(clip, hex=True)] if clip is not None else [])
+                + (["routable_only"] if routable_only else [])
+                + (
+                    [",".join(mode.name for mode in street_modes)]
+                    if street_modes is not None
+                    else []
+                )
+            ).encode("utf-8")
+        ).hexdigest()
+        destination = Config().CACHE_DIR / f"{digest}.osm.pbf"
+
+        with filelock.FileLock(destination.parent / f"{destination.name}.lock"):
+            if not destination.exists():
+                temporary_destination = destination.with_name(
+                    f"{destination.name}.{os.getpid():d}"
+                )
+                try:
+                    cls._filter(
+                        path,
+                        temporary_destination,
+                        clip,
+                        routable_only,
+                        street_modes,
+                    )
+                    temporary_destination.replace(destination)
+                finally:
+                    temporary_destination.unlink(missing_ok=True)
+
+        return destination
+
+    @staticmethod
+    def normalise_street_modes(street_modes):
+        """
+        Find the street modes a street layer has to support.
+
+        Arguments
+        ---------
+        street_modes : collections.abc.Iterable[r5py.TransportMode | str] | None
+            Street and leg modes, e.g., `[TransportMode.WALK,
+            TransportMode.BICYCLE_RENT]`
+
+        Returns
+        -------
+        tuple[r5py.TransportMode] | None
+            The street modes needed (leg modes are replaced by the street
+            modes they combine), sorted by name. `None` if `street_modes` is
+            `None`, or if all street modes are needed.
+        """
+        if street_modes is None:
+            return None
+        if isinstance(street_modes, (str, TransportMode)):
+            street_modes = [street_modes]
+
+        normalised_street_modes = set()
+        for street_mode in street_modes:
+            try:
+                street_mode = TransportMode(street_mode)
+            except ValueError as exception:
+                raise ValueError(
+                    f"`street_modes` must be street or leg modes, not '{street_mode}'"
+                ) from exception
+            if street_mode in STREET_MODES_OF_LEG_MODES:
+                normalised_street_modes |= STREET_MODES_OF_LEG_MODES[street_mode]
+            elif street_mode.is_street_mode:
+                normalised_street_modes.add(street_mode)
+            else:
+                raise ValueError(
+                    "`street_modes` must be street or leg modes, "
+                    f"not '{street_mode.name}'"
+                )
+
+        if not normalised_street_modes:
+            raise ValueError("`street_modes` must contain at least one mode")
+        if normalised_street_modes == set(EDGE_FLAGS):
+            return None
+        return tuple(sorted(normalised_street_modes, key=lambda mode: mode.name))
+
+    @staticmethod
+    def _copy(path, sink):
+        import com.conveyal.osmlib
+        import java.io
+
+        input_stream = java.io.BufferedInputStream(java.io.FileInputStream(f"{path}"))
+        try:
+            com.conveyal.osmlib.PBFInput(input_stream).copyTo(sink)
+        finally:
+            input_stream.close()
+
+    @classmethod
+    def _filter(cls, path, destination, clip, routable_only, street_modes):
+        osmium = _osmium()
+        if osmium is None:
+            cls._filter_with_osmlib(
+                path, destination, clip, routable_only, street_modes
+            )
+            return
+
+        # osmium-tool clips and filters by tags in bulk, only the street
+        # modes need R5’s traversal permission labeler
+        intermediate_files = []
+        try:
+            if clip is not None and clip.geom_type in ("Polygon", "MultiPolygon"):
+                clipped = destination.with_name(f"{destination.name}.clipped")
+                intermediate_files.append(clipped)
+                cls._osmium_extract(osmium, path, clipped, clip)
+                path = clipped
+                clip = None
+            if routable_only:
+                routable = destination.with_name(f"{destination.name}.routable")
+                intermediate_files.append(routable)
+                subprocess.run(
+                    _osmium_tags_filter_command(osmium, path, routable),
+                    capture_output=True,
+                    check=True,
+                )
+                path = routable
+
+            if clip is None and street_modes is None:
+                path.replace(destination)
+            else:
+                cls._filter_with_osmlib(
+                    path, destination, clip, routable_only, street_modes
+                )
+        finally:
+            for intermediate_file in intermediate_files:
+                intermediate_file.unlink(missing_ok=True)
+
+    @classmethod
+    def _filter_with_osmlib(cls, path, destination, clip, routable_only, street_modes):
+        import com.conveyal.osmlib
+        import java.io
+
+        selection = _OsmEntitySelection(clip, routable_only, street_modes)
+        cls._copy(path, selection)
+
+        output_stream = java.io.BufferedOutputStream(
+            java.io.FileOutputStream(f"{destination}")
+        )
+        try:
+            cls._copy(
+                path,
+                _SelectedOsmEntities(
+                    selection,
+                    com.conveyal.osmlib.PBFOutput(output_stream),
+                ),
+            )
+        finally:
+            output_stream.close()
+
+    @staticmethod
+    def _osmium_extract(osmium, path, destination, clip):
+        polygon = destination.with_name(f"{destination.name}.geojson")
+        polygon.write_text(
+            json.dumps(
+                {
+                    "type": "Feature",
+                    "properties": {},
+                    "geometry": json.loads(shapely.to_geojson(clip)),
+                }
+            )
+        )
+        try:
+            subprocess.run(
+                _osmium_extract_command(osmium, path, destination, clip, polygon),
+                capture_output=True,
+                check=True,
+            )
+        finally:
+            polygon.unlink(missing_ok=True)
+
+
+def _osmium():
+    """Find the osmium-tool executable, or `None` to filter with osmlib."""
+    osm_filter_tool = Config().arguments.osm_filter_tool
+    if osm_filter_tool == "osmlib":
+        return None
+    osmium = shutil.which("osmium")
+    if osmium is None and osm_filter_tool == "osmium":
+        raise FileNotFoundError(
+            "`--osm-filter-tool` is 'osmium', but osmium-tool is not installed"
+        )
+    return osmium
+
+
+def _osmium_extract_command(osmium, path, destination, clip, polygon):
+    """
+    Assemble the command line to clip an extract with `osmium extract`.
+
+    Like `_OsmEntitySelection`, the ‘complete ways’ strategy keeps ways that
+    cross the boundary of `clip` completely. Rectangular clip geometries are
+    passed as a bounding box, all others as the GeoJSON file `polygon`.
+    """
+    if clip.equals(shapely.envelope(clip)):
+        area = ["--bbox", ",".join(f"{bound:f}" for bound in clip.bounds)]
+    else:
+        area = ["--polygon", f"{polygon}"]
+    return (
+        [osmium, "extract", "--strategy", "complete_ways"]
+        + area
+        + ["--overwrite", "--output-format", "pbf", "--output", f"{destination}"]
+        + [f"{path}"]
+    )
+
+
+def _osmium_tags_filter_command(osmium, path, destination):
+    """
+    Assemble the command line to keep routable entities with `osmium tags-filter`.
+
+    The expressions are the ones of `ROUTABLE_WAY_TAGS`, `ROUTABLE_NODE_TAGS`,
+    and `ROUTABLE_RELATION_TAGS`; osmium-tool adds the nodes of the ways and
+    the members of the relations kept.
+    """
+    expressions = []
+    for entity_type, tags in (
+        ("w", ROUTABLE_WAY_TAGS),
+        ("n", ROUTABLE_NODE_TAGS),
+        ("r", ROUTABLE_RELATION_TAGS),
+    ):
+        for key, values in tags.items():
+            if values is None:
+                expressions.append(f"{entity_type}/{key}!=no")
+            else:
+                expressions.append(f"{entity_type}/{key}={','.join(sorted(values))}")
+    return (
+        [osmium, "tags-filter"]
+        + ["--overwrite", "--output-format", "pbf", "--output", f"{destination}"]
+        + [f"{path}"]
+        + expressions
+    )
+
+
+def _contains(sorted_ids, ids):
+    """Check which of `ids` are in `sorted_ids`."""
+    ids = numpy.asarray(ids, dtype=numpy.int64)
+    if len(sorted_ids) == 0:
+        return numpy.zeros(ids.shape, dtype=bool)
+    positions = numpy.searchsorted(sorted_ids, ids)
+    positions[positions == len(sorted_ids)] = 0
+    return sorted_ids[positions] == ids
+
+
+def _has_tags(entity, tags):
+    """Check whether `entity` has any of `tags` (dict of key: set of values)."""
+    if entity.hasNoTags():
+        return False
+    for key, values in tags.items():
+        value = entity.getTag(key)
+        if value is not None:
+            value = str(value)
+            if value != "no" and (values is None or value in values):
+                return True
+    return False
+
+
+def _sorted_ids(ids):
+    """Return the unique values of an `array.array` of IDs, sorted."""
+    return numpy.unique(numpy.frombuffer(ids, dtype=numpy.int64))
+
+
+@jpype.JImplements("com.conveyal.osmlib.OSMEntitySink", deferred=True)
+class _OsmEntitySelection:
+    """
+    Decide which OpenStreetMap ways and relations to keep.
+
+    PBF files list all nodes first, then all ways, and, finally, all
+    relations. Nodes are examined in chunks; ways are kept if any of their
+    nodes lies within the clip geometry (and, if `routable_only`, if they
+    have routable tags, and, if `street_modes` is set, if they allow one of
+    `street_modes`), and all of their nodes are then kept, too; relations
+    are kept if any of their members is kept. Whether to keep nodes that are
+    not part of any way is decided only when they are written, by
+    `keeps_standalone_nodes()`.
+
+    All IDs are kept in flat integer arrays, and only the IDs of nodes within
+    the clip geometry and of the ways and relations kept are remembered.
+    """
+
+    def __init__(self, clip, routable_only, street_modes):
+        if clip is not None:
+            shapely.prepare(clip)
+        self.clip = clip
+        self.routable_only = routable_only
+
+        self.edge_flags = None
+        if street_modes is not None:
+            import com.conveyal.r5
+
+            self.edge_flags = [
+                com.conveyal.r5.streets.EdgeStore.EdgeFlag.valueOf(
+                    EDGE_FLAGS[street_mode]
+                )
+                for street_mode in street_modes
+            ]
+            self.permission_labeler = (
+                com.conveyal.r5.labeling.USTraversalPermissionLabeler()
+            )
+
+        self._node_ids = array.array("q")
+        self._node_coordinates = array.array("d")
+        self._nodes_within_clip = []
+        self._nodes_of_ways = []
+        self._way_ids = array.array("q")
+        self._relation_ids = array.array("q")
+
+        self.nodes = None
+        self.ways = None
+        self.relations = None
+
+    def _examine_nodes(self):
+        if self._node_ids:
+            node_ids = numpy.frombuffer(self._node_ids, dtype=numpy.int64)
+            lon, lat = numpy.frombuffer(self._node_coordinates).reshape(-1, 2).T
+            self._nodes_within_clip.append(
+                node_ids[shapely.contains_xy(self.clip, lon, lat)]
+            )
+            self._node_ids = array.array("q")
+            self._node_coordinates = array.array("d")
+
+    @property
+    def _sorted_nodes_within_clip(self):
+        if not isinstance(self._nodes_within_clip, numpy.ndarray):
+            self._examine_nodes()
+            self._nodes_within_clip = numpy.unique(
+                numpy.concatenate(
+                    self._nodes_within_clip + [numpy.array([], dtype=numpy.int64)]
+                )
+            )
+        return self._nodes_within_clip
+
+    @property
+    def _sorted_ways(self):
+        if self.ways is None:
+            self.ways = _sorted_ids(self._way_ids)
+            self._way_ids = None
+        return self.ways
+
+    def _within_clip(self, node_ids):
+        if self.clip is None:
+            return numpy.ones(len(node_ids), dtype=bool)
+        return _contains(self._sorted_nodes_within_clip, node_ids)
+
+    def _allows_street_modes(self, way):
+        if self.edge_flags is None:
+            return True
+        permissions = self.permission_labeler.getPermissions(way)
+        return any(
+            permissions.forward.contains(edge_flag)
+            or permissions.backward.contains(edge_flag)
+            for edge_flag in self.edge_flags
+        )
+
+    def keeps_standalone_nodes(self, nodes):
+        """
+        Check which nodes to keep even if they are not part of a way.
+
+        Such nodes are only useful if they carry tags (routable tags, if
+        `routable_only`), and lie within the clip geometry.
+
+        Arguments
+        ---------
+        nodes : list[com.conveyal.osmlib.Node]
+            Nodes that are not part of any way kept
+
+        Returns
+        -------
+        numpy.ndarray
+            One boolean value per node
+        """
+        if self.routable_only:
+            keep = [_has_tags(node, ROUTABLE_NODE_TAGS) for node in nodes]
+        else:
+            keep = [not node.hasNoTags() for node in nodes]
+        keep = numpy.array(keep, dtype=bool)
+        if self.clip is not None and keep.any():
+            candidates = numpy.flatnonzero(keep)
+            lon, lat = numpy.array(
+                [(nodes[i].getLon(), nodes[i].getLat()) for i in candidates]
+            ).T
+            keep[candidates] = shapely.contains_xy(self.clip, lon, lat)
+        return keep
+
+    @jpype.JOverride
+    def writeBegin(self):
+        """Start reading an extract."""
+
+    @jpype.JOverride
+    def setReplicationTimestamp(self, seconds_since_epoch):
+        """Ignore the replication timestamp."""
+
+    @jpype.JOverride
+    def writeNode(self, node_id, node):
+        """Examine a node."""
+        if self.clip is not None:
+            self._node_ids.append(node_id)
+            self._node_coordinates.extend((node.getLon(), node.getLat()))
+            if len(self._node_ids) >= CHUNK_SIZE:
+                self._examine_nodes()
+
+    @jpype.JOverride
+    def writeWay(self, way_id, way):
+        """Examine a way."""
+        if self.routable_only or self.edge_flags is not None:
+            routable = _has_tags(way, ROUTABLE_WAY_TAGS)
+            if self.routable_only and not routable:
+                return
+            if routable and not self._allows_street_modes(way):
+                return
+        node_ids = numpy.asarray(way.nodes, dtype=numpy.int64)
+        if self._within_clip(node_ids).any():
+            self._way_ids.append(way_id)
+            self._nodes_of_ways.append(node_ids)
+
+    @jpype.JOverride
+    def writeRelation(self, relation_id, relation):
+        """Examine a relation."""
+        is_turn_restriction = _has_tags(relation, ROUTABLE_RELATION_TAGS)
+        if self.routable_only and not is_turn_restriction:
+            return
+
+        members = [(str(member.type), member.id) for member in relation.members]
+        way_ids = [
+            member_id for member_type, member_id in members if member_type == "WAY"
+        ]
+        node_ids = [
+            member_id for member_type, member_id in members if member_type == "NODE"
+        ]
+        known_ways = _contains(self._sorted_ways, way_ids)
+
+        if is_turn_restriction and not known_ways.all():
+            # R5 can only apply turn restrictions between ways it knows
+            return
+        if known_ways.any() or self._within_clip(node_ids).any():
+            self._relation_ids.append(relation_id)
+
+    @jpype.JOverride
+    def writeEnd(self):
+        """Collect all nodes, ways, and relations to keep."""
+        self.ways = self._sorted_ways
+        self.nodes = numpy.unique(
+            numpy.concatenate(
+                self._nodes_of_ways + [numpy.array([], dtype=numpy.int64)]
+            )
+        )
+        self.relations = _sorted_ids(self._relation_ids)
+        self._nodes_of_ways = []
+        self._relation_ids = None
+
+
+@jpype.JImplements("com.conveyal.osmlib.OSMEntitySink", deferred=True)
+class _SelectedOsmEntities:
+    """Pass on the OpenStreetMap entities selected by a `_OsmEntitySelection`."""
+
+    def __init__(self, selection, sink):
+        self.selection = selection
+        self.sink = sink
+        self._nodes = []
+        self._ways = []
+
+    def _write_nodes(self):
+        if self._nodes:
+            node_ids, nodes = zip(*self._nodes)
+            keep = _contains(self.selection.nodes, node_ids)
+            if not keep.all():
+                standalone = ~keep
+                keep[standalone] = self.selection.keeps_standalone_nodes(
+                    [node for node, drop in zip(nodes, standalone) if drop]
+                )
+            for node_id, node, keep_node in zip(node_ids, nodes, keep):
+                if keep_node:
+                    self.sink.writeNode(node_id, node)
+            self._nodes = []
+
+    def _write_ways(self):
+        if self._ways:
+            way_ids, ways = zip(*self._ways)
+            for way_id, way, keep_way in zip(
+                way_ids, ways, _contains(self.selection.ways, way_ids)
+            ):
+                if keep_way:
+                    self.sink.writeWay(way_id, way)
+            self._ways = []
+
+    @jpype.JOverride
+    def writeBegin(self):
+        """Start writing an extract."""
+        self.sink.writeBegin()
+
+    @jpype.JOverride
+    def setReplicationTimestamp(self, seconds_since_epoch):
+        """Pass on the replication timestamp."""
+        self.sink.setReplicationTimestamp(seconds_since_epoch)
+
+    @jpype.JOverride
+    def writeNode(self, node_id, node):
+        """Pass on a node, if it was selected."""
+        self._nodes.append((node_id, node))
+        if len(self._nodes) >= CHUNK_SIZE:
+            self._write_nodes()
+
+    @jpype.JOverride
+    def writeWay(self, way_id, way):
+        """Pass on a way, if it was selected."""
+        self._write_nodes()
+        self._ways.append((way_id, way))
+        if len(self._ways) >= CHUNK_SIZE:
+            self._write_ways()
+
+    @jpype.JOverride
+    def writeRelation(self, relation_id, relation):
+        """Pass on a relation, if it was selected."""
+        self._write_nodes()
+        self._write_ways()
+        if _contains(self.selection.relations, [relation_id])[0]:
+            self.sink.writeRelation(relation_id, relation)
+
+    @jpype.JOverride
+    def writeEnd(self):
+        """Finish writing the extract."""
+        self._write_nodes()
+        self._write_ways()
+        self.sink.writeEnd()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+
+"""Cache the geometries of the hops between the stops of trip patterns."""
+
+import numpy
+import pyproj
+import shapely
+
+from ..util import SharedCache
+
+__all__ = ["HopGeometryCache", "PatternHops"]
+
+
+R5_CRS = "EPSG:4326"
+
+
+class PatternHops:
+    """The geometry of a trip pattern, and the distances along it."""
+
+    def __init__(self, hops, transform):
+        """
+        The geometry of a trip pattern, and the distances along it.
+
+        ‘Hops’ in R5 terminology are the LineStrings between each pair of
+        consecutive stops of a trip pattern. `PatternHops` joins them into one
+        array of coordinates, remembers where each stop is on it, and
+        precomputes the cumulative metric length up to each coordinate, so
+        that the geometry and distance between any two stops of the pattern
+        are an array slice and a subtraction.
+
+        Arguments
+        ---------
+        hops : collections.abc.Sequence[shapely.LineString]
+            The hops of a trip pattern, in order, in EPSG:4326
+        transform : collections.abc.Callable
+            A function that reprojects arrays of x and y coordinates in
+            EPSG:4326 to an equidistant reference system, e.g., the
+            `transform` method of a `pyproj.Transformer`
+        """
+        coordinates, hop_index = shapely.get_coordinates(
+            numpy.asarray(hops, dtype=object), return_index=True
+        )
+        first_of_hop = numpy.r_[True, hop_index[1:] != hop_index[:-1]]
+
+        # consecutive hops share their end and start points, keep only one
+        joint = first_of_hop.copy()
+        joint[0] = False
+        joint[1:] &= (coordinates[1:] == coordinates[:-1]).all(axis=1)
+        keep = ~joint
+        position = numpy.cumsum(keep) - 1  # (dropped points: the point before)
+
+        self.coordinates = coordinates[keep]
+
+        # where the geometry of each stop position starts (index into
+        # `coordinates`), the last stop is at the end of the last hop
+        self.stop_positions = numpy.r_[
+            position[first_of_hop],
+            len(self.coordinates) - 1,
+        ]
+
+        x, y = transform(self.coordinates[:, 0], self.coordinates[:, 1])
+        segment_lengths = numpy.hypot(numpy.diff(x), numpy.diff(y))
+        # do not count gaps between hops that do not share their end points
+        gaps = position[first_of_hop & keep][1:]
+        segment_lengths[gaps - 1] = 0.0
+        self.cumulative_lengths = numpy.r_[0.0, numpy.cumsum(segment_lengths)]
+
+        self._wkb = {}  # by board and alight stop position
+
+    def geometry(self, board_stop_position, alight_stop_position):
+        """
+        Return the geometry between two stops of the pattern.
+
+        Arguments
+        ---------
+        board_stop_position : int
+            Position of the first stop in the pattern
+        alight_stop_position : int
+            Position of the last stop in the pattern
+
+        Returns
+        -------
+        shapely.LineString
+            The pattern’s geometry between the two stops, in EPSG:4326
+        """
+        start = self.stop_positions[board_stop_position]
+        end = self.stop_positions[alight_stop_position]
+        return shapely.LineString(self.coordinates[start : end + 1])  # noqa: E203
+
+    def wkb(self, board_stop_position, alight_stop_position):
+        """
+        Return the geometry between two stops as well-known binary.
+
+        The WKB of each pair of stops is computed once, and shared between
+        all trips that ride the pattern between them.
+
+        Arguments
+        ---------
+        board_stop_position : int
+            Position of the first stop in the pattern
+        alight_stop_position : int
+            Position of the last stop in the pattern
+
+        Returns
+        -------
+        bytes
+            The pattern’s geometry between the two stops, in EPSG:4326, as WKB
+        """
+        key = (board_stop_position, alight_stop_position)
+        try:
+            wkb = self._wkb[key]
+        except KeyError:
+            wkb = shapely.to_wkb(self.geometry(*key))
+            self._wkb[key] = wkb
+        return wkb
+
+    def distance(self, board_stop_position, alight_stop_position):
+        """
+        Return the distance between two stops of the pattern.
+
+        Arguments
+        ---------
+        board_stop_position : int
+            Position of the first stop in the pattern
+        alight_stop_position : int
+            Position of the last stop in the pattern
+
+        Returns
+        -------
+        float
+            The length (in metres) of the pattern’s geometry between the stops
+        """
+        return float(
+            self.cumulative_lengths[self.stop_positions[alight_stop_position]]
+            - self.cumulative_lengths[self.stop_positions[board_stop_position]]
+        )
+
+
+class HopGeometryCache(SharedCache):
+    """Cache the geometries of the hops between the stops of trip patterns."""
+
+    def __init__(self, transport_network):
+        """
+        Cache the geometries of the hops between the stops of trip patterns.
+
+        Reading the hop geometries of a trip pattern from R5 is expensive,
+        and popular patterns are part of many detailed itineraries. The
+        cache reads the geometries of each pattern once, and shares them
+        between all trip planners that route on the same transport network.
+
+        Arguments
+        ---------
+        transport_network : r5py.r5.TransportNetwork
+            The transport network whose trip patterns to cache
+        """
+        super().__init__()
+        self.transport_network = transport_network
+        self._transform = pyproj.Transformer.from_crs(
+            R5_CRS,
+            transport_network.EQUIDISTANT_CRS,
+            always_xy=True,
+        ).transform
+
+    def pattern_hops(self, pattern_index):
+        """
+        Return the hop geometries of a trip pattern.
+
+        Arguments
+        ---------
+        pattern_index : int
+            Index of the trip pattern in the transit layer
+
+        Returns
+        -------
+        PatternHops
+            The geometry of the trip pattern, and the distances along it
+        """
+        return self.get(pattern_index, lambda: self._read_pattern_hops(pattern_index))
+
+    def _read_pattern_hops(self, pattern_index):
+        transit_layer = self.transport_network.transit_layer
+        pattern = transit_layer.trip_patterns[pattern_index]
+        hops = shapely.from_wkt(
+            [str(hop.toText()) for hop in pattern.getHopGeometries(transit_layer)]
+        )
+        return PatternHops(hops, self._transform)
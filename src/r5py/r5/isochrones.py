@@ -6,12 +6,10 @@
 import datetime
 import warnings
 
-import geohexgrid
 import geopandas
 import pandas
 import pyproj
 import shapely
-import simplification.cutil
 
 from .base_travel_time_matrix import BaseTravelTimeMatrix
 from .transport_mode import TransportMode
@@ -141,6 +139,8 @@ class Isochrones(BaseTravelTimeMatrix):
         del self.transport_network
 
     def _compute_isochrones_from_travel_times(self, travel_times):
+        import simplification.cutil  # load only when needed
+
         travel_times = travel_times.dropna().groupby("to_id").min().reset_index()
 
         if self.request.percentiles == [50]:
@@ -300,6 +300,8 @@ class Isochrones(BaseTravelTimeMatrix):
 
     @property
     def _regular_point_grid(self):
+        import geohexgrid  # load only when needed
+
         extent = shapely.ops.transform(
             pyproj.Transformer.from_crs(
                 R5_CRS,
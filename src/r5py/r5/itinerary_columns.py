@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+
+
+"""Collect the legs of many detailed itineraries in typed column buffers."""
+
+import array
+import collections
+import datetime
+
+import numpy
+import pandas
+import shapely
+
+from .trip import Trip
+from .trip_leg import TripLeg
+
+__all__ = ["ItineraryColumns", "LegFields"]
+
+
+# the dtypes pandas infers for `datetime.datetime` and `datetime.timedelta`
+# values (their resolution depends on the pandas version)
+DATETIME_DTYPE = pandas.Series([datetime.datetime(1970, 1, 1)]).dtype
+TIMEDELTA_DTYPE = pandas.Series([datetime.timedelta()]).dtype
+
+EPOCH = datetime.datetime(1970, 1, 1)
+NAT = numpy.iinfo(numpy.int64).min  # pandas’ and numpy’s representation of NaT
+
+STRING_COLUMNS = ["feed", "agency_id", "route_id", "start_stop_id", "end_stop_id"]
+
+
+class LegFields(
+    collections.namedtuple(
+        "LegFields",
+        [
+            "leg_type",
+            "transport_mode",
+            "departure_time",
+            "distance",
+            "travel_time",
+            "wait_time",
+            "feed",
+            "agency_id",
+            "route_id",
+            "start_stop_id",
+            "end_stop_id",
+            "wkb",
+        ],
+    )
+):
+    """
+    The fields of one trip leg, as `r5py.r5.TripPlanner` collects them.
+
+    `leg_type` is the class of the trip leg (e.g., `r5py.r5.TransitLeg`),
+    `departure_time` is in seconds since midnight of the departure date (or
+    `None`), `travel_time` and `wait_time` are in seconds, and `wkb` is the
+    leg’s geometry as well-known binary (or `None`). The other fields are
+    the ones of `r5py.r5.TripLeg`.
+    """
+
+    __slots__ = ()
+
+    @property
+    def signature(self):
+        """A hashable summary of this leg, cf. `r5py.r5.TripLeg.signature`."""
+        return self[:-1]
+
+    def as_trip_leg(self, midnight):
+        """
+        Return a `r5py.r5.TripLeg` (of class `leg_type`) with these fields.
+
+        Arguments
+        ---------
+        midnight : datetime.datetime
+            Midnight of the departure date
+
+        Returns
+        -------
+        r5py.r5.TripLeg
+        """
+        trip_leg = self.leg_type.__new__(self.leg_type)
+        TripLeg.__init__(
+            trip_leg,
+            transport_mode=self.transport_mode,
+            distance=self.distance,
+            travel_time=datetime.timedelta(seconds=self.travel_time),
+            wait_time=datetime.timedelta(seconds=self.wait_time),
+            feed=self.feed,
+            agency_id=self.agency_id,
+            route_id=self.route_id,
+            start_stop_id=self.start_stop_id,
+            end_stop_id=self.end_stop_id,
+            geometry=(None if self.wkb is None else shapely.from_wkb(self.wkb)),
+        )
+        if self.departure_time is not None:
+            trip_leg.departure_time = midnight + datetime.timedelta(
+                seconds=self.departure_time
+            )
+        return trip_leg
+
+
+class _CategoricalBuffer:
+    """Collect values as integer codes of a growing set of categories."""
+
+    def __init__(self):
+        self.codes = array.array("q")
+        self.categories = {}
+
+    def append(self, value):
+        if value is None or value != value:  # None, NaN
+            self.codes.append(-1)
+        else:
+            try:
+                self.codes.append(self.categories[value])
+            except KeyError:
+                code = len(self.categories)
+                self.categories[value] = code
+                self.codes.append(code)
+
+    def extend(self, other):
+        # translate the other buffer’s codes into codes of this buffer
+        translation = numpy.array(
+            [
+                self.categories.setdefault(value, len(self.categories))
+                for value in other.categories
+            ]
+            + [-1],  # code -1 (a missing value) stays -1
+            dtype=numpy.int64,
+        )
+        self.codes.frombytes(
+            translation[numpy.frombuffer(other.codes, dtype=numpy.int64)].tobytes()
+        )
+
+    def to_categorical(self):
+        return pandas.Categorical.from_codes(
+            numpy.frombuffer(self.codes, dtype=numpy.int64),
+            categories=pandas.Index(list(self.categories)),
+        )
+
+    def to_values(self):
+        categories = pandas.Index(list(self.categories))
+        if not len(self.codes):
+            return pandas.Series([], dtype=categories.dtype)
+        return pandas.Series(
+            categories.take(numpy.frombuffer(self.codes, dtype=numpy.int64))
+        )
+
+
+class _WKBBuffer:
+    """Collect geometries as well-known binary, in one contiguous buffer."""
+
+    def __init__(self):
+        self.wkb = bytearray()
+        self.offsets = array.array("q", [0])
+
+    def append(self, wkb):
+        if wkb is not None:  # (an empty record is a missing geometry)
+            self.wkb += wkb
+        self.offsets.append(len(self.wkb))
+
+    def extend(self, other):
+        offsets = numpy.frombuffer(other.offsets, dtype=numpy.int64)[1:]
+        self.offsets.frombytes((offsets + len(self.wkb)).tobytes())
+        self.wkb += other.wkb
+
+    def to_wkb(self):
+        wkb = memoryview(self.wkb)
+        records = numpy.empty(len(self.offsets) - 1, dtype=object)
+        records[:] = [
+            bytes(wkb[start:end]) if end > start else None
+            for start, end in zip(self.offsets, self.offsets[1:])
+        ]
+        return records
+
+
+class ItineraryColumns:
+    """Collect the legs of many detailed itineraries in typed column buffers."""
+
+    COLUMNS = ["from_id", "to_id", "option"] + Trip.COLUMNS
+
+    def __init__(self):
+        """
+        Collect the legs of many detailed itineraries in typed column buffers.
+
+        Instead of one table (and data frame) per origin/destination pair,
+        `ItineraryColumns` appends the fields of each trip leg to one buffer
+        per column: times as integer seconds, distances as floats, transport
+        modes and IDs as codes of categories, and geometries as well-known
+        binary (WKB). `to_frame()` turns the buffers into one data frame, at
+        the very end.
+        """
+        self._from_ids = _CategoricalBuffer()
+        self._to_ids = _CategoricalBuffer()
+        self._options = array.array("q")
+        self._segments = array.array("q")
+        self._transport_modes = _CategoricalBuffer()
+        self._departure_times = array.array("q")
+        self._distances = array.array("d")
+        self._travel_times = array.array("q")
+        self._wait_times = array.array("q")
+        self._strings = {column: _CategoricalBuffer() for column in STRING_COLUMNS}
+        self._geometries = _WKBBuffer()
+        self._timezone = None
+
+    def __len__(self):
+        """Count the trip legs collected."""
+        return len(self._segments)
+
+    def append_fields(self, from_id, to_id, trips, midnight):
+        """
+        Add the trips between one origin and one destination.
+
+        Arguments
+        ---------
+        from_id : object
+            ID of the origin
+        to_id : object
+            ID of the destination
+        trips : collections.abc.Iterable[collections.abc.Sequence[LegFields]]
+            The route alternatives (‘options’) between origin and
+            destination, each a sequence of the fields of its legs, as found
+            by `r5py.r5.TripPlanner.trip_fields`
+        midnight : datetime.datetime
+            Midnight of the departure date (the legs’ departure times are
+            in seconds since then)
+        """
+        if midnight.tzinfo is None:
+            midnight_since_epoch = self._seconds_since_epoch(midnight)
+
+            def seconds_since_epoch(departure_time):
+                return midnight_since_epoch + departure_time
+
+        else:
+            # (add the seconds to the wall clock time, as `LegFields.as_trip_leg()`
+            # does, even if the UTC offset changes during the day)
+            def seconds_since_epoch(departure_time):
+                return self._seconds_since_epoch(
+                    midnight + datetime.timedelta(seconds=departure_time)
+                )
+
+        for option, legs in enumerate(trips):
+            for segment, leg in enumerate(legs):
+                self._append(
+                    from_id,
+                    to_id,
+                    option,
+                    segment,
+                    leg.transport_mode,
+                    (
+                        NAT
+                        if leg.departure_time is None
+                        else seconds_since_epoch(leg.departure_time)
+                    ),
+                    leg.distance,
+                    leg.travel_time,
+                    leg.wait_time,
+                    leg[6:11],  # feed, agency_id, route_id, start/end_stop_id
+                    leg.wkb,
+                )
+
+    def append(self, from_id, to_id, trips):
+        """
+        Add the trips between one origin and one destination.
+
+        Arguments
+        ---------
+        from_id : object
+            ID of the origin
+        to_id : object
+            ID of the destination
+        trips : collections.abc.Iterable[r5py.r5.Trip]
+            The route alternatives (‘options’) between origin and destination
+        """
+        for option, trip in enumerate(trips):
+            for segment, leg in enumerate(trip.legs):
+                self._append(
+                    from_id,
+                    to_id,
+                    option,
+                    segment,
+                    leg.transport_mode,
+                    self._seconds_since_epoch(leg.departure_time),
+                    leg.distance,
+                    round(leg.travel_time.total_seconds()),
+                    round(leg.wait_time.total_seconds()),
+                    [getattr(leg, column) for column in STRING_COLUMNS],
+                    leg.wkb,
+                )
+
+    def _append(
+        self,
+        from_id,
+        to_id,
+        option,
+        segment,
+        transport_mode,
+        departure_time,
+        distance,
+        travel_time,
+        wait_time,
+        strings,
+        wkb,
+    ):
+        self._from_ids.append(from_id)
+        self._to_ids.append(to_id)
+        self._options.append(option)
+        self._segments.append(segment)
+        self._transport_modes.append(transport_mode)
+        self._departure_times.append(departure_time)
+        self._distances.append(numpy.nan if distance is None else distance)
+        self._travel_times.append(travel_time)
+        self._wait_times.append(wait_time)
+        for values, value in zip(self._strings.values(), strings):
+            values.append(value)
+        self._geometries.append(wkb)
+
+    def _seconds_since_epoch(self, departure_time):
+        if not isinstance(departure_time, datetime.datetime):
+            return NAT  # None, or numpy.datetime64("NaT")
+        if departure_time.tzinfo is not None:
+            self._timezone = departure_time.tzinfo
+            departure_time = departure_time.astimezone(datetime.timezone.utc).replace(
+                tzinfo=None
+            )
+        return (departure_time - EPOCH) // datetime.timedelta(seconds=1)
+
+    def extend(self, other):
+        """
+        Add the trip legs collected by another `ItineraryColumns`.
+
+        Arguments
+        ---------
+        other : ItineraryColumns
+        """
+        self._from_ids.extend(other._from_ids)
+        self._to_ids.extend(other._to_ids)
+        self._options += other._options
+        self._segments += other._segments
+        self._transport_modes.extend(other._transport_modes)
+        self._departure_times += other._departure_times
+        self._distances += other._distances
+        self._travel_times += other._travel_times
+        self._wait_times += other._wait_times
+        for column, values in self._strings.items():
+            values.extend(other._strings[column])
+        self._geometries.extend(other._geometries)
+        self._timezone = self._timezone or other._timezone
+
+    def to_frame(self, wkb=False):
+        """
+        Return the collected trip legs as a data frame.
+
+        Arguments
+        ---------
+        wkb : bool
+            Return the geometries as well-known binary (`bytes`), rather
+            than as `shapely` geometries
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per trip leg, with the columns `from_id`, `to_id`,
+            `option`, `segment`, `transport_mode` (categorical),
+            `departure_time`, `distance`, `travel_time`, `wait_time`, `feed`,
+            `agency_id`, `route_id`, `start_stop_id`, `end_stop_id` (all
+            categorical), and `geometry`
+        """
+        departure_times = pandas.Series(
+            numpy.array(self._departure_times, dtype=numpy.int64).astype(
+                "datetime64[s]"
+            )
+        ).astype(DATETIME_DTYPE)
+        if self._timezone is not None:
+            departure_times = departure_times.dt.tz_localize("UTC").dt.tz_convert(
+                self._timezone
+            )
+
+        geometries = self._geometries.to_wkb()
+        if not wkb:
+            geometries = shapely.from_wkb(geometries)
+
+        columns = {
+            "from_id": self._from_ids.to_values(),
+            "to_id": self._to_ids.to_values(),
+            "option": numpy.array(self._options, dtype=numpy.int64),
+            "segment": numpy.array(self._segments, dtype=numpy.int64),
+            "transport_mode": self._transport_modes.to_categorical(),
+            "departure_time": departure_times,
+            "distance": numpy.array(self._distances, dtype=numpy.float64),
+            "travel_time": pandas.Series(
+                numpy.array(self._travel_times, dtype=numpy.int64).astype(
+                    "timedelta64[s]"
+                )
+            ).astype(TIMEDELTA_DTYPE),
+            "wait_time": pandas.Series(
+                numpy.array(self._wait_times, dtype=numpy.int64).astype(
+                    "timedelta64[s]"
+                )
+            ).astype(TIMEDELTA_DTYPE),
+        }
+        for column, values in self._strings.items():
+            columns[column] = values.to_categorical()
+        columns["geometry"] = pandas.Series(geometries, dtype=object)
+
+        return pandas.DataFrame(columns, columns=self.COLUMNS)
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+
+"""Find detailed itineraries between origin/destination pairs."""
+
+import copy
+import warnings
+
+from .itinerary_columns import ItineraryColumns
+from .origin_transit_search import OriginTransitSearch
+from .trip_planner import TripPlanner
+from ..util import Config, Instrumentation, SharedCache
+
+__all__ = ["ItineraryRouter"]
+
+
+class ItineraryRouter:
+    """Find detailed itineraries between origin/destination pairs."""
+
+    # keep the street searches from this many origins: the destinations of
+    # an origin are routed one after another (possibly, in several parallel
+    # tasks), only the origins currently being routed are needed
+    MAX_CACHED_ORIGINS = 256
+
+    # unless routing all-to-all, keep the street searches to this many
+    # destinations (most recently used)
+    MAX_CACHED_DESTINATIONS = 1_000
+
+    def __init__(
+        self,
+        transport_network,
+        request,
+        origins,
+        destinations,
+        transit_search_per_origin=False,
+        geometry=True,
+        max_options=None,
+        all_to_all=True,
+    ):
+        """
+        Find detailed itineraries between origin/destination pairs.
+
+        The street searches from an origin to the public transport stops, and
+        from the stops to a destination, are shared between the
+        origin/destination pairs (and threads) that need them: when routing
+        all-to-all, each runs once per router; otherwise, the searches of
+        the most recently routed origins and destinations are reused.
+
+        Arguments
+        ---------
+        transport_network : r5py.r5.TransportNetwork
+            The transport network to route on
+        request : r5py.r5.RegionalTask
+            The parameters of the searches (and their ``instrumentation``)
+        origins : geopandas.GeoDataFrame
+            Places to find routes from, in EPSG:4326, with an `id` column
+        destinations : geopandas.GeoDataFrame
+            Places to find routes to, in EPSG:4326, with an `id` column
+        transit_search_per_origin : bool
+            Run one public transport search per origin, cf.
+            `r5py.DetailedItineraries`
+        geometry : bool
+            Construct the geometries of the trip legs
+        max_options : int | None
+            Report at most this many route alternatives per pair
+        all_to_all : bool
+            Whether each origin is routed to all destinations. If so, the
+            egress searches to all destinations are kept, otherwise, only
+            those to the ``MAX_CACHED_DESTINATIONS`` most recently routed
+            ones, so that memory use does not grow with the number of pairs.
+        """
+        self.transport_network = transport_network
+        self.request = request
+        self.instrumentation = request.instrumentation
+        self.origins = origins.set_index("id").geometry
+        self.destinations = destinations.set_index("id").geometry
+        self.transit_search_per_origin = transit_search_per_origin
+        self.geometry = geometry
+        self.max_options = max_options
+
+        # access legs (and public transport searches) from each origin, and
+        # egress legs from the public transport stops to each destination,
+        # shared between all tasks (and threads) that route from the origin,
+        # or to the destination
+        self._origin_searches = SharedCache(max_size=self.MAX_CACHED_ORIGINS)
+        self._egress_paths = SharedCache(
+            max_size=(None if all_to_all else self.MAX_CACHED_DESTINATIONS)
+        )
+
+        # export the geometries all trip planners share before they start
+        # routing (possibly, in many threads, or many processes that then
+        # load the exported edge geometries from their cache file)
+        if geometry:
+            _ = transport_network.edge_geometries
+        if self._routes_on_public_transport:
+            _ = transport_network.hop_geometries
+
+    @property
+    def _routes_on_public_transport(self):
+        return any(mode.is_transit_mode for mode in self.request.transport_modes)
+
+    def _request_for_od_pair(self, from_id, to_id):
+        """Copy the request, set origin and destination coordinates."""
+        origin = self.origins[from_id]
+        destination = self.destinations[to_id]
+
+        request = copy.copy(self.request)
+        request._regional_task.fromLat = origin.y
+        request._regional_task.fromLon = origin.x
+        request._regional_task.toLat = destination.y
+        request._regional_task.toLon = destination.x
+        return request
+
+    def route(self, od_pairs):
+        """
+        Find detailed itineraries between origin/destination pairs.
+
+        Arguments
+        ---------
+        od_pairs : pandas.DataFrame
+            Pairs of origin and destination IDs, in columns `id_origin` and
+            `id_destination`
+
+        Returns
+        -------
+        r5py.r5.ItineraryColumns
+            The itineraries found
+        """
+        itineraries = ItineraryColumns()
+        for from_id, origin_od_pairs in od_pairs.groupby("id_origin", sort=False):
+            itineraries.extend(
+                self.route_from_origin(from_id, origin_od_pairs["id_destination"])
+            )
+        return itineraries
+
+    def route_from_origin(self, from_id, to_ids):
+        """
+        Find detailed itineraries from one origin to many destinations.
+
+        Arguments
+        ---------
+        from_id : object
+            ID of the origin
+        to_ids : pandas.Series
+            IDs of the destinations
+
+        Returns
+        -------
+        r5py.r5.ItineraryColumns
+            The itineraries found
+        """
+        access_paths = None
+        origin_transit_search = None
+        if self._routes_on_public_transport:
+            access_paths, origin_transit_search = self._origin_searches.get(
+                from_id, lambda: self._search_from_origin(from_id, to_ids.iloc[0])
+            )
+
+        itineraries = ItineraryColumns()
+        for to_id in to_ids:
+            self._route_od_pair(
+                itineraries, from_id, to_id, access_paths, origin_transit_search
+            )
+        return itineraries
+
+    def _search_from_origin(self, from_id, to_id):
+        """Find the access legs (and public transport routes) from an origin."""
+        request = self._request_for_od_pair(from_id, to_id)
+        trip_planner = TripPlanner(
+            self.transport_network, request, geometry=self.geometry
+        )
+        access_paths = trip_planner._transit_access_paths
+
+        origin_transit_search = None
+        if self.transit_search_per_origin:
+            origin_transit_search = OriginTransitSearch(
+                self.transport_network,
+                request,
+                trip_planner._transit_access_times,
+            )
+            # (search right away, in this thread, not in each of the threads
+            # that route to the origin’s destinations)
+            _ = origin_transit_search.stop_states
+
+        return access_paths, origin_transit_search
+
+    def _route_od_pair(
+        self,
+        itineraries,
+        from_id,
+        to_id,
+        access_paths=None,
+        origin_transit_search=None,
+    ):
+        with self.instrumentation.phase("route_od_pair"):
+            request = self._request_for_od_pair(from_id, to_id)
+
+            egress_paths = None
+            if self._routes_on_public_transport:
+                egress_paths = self._egress_paths.get(
+                    to_id,
+                    lambda: TripPlanner(
+                        self.transport_network, request, geometry=self.geometry
+                    )._transit_egress_paths,
+                )
+
+            trip_planner = TripPlanner(
+                self.transport_network,
+                request,
+                access_paths=access_paths,
+                egress_paths=egress_paths,
+                origin_transit_search=origin_transit_search,
+                geometry=self.geometry,
+                max_options=self.max_options,
+            )
+            trips = trip_planner.trip_fields
+
+            with self.instrumentation.phase("tabulate_trips"):
+                itineraries.append_fields(
+                    from_id, to_id, trips, trip_planner.departure_midnight
+                )
+
+
+# transport networks loaded by this (worker) process, by cache file
+_transport_networks = {}
+
+
+def worker_config_arguments(worker_processes):
+    """
+    Prepare this process’s configuration for worker processes.
+
+    The worker processes start their own JVMs, this process and the worker
+    processes share the relative `--max-memory` evenly.
+
+    Arguments
+    ---------
+    worker_processes : int
+        Number of worker processes
+
+    Returns
+    -------
+    argparse.Namespace
+        The arguments to pass to `route_in_worker_process()`
+    """
+    config_arguments = copy.copy(Config().arguments)
+    config_arguments.max_memory_processes *= worker_processes + 1
+    return config_arguments
+
+
+def route_in_worker_process(
+    transport_network_cache_file,
+    request_arguments,
+    origins,
+    destinations,
+    od_pairs,
+    config_arguments=None,
+    instrumentation=False,
+    **router_arguments,
+):
+    """
+    Find detailed itineraries in a worker process.
+
+    Each worker process loads the transport network from its cache file
+    once, and keeps it for all chunks of origin/destination pairs it routes.
+
+    Arguments
+    ---------
+    transport_network_cache_file : pathlib.Path
+        The transport network, as cached by `r5py.TransportNetwork`
+    request_arguments : dict
+        Arguments for `r5py.r5.RegionalTask`
+    origins : geopandas.GeoDataFrame
+        Places to find routes from (at least those in `od_pairs`)
+    destinations : geopandas.GeoDataFrame
+        Places to find routes to (at least those in `od_pairs`)
+    od_pairs : pandas.DataFrame
+        Pairs of origin and destination IDs, in columns `id_origin` and
+        `id_destination`
+    config_arguments : argparse.Namespace
+        The configuration of the parent process, as prepared by
+        `worker_config_arguments()`; applied before the worker starts a JVM
+    instrumentation : bool
+        Record the time of the phases of the computation
+    **router_arguments
+        Further arguments for `ItineraryRouter`
+
+    Returns
+    -------
+    tuple[r5py.r5.ItineraryColumns, list[r5py.util.PhaseTiming]]
+        The itineraries found, and the timings recorded
+    """
+    from .regional_task import RegionalTask
+    from .transport_network import TransportNetwork
+
+    if config_arguments is not None:
+        Config().adopt_arguments(config_arguments)
+
+    instrumentation = Instrumentation(enabled=instrumentation)
+
+    try:
+        transport_network = _transport_networks[transport_network_cache_file]
+    except KeyError:
+        with instrumentation.phase("load_transport_network"):
+            with warnings.catch_warnings():
+                # the main process has shown any warnings already
+                warnings.simplefilter("ignore")
+                transport_network = TransportNetwork.from_cache_file(
+                    transport_network_cache_file
+                )
+        _transport_networks[transport_network_cache_file] = transport_network
+
+    request = RegionalTask(
+        transport_network,
+        origin=None,
+        destinations=None,
+        instrumentation=instrumentation,
+        **request_arguments,
+    )
+    router = ItineraryRouter(
+        transport_network, request, origins, destinations, **router_arguments
+    )
+    itineraries = router.route(od_pairs)
+    transport_network.transfer_legs.save()
+
+    timings = list(instrumentation.records.itertuples(index=False, name=None))
+    return itineraries, timings
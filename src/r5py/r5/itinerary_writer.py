@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+
+"""Write detailed itineraries to a GeoParquet file, batch by batch."""
+
+import json
+
+import pyproj
+
+from .itinerary_columns import ItineraryColumns, STRING_COLUMNS
+
+__all__ = ["ItineraryWriter"]
+
+
+R5_CRS = "EPSG:4326"
+
+
+class ItineraryWriter:
+    """Write detailed itineraries to a GeoParquet file, batch by batch."""
+
+    ROWS_PER_BATCH = 100_000
+
+    def __init__(self, path, rows_per_batch=ROWS_PER_BATCH):
+        """
+        Write detailed itineraries to a GeoParquet file, batch by batch.
+
+        `write()` collects itineraries until there are at least
+        `rows_per_batch` trip legs, then writes them as one row group, so
+        that at most one batch of itineraries is kept in memory. Transport
+        modes are written as their names, geometries (in EPSG:4326) as WKB.
+        Use the writer as a context manager, or call `close()` when done.
+
+        Arguments
+        ---------
+        path : str | pathlib.Path
+            The GeoParquet file to write (is overwritten if it exists)
+        rows_per_batch : int
+            Number of trip legs to write at once
+
+        Raises
+        ------
+        ImportError
+            If `pyarrow`, which writes the file, is not installed
+        """
+        self.check_dependencies()
+
+        self.path = path
+        self.rows_per_batch = rows_per_batch
+        self._batch = ItineraryColumns()
+        self._schema = None
+        self._writer = None
+
+    @staticmethod
+    def check_dependencies():
+        """
+        Check that `pyarrow` is installed, raise an `ImportError` otherwise.
+
+        Call this before computing any itineraries, rather than failing when
+        writing the first batch.
+        """
+        try:
+            import pyarrow  # noqa: F401
+            import pyarrow.parquet  # noqa: F401
+        except ImportError as exception:
+            raise ImportError(
+                "Writing itineraries to an `output_file` requires `pyarrow`, "
+                "install it, e.g., using `pip install 'r5py[parquet]'`"
+            ) from exception
+
+    def __enter__(self):
+        """Provide a context."""
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        """Write remaining itineraries, close the file."""
+        self.close()
+        return False
+
+    def write(self, itineraries):
+        """
+        Write itineraries (once a batch is complete).
+
+        Arguments
+        ---------
+        itineraries : r5py.r5.ItineraryColumns
+            Itineraries to write
+        """
+        self._batch.extend(itineraries)
+        if len(self._batch) >= self.rows_per_batch:
+            self._write_batch()
+
+    def close(self):
+        """Write remaining itineraries, close the file."""
+        if len(self._batch) or self._writer is None:
+            self._write_batch()
+        self._writer.close()
+
+    def _write_batch(self):
+        import pyarrow
+        import pyarrow.parquet  # load only when needed (cf. `check_dependencies`)
+
+        # (the geometries are collected as WKB already)
+        frame = self._batch.to_frame(wkb=True)
+        self._batch = ItineraryColumns()
+
+        frame["transport_mode"] = frame["transport_mode"].cat.rename_categories(
+            lambda transport_mode: transport_mode.name
+        )
+        for column in ["transport_mode"] + STRING_COLUMNS:
+            frame[column] = frame[column].astype(object)
+
+        if self._schema is None:
+            self._schema = self._arrow_schema(frame)
+            self._writer = pyarrow.parquet.ParquetWriter(self.path, self._schema)
+
+        self._writer.write_table(
+            pyarrow.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+        )
+
+    @staticmethod
+    def _arrow_schema(frame):
+        """Derive a schema from the first batch, add GeoParquet metadata."""
+        import pyarrow
+
+        schema = pyarrow.Schema.from_pandas(frame, preserve_index=False)
+
+        # a first batch might have no values at all in some columns
+        for column in ["transport_mode"] + STRING_COLUMNS:
+            schema = schema.set(
+                schema.get_field_index(column), pyarrow.field(column, pyarrow.string())
+            )
+        schema = schema.set(
+            schema.get_field_index("geometry"),
+            pyarrow.field("geometry", pyarrow.binary()),
+        )
+
+        geo_metadata = {
+            "version": "1.0.0",
+            "primary_column": "geometry",
+            "columns": {
+                "geometry": {
+                    "encoding": "WKB",
+                    "geometry_types": [],
+                    "crs": pyproj.CRS(R5_CRS).to_json_dict(),
+                },
+            },
+        }
+        return schema.with_metadata(
+            {**(schema.metadata or {}), b"geo": json.dumps(geo_metadata).encode()}
+        )
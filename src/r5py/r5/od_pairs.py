@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+
+"""Generate pairs of origins and destinations, lazily."""
+
+import numpy
+import pandas
+
+__all__ = ["OdPairs"]
+
+
+class OdPairs:
+    """Generate pairs of origins and destinations, lazily."""
+
+    def __init__(self, origin_ids, destination_ids, all_to_all=True):
+        """
+        Generate pairs of origins and destinations, lazily.
+
+        All-to-all routing pairs every origin with every destination. Instead
+        of materialising all pairs at once, `OdPairs` generates them origin by
+        origin, or in chunks of whole origins.
+
+        Arguments
+        ---------
+        origin_ids : pandas.Series
+            IDs of the origins
+        destination_ids : pandas.Series
+            IDs of the destinations
+        all_to_all : bool
+            Pair each origin with each destination. If `False`, pair the
+            first origin with the first destination, the second origin with
+            the second destination, etc.
+        """
+        self.origin_ids = pandas.Series(origin_ids).reset_index(drop=True)
+        self.destination_ids = pandas.Series(destination_ids).reset_index(drop=True)
+        self.all_to_all = all_to_all
+        if not all_to_all and len(self.origin_ids) != len(self.destination_ids):
+            raise ValueError(
+                "Origins and destinations must be of the same length, "
+                "unless routing all-to-all"
+            )
+
+    def __len__(self):
+        """Count the origin/destination pairs."""
+        if self.all_to_all:
+            return len(self.origin_ids) * len(self.destination_ids)
+        return len(self.origin_ids)
+
+    def per_origin(self, max_destinations=None):
+        """
+        Generate the destinations of each origin.
+
+        Arguments
+        ---------
+        max_destinations : int | None
+            Generate at most this many destinations at once: the destinations
+            of an origin that has more are split into several consecutive
+            parts. `None`: generate all destinations of an origin at once.
+
+        Yields
+        ------
+        tuple[object, pandas.Series]
+            The ID of an origin, and the IDs of (some of) its destinations
+        """
+        if max_destinations is not None and max_destinations < 1:
+            raise ValueError("`max_destinations` must be a positive integer or `None`")
+
+        if self.all_to_all:
+            if len(self.destination_ids) == 0:
+                return
+            if max_destinations is None or max_destinations >= len(
+                self.destination_ids
+            ):
+                parts = [self.destination_ids]
+            else:
+                parts = [
+                    self.destination_ids.iloc[
+                        start : start + max_destinations  # noqa: E203
+                    ]
+                    for start in range(0, len(self.destination_ids), max_destinations)
+                ]
+            for origin_id in self.origin_ids:
+                for destination_ids in parts:
+                    yield origin_id, destination_ids
+        else:
+            for i, origin_id in enumerate(self.origin_ids):
+                yield origin_id, self.destination_ids.iloc[i : i + 1]  # noqa: E203
+
+    def chunks(self, chunk_size):
+        """
+        Generate the origin/destination pairs in chunks of whole origins.
+
+        Arguments
+        ---------
+        chunk_size : int
+            Approximate number of pairs per chunk. All pairs of an origin are
+            in the same chunk, even if they are more than `chunk_size`.
+
+        Yields
+        ------
+        pandas.DataFrame
+            Pairs of origin and destination IDs, in columns `id_origin` and
+            `id_destination`
+        """
+        if self.all_to_all:
+            origins_per_chunk = max(chunk_size // max(len(self.destination_ids), 1), 1)
+        else:
+            origins_per_chunk = chunk_size
+
+        for start in range(0, len(self.origin_ids), origins_per_chunk):
+            origin_ids = self.origin_ids.iloc[
+                start : start + origins_per_chunk  # noqa: E203
+            ]
+            if self.all_to_all:
+                yield pandas.DataFrame(
+                    {
+                        "id_origin": numpy.repeat(
+                            origin_ids.to_numpy(), len(self.destination_ids)
+                        ),
+                        "id_destination": numpy.tile(
+                            self.destination_ids.to_numpy(), len(origin_ids)
+                        ),
+                    }
+                )
+            else:
+                yield pandas.DataFrame(
+                    {
+                        "id_origin": origin_ids.to_numpy(),
+                        "id_destination": self.destination_ids.iloc[
+                            start : start + origins_per_chunk  # noqa: E203
+                        ].to_numpy(),
+                    }
+                )
+
+    def to_frame(self):
+        """
+        Return all origin/destination pairs at once.
+
+        Returns
+        -------
+        pandas.DataFrame
+            Pairs of origin and destination IDs, in columns `id_origin` and
+            `id_destination`
+        """
+        # (one chunk that is large enough for all pairs)
+        return next(
+            self.chunks(max(len(self), 1)),
+            pandas.DataFrame(
+                {
+                    "id_origin": self.origin_ids.iloc[:0].to_numpy(),
+                    "id_destination": self.destination_ids.iloc[:0].to_numpy(),
+                }
+            ),
+        )
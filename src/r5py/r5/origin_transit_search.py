@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+
+"""Search public transport routes from one origin to many destinations."""
+
+import collections
+import copy
+import functools
+
+import jpype
+
+__all__ = ["OriginTransitSearch"]
+
+
+# An egress from the stop of `back` to the destination, arriving at `time`;
+# mimics the final states of R5’s `McRaptorSuboptimalPathProfileRouter`
+EgressState = collections.namedtuple("EgressState", ["stop", "back", "time"])
+
+
+class OriginTransitSearch:
+    """Search public transport routes from one origin to many destinations."""
+
+    def __init__(self, transport_network, request, access_times):
+        """
+        Search public transport routes from one origin to many destinations.
+
+        R5’s multi-criteria public transport router
+        (`McRaptorSuboptimalPathProfileRouter`) keeps the (suboptimal) states
+        it reaches at every stop, and then, for one destination, only the
+        final states that are within `request.suboptimal_minutes` of the
+        fastest route to that destination. `OriginTransitSearch` runs the
+        router once per origin, without a destination, keeps the states at
+        all stops, and then selects the final states for any number of
+        destinations, given their egress times.
+
+        Arguments
+        ---------
+        transport_network : r5py.r5.TransportNetwork
+            A transport network to route on
+        request : r5py.r5.RegionalTask
+            The parameters of the search (and its ``instrumentation``), the
+            origin is ``request.fromLat``, ``request.fromLon``
+        access_times : java.util.Map
+            Times from the origin to the stops, per access mode, as used by
+            `McRaptorSuboptimalPathProfileRouter`, cf.
+            `r5py.r5.TripPlanner._transit_access_times`
+        """
+        self.transport_network = transport_network
+        self.request = request
+        self.instrumentation = request.instrumentation
+        self.access_times = access_times
+
+    @functools.cached_property
+    def suboptimal_time(self):
+        """How much slower than the fastest route suboptimal routes can be (s)."""
+        return max(self.request._regional_task.suboptimalMinutes, 0) * 60
+
+    @functools.cached_property
+    def stop_states(self):
+        """
+        The router states at each stop, per departure time.
+
+        Returns
+        -------
+        dict[int, dict[int, list[com.conveyal.r5.profile.McRaptorSuboptimalPathProfileRouter.McRaptorState]]]
+            Departure time (seconds after midnight): stop index: states that
+            arrived at the stop on a public transport vehicle
+        """  # noqa: E501
+        import com.conveyal.r5
+        import gnu.trove.map
+
+        # the router creates one dominating list per state bag (i.e., per
+        # stop and departure time), keep a reference to all of them, and read
+        # the states they retained after the search
+        dominating_lists = collections.defaultdict(list)
+        suboptimal_minutes = max(self.request._regional_task.suboptimalMinutes, 0)
+
+        def list_supplier_callback(departure_time):
+            dominating_list = com.conveyal.r5.profile.SuboptimalDominatingList(
+                suboptimal_minutes
+            )
+            dominating_lists[int(departure_time)].append(dominating_list)
+            return dominating_list
+
+        # no egress: this search does not have a destination
+        egress_times = jpype.JObject(
+            {
+                com.conveyal.r5.api.util.LegMode
+                @ mode: gnu.trove.map.hash.TIntIntHashMap()
+                for mode in self.request.egress_modes
+            },
+            "java.util.Map<com.conveyal.r5.LegMode, gnu.trove.map.TIntIntMap>",
+        )
+
+        transit_router = com.conveyal.r5.profile.McRaptorSuboptimalPathProfileRouter(
+            self.transport_network,
+            copy.copy(self.request),
+            self.access_times,
+            egress_times,
+            list_supplier_callback,
+            None,
+            True,
+        )
+        with self.instrumentation.phase("transit_search"):
+            transit_router.route()
+
+        stop_states = {}
+        for departure_time, lists in dominating_lists.items():
+            states = set()
+            for dominating_list in lists:
+                states.update(dominating_list.getNonDominatedStates())
+            states_by_stop = collections.defaultdict(list)
+            for state in states:
+                # (like R5, egress only from states that arrived by transit)
+                if state.stop >= 0 and state.pattern != -1:
+                    states_by_stop[state.stop].append(state)
+            stop_states[departure_time] = dict(states_by_stop)
+        return stop_states
+
+    def final_states(self, egress_paths):
+        """
+        Find the final states of routes to one destination.
+
+        Arguments
+        ---------
+        egress_paths : dict[r5py.TransportMode, dict[int, r5py.r5.EgressLeg]]
+            Egress legs from the stops to the destination, by egress mode and
+            stop index, cf. `r5py.r5.TripPlanner._transit_egress_paths`
+
+        Returns
+        -------
+        list[tuple[int, EgressState]]
+            Departure times (seconds after midnight) and final states of the
+            routes to the destination that arrive at most
+            `request.suboptimal_minutes` later than the fastest one, and take
+            at most `request.max_time`
+        """
+        egress_times = {}
+        for egress_legs in egress_paths.values():
+            for stop, egress_leg in egress_legs.items():
+                egress_time = round(egress_leg.travel_time.total_seconds())
+                egress_times[stop] = min(
+                    egress_time, egress_times.get(stop, egress_time)
+                )
+
+        max_time = self.request.max_time.total_seconds()
+
+        final_states = []
+        for departure_time, states_by_stop in self.stop_states.items():
+            candidates = [
+                EgressState(-1, state, state.time + egress_time)
+                for stop, egress_time in egress_times.items()
+                for state in states_by_stop.get(stop, [])
+                if state.time + egress_time - departure_time <= max_time
+            ]
+            if candidates:
+                fastest = min(candidate.time for candidate in candidates)
+                final_states += [
+                    (departure_time, candidate)
+                    for candidate in candidates
+                    if candidate.time <= fastest + self.suboptimal_time
+                ]
+        return final_states
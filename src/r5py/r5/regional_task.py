@@ -10,18 +10,11 @@ import jpype
 
 from .scenario import Scenario
 from .transport_mode import TransportMode
-from ..util import start_jvm
-
-import java.io
-import java.time
-import com.conveyal.r5
+from ..util import Instrumentation
 
 __all__ = ["RegionalTask"]
 
 
-start_jvm()
-
-
 class RegionalTask:
     """Create a RegionalTask, a computing request for R5."""
 
@@ -44,6 +37,7 @@ class RegionalTask:
         speed_cycling=12.0,
         max_public_transport_rides=8,
         max_bicycle_traffic_stress=3,
+        instrumentation=None,
     ):
         """
         Create a RegionalTask, a computing request for R5.
@@ -111,7 +105,15 @@ class RegionalTask:
         max_bicycle_traffic_stress : int
             Maximum stress level for cyclist routing, ranges from 1-4 see
             https://docs.conveyal.com/learn-more/traffic-stress Default: 3
+        instrumentation : bool | r5py.util.Instrumentation
+            Record how much time the phases of computations using this
+            request take, see ``r5py.util.Instrumentation``. Default: do not
+            record
         """
+        import com.conveyal.r5
+
+        self.instrumentation = Instrumentation.from_argument(instrumentation)
+
         self._regional_task = com.conveyal.r5.analyst.cluster.RegionalTask()
         self.scenario = Scenario()
 
@@ -177,6 +179,8 @@ class RegionalTask:
 
     @access_modes.setter
     def access_modes(self, access_modes):
+        import com.conveyal.r5
+
         # eliminate duplicates, cast to TransportMode (converts str values)
         access_modes = set(TransportMode(mode) for mode in set(access_modes))
         self._access_modes = access_modes
@@ -196,6 +200,8 @@ class RegionalTask:
 
     @departure.setter
     def departure(self, departure):
+        import java.time
+
         # fmt: off
         if (
             [mode for mode in self.transport_modes if mode.is_transit_mode]
@@ -270,32 +276,36 @@ class RegionalTask:
 
     @destinations.setter
     def destinations(self, destinations):
+        import com.conveyal.r5
+        import java.io
+
         if destinations is not None:
             self._destinations = destinations
 
-            # wrap destinations in a few layers of streams (yeah, Java)
-            output_stream = java.io.ByteArrayOutputStream()
-            data_output_stream = java.io.DataOutputStream(output_stream)
-
-            # first: number of destinations
-            data_output_stream.writeInt(len(destinations))
-
-            # then, data columns, one by one, then still ‘opportunties’
-            for id_ in destinations.id.astype(str):
-                data_output_stream.writeUTF(id_)
-            for lat in destinations.geometry.y:
-                data_output_stream.writeDouble(lat)
-            for lon in destinations.geometry.x:
-                data_output_stream.writeDouble(lon)
-            for _ in range(len(destinations)):
-                data_output_stream.writeDouble(0)  # ‘opportunities’
-
-            # convert to input stream, then into a point set
-            destinations_point_set = com.conveyal.r5.analyst.FreeFormPointSet(
-                java.io.ByteArrayInputStream(output_stream.toByteArray())
-            )
+            with self.instrumentation.phase("serialise_destinations"):
+                # wrap destinations in a few layers of streams (yeah, Java)
+                output_stream = java.io.ByteArrayOutputStream()
+                data_output_stream = java.io.DataOutputStream(output_stream)
+
+                # first: number of destinations
+                data_output_stream.writeInt(len(destinations))
+
+                # then, data columns, one by one, then still ‘opportunties’
+                for id_ in destinations.id.astype(str):
+                    data_output_stream.writeUTF(id_)
+                for lat in destinations.geometry.y:
+                    data_output_stream.writeDouble(lat)
+                for lon in destinations.geometry.x:
+                    data_output_stream.writeDouble(lon)
+                for _ in range(len(destinations)):
+                    data_output_stream.writeDouble(0)  # ‘opportunities’
+
+                # convert to input stream, then into a point set
+                destinations_point_set = com.conveyal.r5.analyst.FreeFormPointSet(
+                    java.io.ByteArrayInputStream(output_stream.toByteArray())
+                )
 
-            self._regional_task.destinationPointSets = [destinations_point_set]
+                self._regional_task.destinationPointSets = [destinations_point_set]
 
             # TODO: figure out whether we could cut this a bit shorter. We
             # should be able to construct the ByteArray fed to
@@ -310,6 +320,8 @@ class RegionalTask:
 
     @egress_modes.setter
     def egress_modes(self, egress_modes):
+        import com.conveyal.r5
+
         # eliminate duplicates, cast to TransportMode (converts str values)
         egress_modes = set(TransportMode(mode) for mode in set(egress_modes))
         self._egress_modes = egress_modes
@@ -511,6 +523,8 @@ class RegionalTask:
 
     @transport_modes.setter
     def transport_modes(self, transport_modes):
+        import com.conveyal.r5
+
         # eliminate duplicates, cast to TransportMode (converts str values)
         transport_modes = set(TransportMode(mode) for mode in set(transport_modes))
         self._transport_modes = transport_modes
@@ -579,6 +593,8 @@ class RegionalTask:
     @staticmethod
     def _enum_set(values, java_class):
         # helper function to construct a Java EnumSet out of a list of enum.Enum
+        import java.util
+
         enum_set = java.util.EnumSet.noneOf(java_class)
         for mode in values:
             enum_set.add(java_class.valueOf(mode.value))
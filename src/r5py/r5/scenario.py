@@ -4,21 +4,16 @@
 
 import jpype
 
-from ..util import start_jvm
-
-import com.conveyal.r5
-
 __all__ = ["Scenario"]
 
 
-start_jvm()
-
-
 class Scenario:
     """Wrap a com.conveyal.r5.analyst.scenario.Scenario."""
 
     def __init__(self):
         """Initialise a most simple Scenario."""
+        import com.conveyal.r5
+
         scenario = com.conveyal.r5.analyst.scenario.Scenario()
         scenario.id = "id"
         self._scenario = scenario
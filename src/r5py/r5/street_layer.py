@@ -10,16 +10,10 @@ import jpype.types
 import shapely
 
 from .transport_mode import TransportMode
-from ..util import start_jvm
-
-import com.conveyal.r5
 
 __all__ = ["StreetLayer"]
 
 
-start_jvm()
-
-
 EMPTY_POINT = shapely.Point()
 
 
@@ -53,7 +47,7 @@ class StreetLayer:
     def find_split(
         self,
         point,
-        radius=com.conveyal.r5.streets.StreetLayer.LINK_RADIUS_METERS,
+        radius=None,
         street_mode=TransportMode.WALK,
     ):
         """
@@ -64,7 +58,8 @@ class StreetLayer:
         point : shapely.Point
             Find a location close to this point
         radius : float
-            Search radius around `point`
+            Search radius around `point`, default:
+            `com.conveyal.r5.streets.StreetLayer.LINK_RADIUS_METERS`
         street_mode : travel mode that the snapped-to street should allow
 
         Returns
@@ -73,6 +68,11 @@ class StreetLayer:
             Closest location on the street network or `POINT EMPTY` if no
             such location could be found within `radius`
         """
+        import com.conveyal.r5
+
+        if radius is None:
+            radius = com.conveyal.r5.streets.StreetLayer.LINK_RADIUS_METERS
+
         try:
             split = self._street_layer.findSplit(point.y, point.x, radius, street_mode)
             return shapely.Point(
@@ -4,6 +4,7 @@
 
 import datetime
 
+import numpy
 import shapely
 
 __all__ = ["StreetSegment"]
@@ -16,7 +17,7 @@ class StreetSegment:
     duration = datetime.timedelta()
     geometry = shapely.LineString()
 
-    def __init__(self, street_path):
+    def __init__(self, street_path, edge_geometries=None, geometry=True):
         """
         Initialise a less complex StreetSegment.
 
@@ -24,16 +25,32 @@ class StreetSegment:
         ---------
         street_path : com.conveyal.r5.profile.StreetPath
             StreetPath, obtained, e.g., from StreetRouter state
+        edge_geometries : r5py.r5.EdgeGeometries | None
+            The geometries of the street layer’s edges, exported in bulk. If
+            omitted, or if it does not cover all edges of `street_path`, read
+            the geometries of the edges from R5 one by one.
+        geometry : bool
+            Whether to assemble the segment’s geometry. If `False`, set
+            `geometry` to `None`; the distance is read from R5 regardless.
         """
         self.distance = street_path.getDistance()
         self.duration = street_path.getDuration()
-        self.geometry = shapely.line_merge(
-            shapely.MultiLineString(
-                [
-                    shapely.from_wkt(
-                        str(street_path.getEdge(edge).getGeometry().toText())
-                    )
-                    for edge in street_path.getEdges()
-                ]
+
+        if not geometry:
+            self.geometry = None
+            return
+
+        edges = numpy.fromiter(street_path.getEdges(), dtype=numpy.int64)
+        if edge_geometries is not None and edge_geometries.covers(edges):
+            self.geometry = edge_geometries.geometry(edges)
+        else:
+            self.geometry = shapely.line_merge(
+                shapely.MultiLineString(
+                    [
+                        shapely.from_wkt(
+                            str(street_path.getEdge(int(edge)).getGeometry().toText())
+                        )
+                        for edge in edges
+                    ]
+                )
             )
-        )
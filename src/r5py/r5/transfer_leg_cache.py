@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+
+"""Cache the walking legs between public transport stops of a transport network."""
+
+import collections
+import os
+import pickle
+
+import filelock
+
+from ..util import Config, SharedCache
+
+__all__ = ["TransferLegCache"]
+
+
+config = Config()
+config.argparser.add(
+    "--transfer-leg-cache-size",
+    help="""
+        Number of walking transfers between public transport stops to keep in
+        memory per transport network, for reuse in detailed itineraries
+    """,
+    type=int,
+    default=100_000,
+)
+config.argparser.add(
+    "--persist-transfer-legs",
+    help="""
+        Save the walking transfers found for detailed itineraries next to the
+        cached transport network, and reuse them in later sessions
+    """,
+    action="store_true",
+)
+
+
+class TransferLegCache(SharedCache):
+    """Cache the walking legs between public transport stops of a transport network."""
+
+    def __init__(self, path=None, max_size=None):
+        """
+        Cache the walking legs between public transport stops.
+
+        Detailed itineraries often transfer between the same pairs of stops,
+        the transfer leg cache lets all trip planners that route on the
+        same transport network share the walking routes between them. Keys
+        are `(from_stop, to_stop, walking_speed, geometry)` tuples (where
+        `geometry` is whether the leg has a geometry), values
+        `r5py.r5.TransferLeg`s.
+
+        Arguments
+        ---------
+        path : pathlib.Path | None
+            Where to persist the cache: if the file exists, load transfer legs
+            from it, `save()` writes it. `None`: keep the cache in memory only.
+        max_size : int | None
+            Keep at most this many transfer legs, default: config parameter
+            `--transfer-leg-cache-size`
+        """
+        if max_size is None:
+            max_size = Config().arguments.transfer_leg_cache_size
+        super().__init__(max_size=max_size)
+
+        self.path = path
+        if path is not None:
+            self.update(self._load())
+        self._modified = False
+
+    def _load(self):
+        try:
+            with self.path.open("rb") as f:
+                return pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return []
+
+    def _store(self, key, value):
+        super()._store(key, value)
+        self._modified = True
+
+    def save(self):
+        """
+        Save the cache to `path`, if it is persisted and has new entries.
+
+        Other processes might have saved transfer legs to the same file in
+        the meantime (e.g., the worker processes of detailed itineraries):
+        merge them with this cache’s entries (which take precedence), and
+        keep the `max_size` most recently used ones.
+        """
+        if self.path is None or not self._modified:
+            return
+        self._modified = False
+
+        with filelock.FileLock(self.path.parent / f"{self.path.name}.lock"):
+            items = collections.OrderedDict(self._load())
+            for key, value in self.items():
+                items[key] = value
+                items.move_to_end(key)
+            items = list(items.items())
+            if self.max_size is not None:
+                items = items[-self.max_size :]  # noqa: E203
+
+            temporary_path = self.path.with_name(f"{self.path.name}.{os.getpid():d}")
+            try:
+                with temporary_path.open("wb") as f:
+                    pickle.dump(items, f)
+                temporary_path.replace(self.path)
+            finally:
+                temporary_path.unlink(missing_ok=True)
@@ -8,8 +8,6 @@ import functools
 import jpype
 import jpype.types
 
-import java.time
-
 __all__ = ["TransitLayer"]
 
 
@@ -43,6 +41,8 @@ class TransitLayer:
         bool
             Whether or not any services exist on `date`.
         """
+        import java.time
+
         date = java.time.LocalDate.of(date.year, date.month, date.day)
         return True in set(
             [service.activeOn(date) for service in self._transit_layer.services]
@@ -7,16 +7,9 @@ import enum
 
 import jpype
 
-from ..util import start_jvm
-
-import com.conveyal.r5
-
 __all__ = ["TransportMode"]
 
 
-start_jvm()
-
-
 TRANSIT_MODES = [
     "AIR",
     "BUS",
@@ -122,6 +115,8 @@ class TransportMode(enum.Enum):
 
 @jpype._jcustomizer.JConversion("com.conveyal.r5.api.util.LegMode", exact=TransportMode)
 def _cast_LegMode(java_class, object_):
+    import com.conveyal.r5
+
     if object_.name in LEG_MODES:
         return com.conveyal.r5.api.util.LegMode.valueOf(object_.name)
     else:
@@ -132,6 +127,8 @@ def _cast_LegMode(java_class, object_):
     "com.conveyal.r5.profile.StreetMode", exact=TransportMode
 )
 def _cast_StreetMode(java_class, object_):
+    import com.conveyal.r5
+
     if object_.name in STREET_MODES:
         return com.conveyal.r5.profile.StreetMode.valueOf(object_.name)
     else:
@@ -142,6 +139,8 @@ def _cast_StreetMode(java_class, object_):
     "com.conveyal.r5.api.util.TransitModes", exact=TransportMode
 )
 def _cast_TransitMode(java_class, object_):
+    import com.conveyal.r5
+
     if object_.name in TRANSIT_MODES:
         return com.conveyal.r5.api.util.TransitModes.valueOf(object_.name)
     else:
@@ -12,37 +12,38 @@ import warnings
 
 import jpype
 import jpype.types
+import shapely
 
+from .edge_geometries import EdgeGeometries
 from .elevation_cost_function import ElevationCostFunction
 from .elevation_model import ElevationModel
+from .filtered_osm_pbf import FilteredOsmPbf
+from .hop_geometry_cache import HopGeometryCache
 from .street_layer import StreetLayer
+from .transfer_leg_cache import TransferLegCache
 from .transit_layer import TransitLayer
 from .transport_mode import TransportMode
 from ..util import (
     Config,
+    clip_geometry,
     contains_gtfs_data,
     FileDigest,
     GoodEnoughEquidistantCrs,
-    start_jvm,
+    jvm_metrics,
+    SharedCache,
     WorkingCopy,
 )
+from ..util.filtered_gtfs import FilteredGtfs
+from ..util.osm_database import osm_database
+from ..util.retained_size import estimated_retained_size
 from ..util.exceptions import GtfsFileError
 
-import com.conveyal.analysis
-import com.conveyal.gtfs
-import com.conveyal.osmlib
-import com.conveyal.r5
-import java.io
-
 __all__ = ["TransportNetwork"]
 
 
 PACKAGE = __package__.split(".", maxsplit=1)[0]
 
 
-start_jvm()
-
-
 class TransportNetwork:
     """Wrap a com.conveyal.r5.transit.TransportNetwork."""
 
@@ -53,6 +54,13 @@ class TransportNetwork:
         elevation_model=None,
         elevation_cost_function=ElevationCostFunction.TOBLER,
         allow_errors=False,
+        clip=None,
+        clip_buffer=0.0,
+        service_dates=None,
+        route_types=None,
+        agencies=None,
+        routable_osm_only=False,
+        street_modes=None,
     ):
         """
         Load a transport network.
@@ -72,12 +80,60 @@ class TransportNetwork:
         allow_errors : bool
             try to proceed with loading the transport network even if input data
             contain errors
+        clip : shapely.Geometry | geopandas.GeoSeries | tuple[float]
+            build the transport network only for this study area, a polygon
+            (in `EPSG:4326`), a `geopandas.GeoSeries` or `GeoDataFrame`, or a
+            bounding box `(min_x, min_y, max_x, max_y)` (in `EPSG:4326`).
+            Streets and public transport stops outside of `clip` are
+            dropped before R5 reads the input data, which saves time and
+            memory when analysing a small area within large input data sets.
+        clip_buffer : float
+            extend `clip` by this distance in metres, so that routes that
+            leave the study area for a short distance can still be found
+        service_dates : tuple[datetime.date, datetime.date]
+            load only public transport trips that run on at least one day
+            between these two dates (inclusive), e.g., the week of the
+            analysis. The transit layer gets smaller, and routing and caching
+            faster.
+        route_types : list[int]
+            load only public transport routes of these GTFS `route_type`s,
+            e.g., `[0, 1]` for trams and subways
+        agencies : list[str]
+            load only public transport routes operated by these agencies,
+            identified by their GTFS `agency_id` or `agency_name`
+        routable_osm_only : bool
+            before R5 imports the OpenStreetMap extract, remove everything
+            that is not used for routing (e.g., buildings, land use, points of
+            interest), which saves time and temporary disk space for large
+            extracts. The reduced extract is cached.
+        street_modes : collections.abc.Iterable[r5py.TransportMode]
+            build a street network only for these street modes (and the
+            street modes needed by these leg modes), for instance,
+            `{TransportMode.WALK, TransportMode.BICYCLE}`. Streets that allow
+            none of them, such as motorways for walking and cycling, are
+            dropped, which saves memory and speeds up linking and street
+            searches. Routing with other street modes on such a network
+            yields no (or wrong) results. Note that public transport stops
+            are connected to the street network by walking.
         """
+        import com.conveyal.gtfs
+        import com.conveyal.osmlib
+        import com.conveyal.r5
+        import java.io
+        import java.lang
+
         osm_pbf = WorkingCopy(osm_pbf)
         if isinstance(gtfs, (str, pathlib.Path)):
             gtfs = [gtfs]
         gtfs = [WorkingCopy(path) for path in gtfs]
 
+        if clip is not None:
+            clip = clip_geometry(clip, clip_buffer)
+        gtfs_filters = FilteredGtfs.normalise_filters(
+            service_dates, route_types, agencies
+        )
+        street_modes = FilteredOsmPbf.normalise_street_modes(street_modes)
+
         if elevation_model is None:
             elevation_model = []
         elif not isinstance(elevation_model, collections.abc.Iterable):
@@ -90,6 +146,14 @@ class TransportNetwork:
                 + [FileDigest(path) for path in gtfs]
                 + [FileDigest(path) for path in elevation_model]
                 + [f"{allow_errors}"]
+                + ([shapely.to_wkb(clip, hex=True)] if clip is not None else [])
+                + ([f"{gtfs_filters}"] if gtfs_filters else [])
+                + (["routable_osm_only"] if routable_osm_only else [])
+                + (
+                    [",".join(mode.name for mode in street_modes)]
+                    if street_modes is not None
+                    else []
+                )
             ).encode("utf-8")
         ).hexdigest()
 
@@ -101,10 +165,15 @@ class TransportNetwork:
             transport_network = com.conveyal.r5.transit.TransportNetwork()
             transport_network.scenarioId = PACKAGE
 
-            osm_mapdb = Config().CACHE_DIR / f"{digest}.mapdb"
-            osm_file = com.conveyal.osmlib.OSM(f"{osm_mapdb}")
+            filtered_osm_pbf = FilteredOsmPbf(
+                osm_pbf,
+                clip=clip,
+                routable_only=routable_osm_only,
+                street_modes=street_modes,
+            )
+            osm_file = com.conveyal.osmlib.OSM(osm_database(filtered_osm_pbf, digest))
             osm_file.intersectionDetection = True
-            osm_file.readFromFile(f"{osm_pbf}")
+            osm_file.readFromFile(f"{filtered_osm_pbf}")
 
             transport_network.streetLayer = com.conveyal.r5.streets.StreetLayer()
             transport_network.streetLayer.parentNetwork = transport_network
@@ -122,7 +191,7 @@ class TransportNetwork:
             warnings_ = []
             for gtfs_file in gtfs:
                 gtfs_feed = com.conveyal.gtfs.GTFSFeed.writableTempFileFromGtfs(
-                    f"{gtfs_file}"
+                    f"{FilteredGtfs(gtfs_file, clip=clip, **gtfs_filters)}"
                 )
                 if gtfs_feed.errors.size() > 0:
                     errors = [
@@ -182,9 +251,58 @@ class TransportNetwork:
                 Config().CACHE_DIR / f"{digest}.transport_network",
             )
 
+        self._set_up(transport_network, digest)
+
+    def _set_up(self, transport_network, digest):
         self._transport_network = transport_network
+        self._digest = digest
         self.EQUIDISTANT_CRS = GoodEnoughEquidistantCrs(self.extent)
 
+        # street edge and trip pattern hop geometries, built only once even
+        # if many threads need them at the same time
+        # (`functools.cached_property` does not lock)
+        self._geometry_caches = SharedCache()
+
+        # walking transfers between public transport stops, shared by all
+        # detailed itineraries computed on this network
+        self.transfer_legs = TransferLegCache(
+            (
+                Config().CACHE_DIR / f"{digest}.transfer_legs"
+                if Config().arguments.persist_transfer_legs
+                else None
+            )
+        )
+
+    @property
+    def cache_file(self):
+        """The file this transport network is cached in (`pathlib.Path`)."""
+        return Config().CACHE_DIR / f"{self._digest}.transport_network"
+
+    @classmethod
+    def from_cache_file(cls, path):
+        """
+        Load a transport network from its cache file.
+
+        This skips reading (and hashing) the input data, e.g., to load a
+        transport network, that another process has built and cached, in a
+        worker process.
+
+        Arguments
+        ---------
+        path : str | pathlib.Path
+            The cache file of a transport network, cf.
+            `r5py.TransportNetwork.cache_file`
+
+        Returns
+        -------
+        TransportNetwork
+            A fully initialised r5py.TransportNetwork
+        """
+        path = pathlib.Path(path)
+        instance = cls.__new__(cls)
+        instance._set_up(instance._load_pickled_transport_network(path), path.stem)
+        return instance
+
     @classmethod
     def from_directory(cls, path):
         """
@@ -254,7 +372,45 @@ class TransportNetwork:
         """Expose the `TransportNetwork`’s `linkageCache` to Python."""
         return self._transport_network.linkageCache
 
+    def memory_report(self):
+        """
+        Report the memory use of the JVM and of this transport network.
+
+        Estimating the size of the transport network’s parts walks through
+        all of their Java objects, and can take a few seconds for large
+        networks.
+
+        Returns
+        -------
+        dict
+            The metrics reported by `r5py.util.jvm_metrics()`, and the
+            estimated sizes in bytes of the street layer
+            (`street_layer_size`), of the transit layer
+            (`transit_layer_size`), and of the linkage cache
+            (`linkage_cache_size`, linked origins and destinations)
+        """
+        transport_network = self._transport_network
+        street_layer = transport_network.streetLayer
+        transit_layer = transport_network.transitLayer
+        return jvm_metrics() | {
+            "street_layer_size": estimated_retained_size(
+                street_layer,
+                exclude=[transport_network, transit_layer],
+            ),
+            "transit_layer_size": estimated_retained_size(
+                transit_layer,
+                exclude=[transport_network, street_layer],
+            ),
+            "linkage_cache_size": estimated_retained_size(
+                transport_network.linkageCache,
+                exclude=[transport_network, street_layer, transit_layer],
+            ),
+        }
+
     def _load_pickled_transport_network(self, path):
+        import com.conveyal.r5
+        import java.io
+
         try:
             input_file = java.io.File(f"{path}")
             transport_network = com.conveyal.r5.kryo.KryoNetworkSerializer.read(
@@ -278,6 +434,9 @@ class TransportNetwork:
         return transport_network
 
     def _save_pickled_transport_network(self, transport_network, warnings_, path):
+        import com.conveyal.r5
+        import java.io
+
         output_file = java.io.File(f"{path}")
         com.conveyal.r5.kryo.KryoNetworkSerializer.write(transport_network, output_file)
         with path.with_suffix(".warnings").open("wb") as f:
@@ -286,7 +445,7 @@ class TransportNetwork:
     def snap_to_network(
         self,
         points,
-        radius=com.conveyal.r5.streets.StreetLayer.LINK_RADIUS_METERS,
+        radius=None,
         street_mode=TransportMode.WALK,
     ):
         """
@@ -297,7 +456,8 @@ class TransportNetwork:
         points : geopandas.GeoSeries
             point geometries that will be snapped to the network
         radius : float
-            Search radius around each `point`
+            Search radius around each `point`, default:
+            `com.conveyal.r5.streets.StreetLayer.LINK_RADIUS_METERS`
         street_mode : travel mode that the snapped-to street should allow
 
         Returns
@@ -319,6 +479,42 @@ class TransportNetwork:
             .to_crs(original_crs)
         )
 
+    @property
+    def edge_geometries(self):
+        """
+        Geometries of all street edges, as flat coordinate arrays.
+
+        Exported from R5 when first needed (once, even if many threads ask
+        for them at the same time), and cached next to the transport network.
+
+        Returns
+        -------
+        r5py.r5.EdgeGeometries
+        """
+        return self._geometry_caches.get(
+            "edge_geometries",
+            lambda: EdgeGeometries(
+                self.street_layer,
+                Config().CACHE_DIR / f"{self._digest}.edge_geometries.npz",
+            ),
+        )
+
+    @property
+    def hop_geometries(self):
+        """
+        Geometries of the hops between the stops of the trip patterns.
+
+        Read from R5 when first needed, and shared by all detailed
+        itineraries (and threads) computed on this network.
+
+        Returns
+        -------
+        r5py.r5.HopGeometryCache
+        """
+        return self._geometry_caches.get(
+            "hop_geometries", lambda: HopGeometryCache(self)
+        )
+
     @functools.cached_property
     def street_layer(self):
         """Expose the `TransportNetwork`’s `streetLayer` to Python."""
@@ -7,25 +7,23 @@ import copy
 import pandas
 
 from .base_travel_time_matrix import BaseTravelTimeMatrix
-from ..util import start_jvm
-
-import com.conveyal.r5
+from ..util import JvmMetricsRecorder
 
 __all__ = ["TravelTimeMatrix"]
 
 
-start_jvm()
-
-
 class TravelTimeMatrix(BaseTravelTimeMatrix):
     """Compute travel times between many origins and destinations."""
 
+    _r5py_attributes = BaseTravelTimeMatrix._r5py_attributes + ["jvm_metrics"]
+
     def __init__(
         self,
         transport_network,
         origins=None,
         destinations=None,
         snap_to_network=False,
+        jvm_metrics_interval=None,
         **kwargs,
     ):
         """
@@ -56,13 +54,22 @@ class TravelTimeMatrix(BaseTravelTimeMatrix):
             before routing? If `True`, the default search radius (defined in
             `com.conveyal.r5.streets.StreetLayer.LINK_RADIUS_METERS`) is used,
             if `int`, use `snap_to_network` meters as the search radius.
+        jvm_metrics_interval : float (optional)
+            Record the JVM’s memory use and garbage collection activity (see
+            `r5py.util.jvm_metrics()`) every `jvm_metrics_interval` seconds
+            while computing travel times, and save them as a
+            `pandas.DataFrame` in the `jvm_metrics` attribute. Default: do not
+            record (`jvm_metrics` is `None`).
         **kwargs : mixed
             Any arguments than can be passed to r5py.RegionalTask:
             ``departure``, ``departure_time_window``, ``percentiles``,
             ``transport_modes``, ``access_modes``, ``egress_modes``,
             ``max_time``, ``max_time_walking``, ``max_time_cycling``,
             ``max_time_driving``, ``speed_cycling``, ``speed_walking``,
-            ``max_public_transport_rides``, ``max_bicycle_traffic_stress``
+            ``max_public_transport_rides``, ``max_bicycle_traffic_stress``,
+            ``instrumentation`` (record the time of each phase of the
+            computation in the ``instrumentation`` attribute, see
+            ``r5py.util.Instrumentation``)
         """
         super().__init__(
             transport_network,
@@ -71,7 +78,13 @@ class TravelTimeMatrix(BaseTravelTimeMatrix):
             snap_to_network,
             **kwargs,
         )
-        data = self._compute()
+        if jvm_metrics_interval is None:
+            self.jvm_metrics = None
+            data = self._compute()
+        else:
+            with JvmMetricsRecorder(jvm_metrics_interval) as jvm_metrics_recorder:
+                data = self._compute()
+            self.jvm_metrics = jvm_metrics_recorder.metrics
         for column in data.columns:
             self[column] = data[column]
         del self.transport_network
@@ -94,10 +107,12 @@ class TravelTimeMatrix(BaseTravelTimeMatrix):
         self._prepare_origins_destinations()
         self.request.destinations = self.destinations
 
-        od_matrix = pandas.concat(
-            [self._travel_times_per_origin(from_id) for from_id in self.origins.id],
-            ignore_index=True,
-        )
+        travel_times = [
+            self._travel_times_per_origin(from_id, links_destinations=(i == 0))
+            for i, from_id in enumerate(self.origins.id)
+        ]
+        with self.instrumentation.phase("concatenate_results"):
+            od_matrix = pandas.concat(travel_times, ignore_index=True)
 
         try:
             od_matrix = od_matrix.to_crs(self._origins_crs)
@@ -172,15 +187,25 @@ class TravelTimeMatrix(BaseTravelTimeMatrix):
 
         return od_matrix
 
-    def _travel_times_per_origin(self, from_id):
-        request = copy.copy(self.request)
-        request.origin = self.origins[self.origins.id == from_id].geometry.item()
-
-        travel_time_computer = com.conveyal.r5.analyst.TravelTimeComputer(
-            request, self.transport_network
-        )
-        results = travel_time_computer.computeTravelTimes()
-
-        od_matrix = self._parse_results(from_id, results)
+    def _travel_times_per_origin(self, from_id, links_destinations=False):
+        import com.conveyal.r5
+
+        with self.instrumentation.phase("route_origin"):
+            request = copy.copy(self.request)
+            request.origin = self.origins[self.origins.id == from_id].geometry.item()
+
+            # R5 links the destinations to the street network (and caches the
+            # linkage) while computing travel times from the first origin:
+            # record that computation as `link_destinations`, instead
+            with self.instrumentation.phase(
+                "link_destinations" if links_destinations else "compute_travel_times"
+            ):
+                travel_time_computer = com.conveyal.r5.analyst.TravelTimeComputer(
+                    request, self.transport_network
+                )
+                results = travel_time_computer.computeTravelTimes()
+
+            with self.instrumentation.phase("parse_results"):
+                od_matrix = self._parse_results(from_id, results)
 
         return od_matrix
@@ -7,6 +7,7 @@ import datetime
 
 import shapely
 
+from .transit_leg import TransitLeg
 from .trip_leg import TripLeg
 
 __all__ = ["Trip"]
@@ -79,6 +80,24 @@ class Trip:
         """The public transport route(s) used on this trip."""
         return [leg.route_id for leg in self.legs]
 
+    @property
+    def signature(self):
+        """
+        A hashable summary of this trip, to recognise duplicates quickly.
+
+        Two trips have the same signature if their legs have the same
+        signatures, cf. `r5py.r5.TripLeg.signature`.
+        """
+        return tuple(leg.signature for leg in self.legs)
+
+    @property
+    def transfers(self):
+        """The number of transfers between public transport vehicles (int)."""
+        return max(
+            sum(isinstance(leg, TransitLeg) for leg in self.legs) - 1,
+            0,
+        )
+
     @property
     def transport_modes(self):
         """The transport mode(s) used on this trip."""
@@ -170,6 +170,12 @@ class TripLeg:
             _repr = f"<{self.__class__.__name__}>"
         return _repr
 
+    def __getstate__(self):
+        """Return the state to pickle (or copy), without the cached WKB."""
+        state = self.__dict__.copy()
+        state.pop("_wkb", None)
+        return state
+
     def _are_columns_equal(self, other, column):
         """
         Check if a column equals the same column of a different `Trip`.
@@ -190,6 +196,41 @@ class TripLeg:
             )
         )
 
+    @property
+    def signature(self):
+        """
+        A hashable summary of this trip leg.
+
+        Two legs have the same signature if they are of the same class and
+        have equal values in all columns but ``geometry`` (missing values,
+        None, NaN, or NaT, compare equal).
+        """
+        return (self.__class__,) + tuple(
+            None if value is None or value != value else value  # NaN, NaT
+            for value in (
+                getattr(self, column) for column in self.COLUMNS if column != "geometry"
+            )
+        )
+
+    @property
+    def wkb(self):
+        """
+        The geometry of this trip leg as well-known binary (`bytes`).
+
+        `None` if the leg has no geometry. The WKB is computed once, and
+        reused until ``geometry`` changes, so that legs shared between many
+        trips (e.g., access legs) are converted only once.
+        """
+        try:
+            geometry, wkb = self._wkb
+            if geometry is self.geometry:
+                return wkb
+        except AttributeError:
+            pass
+        wkb = None if self.geometry is None else shapely.to_wkb(self.geometry)
+        self._wkb = (self.geometry, wkb)
+        return wkb
+
     def as_table_row(self):
         """
         Return a table row (list) of this trip leg’s details.
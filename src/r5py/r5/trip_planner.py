@@ -4,40 +4,29 @@
 """Find detailed routes between two points."""
 
 import copy
-import collections
 import datetime
 import functools
+import heapq
 import warnings
 
 import jpype
-import pyproj
 import shapely
 
 from .access_leg import AccessLeg
 from .direct_leg import DirectLeg
 from .egress_leg import EgressLeg
+from .itinerary_columns import LegFields
 from .street_segment import StreetSegment
 from .transfer_leg import TransferLeg
 from .transit_leg import TransitLeg
 from .transport_mode import TransportMode
 from .trip import Trip
-from ..util import start_jvm
-
-import com.conveyal.r5
-import gnu.trove.map
-import java.lang
 
 __all__ = ["TripPlanner"]
 
 
-start_jvm()
-
-
-COORDINATE_CORRECTION_FACTOR = com.conveyal.r5.streets.VertexStore.FIXED_FACTOR
-R5_CRS = "EPSG:4326"
-
 ONE_MINUTE = datetime.timedelta(minutes=1)
-ZERO_SECONDS = datetime.timedelta(seconds=0)
+ONE_MINUTE_SECONDS = 60
 
 
 class TripPlanner:
@@ -46,7 +35,16 @@ class TripPlanner:
     MAX_ACCESS_TIME = datetime.timedelta(hours=1)
     MAX_EGRESS_TIME = MAX_ACCESS_TIME
 
-    def __init__(self, transport_network, request):
+    def __init__(
+        self,
+        transport_network,
+        request,
+        access_paths=None,
+        egress_paths=None,
+        origin_transit_search=None,
+        geometry=True,
+        max_options=None,
+    ):
         """
         Find detailed routes between two points.
 
@@ -55,17 +53,49 @@ class TripPlanner:
         transport_network : r5py.r5.TransportNetwork
             A transport network to route on
         request : r5py.r5.regional_task
-            The parameters that should be used when finding a route
+            The parameters that should be used when finding a route (and its
+            ``instrumentation``, which records the time the phases of route
+            finding take)
+        access_paths : dict[r5py.TransportMode, dict[int, r5py.r5.AccessLeg]]
+            Access legs from the origin to the public transport stops, as
+            found by the ``TripPlanner`` of another route from the same origin
+            with the same ``request`` parameters. If omitted, search them.
+        egress_paths : dict[r5py.TransportMode, dict[int, r5py.r5.EgressLeg]]
+            Egress legs from the public transport stops to the destination,
+            as found by the ``TripPlanner`` of another route to the same
+            destination. If omitted, search them.
+        origin_transit_search : r5py.r5.OriginTransitSearch
+            A public transport search from the same origin with the same
+            ``request`` parameters, shared with the trip planners of other
+            destinations. If omitted, run a public transport search for this
+            origin and destination.
+        geometry : bool
+            Whether to construct the geometries of the trip legs. If `False`,
+            the legs’ ``geometry`` is `None`, distances are computed
+            nonetheless (from the lengths of street edges and of the hops
+            between public transport stops).
+        max_options : int | None
+            Report at most this many route alternatives: the ones with the
+            shortest overall duration (travel and wait time), and, among
+            those that take equally long, the ones with fewer transfers, in
+            this order. If `None`, report all alternatives R5 finds.
         """
         self.transport_network = transport_network
         self.request = request
-        self._transfer_paths = {}
+        self.instrumentation = request.instrumentation
 
-        self._crs_transformer_function = pyproj.Transformer.from_crs(
-            R5_CRS,
-            self.transport_network.EQUIDISTANT_CRS,
-            always_xy=True,
-        ).transform
+        # street searches to and from stops do not depend on the other end
+        # of the route, and can be shared between trip planners
+        if access_paths is not None:
+            self._transit_access_paths = access_paths
+        if egress_paths is not None:
+            self._transit_egress_paths = egress_paths
+        self.origin_transit_search = origin_transit_search
+        self.geometry = geometry
+
+        if max_options is not None and max_options < 1:
+            raise ValueError("`max_options` must be a positive integer or `None`")
+        self.max_options = max_options
 
     @property
     def trips(self):
@@ -77,9 +107,46 @@ class TripPlanner:
         list[r5py.r5.Trip]
             Detailed routes that meet the requested parameters
         """
-        trips = self.direct_paths + self.transit_paths
+        return self._as_trips(self.trip_fields)
+
+    @property
+    def trip_fields(self):
+        """
+        The fields of the legs of the detailed routes between two points.
+
+        The same routes as ``trips``, but each a tuple of the plain fields of
+        its legs, that `r5py.r5.ItineraryColumns.append_fields()` adds to its
+        column buffers without constructing `r5py.r5.TripLeg` objects.
+
+        Returns
+        =======
+        list[tuple[r5py.r5.LegFields, ...]]
+            Detailed routes that meet the requested parameters
+        """
+        trips = self._direct_trip_fields + self._transit_trip_fields
+        if self.max_options is not None:
+            trips = heapq.nsmallest(self.max_options, trips, key=self._trip_rank)
         return trips
 
+    @staticmethod
+    def _trip_rank(legs):
+        """Rank a trip by its overall duration and number of transfers."""
+        duration = sum(leg.travel_time + leg.wait_time for leg in legs)
+        rides = sum(leg.leg_type is TransitLeg for leg in legs)
+        return duration, max(rides - 1, 0)
+
+    def _as_trips(self, trips):
+        """Construct `r5py.r5.Trip` objects from the fields of their legs."""
+        return [
+            Trip([leg.as_trip_leg(self.departure_midnight) for leg in legs])
+            for legs in trips
+        ]
+
+    @functools.cached_property
+    def departure_midnight(self):
+        """Midnight of the departure date, ``trip_fields``’ times count from here."""
+        return self.request.departure.replace(hour=0, minute=0, second=0, microsecond=0)
+
     @property
     def direct_paths(self):
         """
@@ -91,91 +158,156 @@ class TripPlanner:
             Detailed routes that meet the requested parameters, using direct
             modes (walking, cycling, driving).
         """
+        return self._as_trips(self._direct_trip_fields)
+
+    @functools.cached_property
+    def _direct_trip_fields(self):
+        import com.conveyal.r5
+        import java.lang
+        import java.util
+
         direct_paths = []
         request = copy.copy(self.request)
 
         direct_modes = [mode for mode in request.transport_modes if mode.is_street_mode]
 
-        for transport_mode in direct_modes:
-            # short-circuit identical from_id and to_id:
-            if (
-                request._regional_task.fromLat == request._regional_task.toLat
-                and request._regional_task.fromLon == request._regional_task.toLon
-            ):
-                lat = request._regional_task.fromLat
-                lon = request._regional_task.fromLon
-                direct_paths.append(
-                    Trip(
-                        [
-                            DirectLeg(
+        with self.instrumentation.phase("direct_paths"):
+            for transport_mode in direct_modes:
+                # short-circuit identical from_id and to_id:
+                if (
+                    request._regional_task.fromLat == request._regional_task.toLat
+                    and request._regional_task.fromLon == request._regional_task.toLon
+                ):
+                    lat = request._regional_task.fromLat
+                    lon = request._regional_task.fromLon
+                    direct_paths.append(
+                        (
+                            self._leg_fields(
+                                DirectLeg,
                                 transport_mode,
-                                collections.namedtuple(
-                                    "StreetSegment",
-                                    ["distance", "duration", "geometry"],
-                                )(0.0, 0.0, f"LINESTRING({lon} {lat}, {lon} {lat})"),
-                            )
-                        ]
+                                distance=0.0,
+                                geometry=shapely.LineString(((lon, lat), (lon, lat))),
+                            ),
+                        )
                     )
-                )
-            else:
-                street_router = com.conveyal.r5.streets.StreetRouter(
-                    self.transport_network.street_layer
-                )
-                street_router.profileRequest = request
-                street_router.streetMode = transport_mode
-
-                street_router.setOrigin(
-                    request._regional_task.fromLat,
-                    request._regional_task.fromLon,
-                )
-                street_router.setDestination(
-                    request._regional_task.toLat,
-                    request._regional_task.toLon,
-                )
-
-                street_router.route()
+                else:
+                    street_router = com.conveyal.r5.streets.StreetRouter(
+                        self.transport_network.street_layer
+                    )
+                    street_router.profileRequest = request
+                    street_router.streetMode = transport_mode
 
-                try:
-                    router_state = street_router.getState(
-                        street_router.getDestinationSplit()
+                    street_router.setOrigin(
+                        request._regional_task.fromLat,
+                        request._regional_task.fromLon,
                     )
-                    street_segment = self._street_segment_from_router_state(
-                        router_state,
-                        transport_mode,
+                    street_router.setDestination(
+                        request._regional_task.toLat,
+                        request._regional_task.toLon,
                     )
-                    direct_paths.append(
-                        Trip(
-                            [
-                                DirectLeg(transport_mode, street_segment),
-                            ]
+
+                    street_router.route()
+
+                    try:
+                        router_state = street_router.getState(
+                            street_router.getDestinationSplit()
+                        )
+                        street_segment = self._street_segment_from_router_state(
+                            router_state,
+                            transport_mode,
+                        )
+                        direct_paths.append(
+                            (
+                                self._leg_fields(
+                                    DirectLeg,
+                                    transport_mode,
+                                    distance=street_segment.distance / 1000.0,
+                                    travel_time=round(street_segment.duration),
+                                    geometry=street_segment.geometry,
+                                ),
+                            )
+                        )
+                    except (
+                        java.lang.NullPointerException,
+                        java.util.NoSuchElementException,
+                    ):
+                        warnings.warn(
+                            f"Could not find route between origin "
+                            f"({self.request._regional_task.fromLon}, "
+                            f"{self.request._regional_task.fromLat}) "
+                            f"and destination ({self.request._regional_task.toLon}, "
+                            f"{self.request._regional_task.toLat})",
+                            RuntimeWarning,
+                            stacklevel=1,
                         )
-                    )
-                except (
-                    java.lang.NullPointerException,
-                    java.util.NoSuchElementException,
-                ):
-                    warnings.warn(
-                        f"Could not find route between origin "
-                        f"({self.request._regional_task.fromLon}, "
-                        f"{self.request._regional_task.fromLat}) "
-                        f"and destination ({self.request._regional_task.toLon}, "
-                        f"{self.request._regional_task.toLat})",
-                        RuntimeWarning,
-                        stacklevel=1,
-                    )
         return direct_paths
 
+    def _leg_fields(
+        self,
+        leg_type,
+        transport_mode,
+        departure_time=None,
+        distance=None,
+        travel_time=0,
+        wait_time=0,
+        geometry=None,
+    ):
+        """Collect the fields of a leg without public transport route details."""
+        return LegFields(
+            leg_type,
+            transport_mode,
+            departure_time,
+            distance,
+            travel_time,
+            wait_time,
+            None,
+            None,
+            None,
+            None,
+            None,
+            (
+                shapely.to_wkb(geometry)
+                if self.geometry and geometry is not None
+                else None
+            ),
+        )
+
+    @staticmethod
+    def _street_leg_fields(leg):
+        """Collect the fields of a (shared) street leg, times to be set."""
+        return LegFields(
+            leg.__class__,
+            leg.transport_mode,
+            None,
+            leg.distance,
+            round(leg.travel_time.total_seconds()),
+            0,
+            None,
+            None,
+            None,
+            None,
+            None,
+            leg.wkb,
+        )
+
     def _street_segment_from_router_state(self, router_state, transport_mode):
         """Retrieve a StreetSegment for a route."""
+        import com.conveyal.r5
+
         street_path = com.conveyal.r5.profile.StreetPath(
             router_state,
             self.transport_network,
             False,
         )
-        street_segment = StreetSegment(street_path)
+        if self.geometry:
+            street_segment = StreetSegment(
+                street_path, self.transport_network.edge_geometries
+            )
+        else:
+            street_segment = StreetSegment(street_path, geometry=False)
         return street_segment
 
-    @functools.cached_property
+    @property
     def transit_paths(self):
         """
         Detailed routes between two points on public transport.
@@ -186,17 +318,19 @@ class TripPlanner:
             Detailed routes that meet the requested parameters, on public
             transport.
         """
+        return self._as_trips(self._transit_trip_fields)
+
+    @functools.cached_property
+    def _transit_trip_fields(self):
+        import com.conveyal.r5
+
         transit_paths = []
 
         # if any transit mode requested:
         if [mode for mode in self.request.transport_modes if mode.is_transit_mode]:
             request = copy.copy(self.request)
 
-            midnight = self.request.departure.replace(
-                hour=0, minute=0, second=0, microsecond=0
-            )
             suboptimal_minutes = max(self.request._regional_task.suboptimalMinutes, 0)
-            transit_layer = self.transport_network.transit_layer
 
             if (
                 request._regional_task.fromLat == request._regional_task.toLat
@@ -205,19 +339,24 @@ class TripPlanner:
                 lat = request._regional_task.fromLat
                 lon = request._regional_task.fromLon
                 transit_paths.append(
-                    Trip(
-                        [
-                            TransitLeg(
-                                transport_mode=TransportMode.TRANSIT,
-                                departure_time=None,
-                                distance=0.0,
-                                travel_time=ZERO_SECONDS,
-                                wait_time=ZERO_SECONDS,
-                                geometry=shapely.LineString(((lon, lat), (lon, lat))),
-                            )
-                        ]
+                    (
+                        self._leg_fields(
+                            TransitLeg,
+                            TransportMode.TRANSIT,
+                            distance=0.0,
+                            geometry=shapely.LineString(((lon, lat), (lon, lat))),
+                        ),
                     )
                 )
+            elif self.origin_transit_search is not None:
+                final_states = self._final_state_per_departure_time(
+                    self.origin_transit_search.final_states(self._transit_egress_paths)
+                )
+                with self.instrumentation.phase("assemble_itineraries"):
+                    transit_paths += self._transit_trip_fields_from_final_states(
+                        final_states
+                    )
+
             else:
                 # McRapterSuboptimalPathProfileRouter needs this simple callback,
                 # this could, of course, be a lambda function, but this way it’s
@@ -238,172 +377,316 @@ class TripPlanner:
                         True,
                     )
                 )
-                transit_router.route()
+                with self.instrumentation.phase("transit_search"):
+                    transit_router.route()
 
                 # `finalStatesByDepartureTime` is a hashmap of lists of router
                 # states, indexed by departure times (in seconds since midnight)
-                final_states = {
-                    (midnight + datetime.timedelta(seconds=departure_time)): state
+                final_states = self._final_state_per_departure_time(
+                    (departure_time, state)
                     for departure_time, states in zip(
                         transit_router.finalStatesByDepartureTime.keys(),
                         transit_router.finalStatesByDepartureTime.values(),
                     )
                     for state in list(states)  # some departure times yield no results
-                }
-
-                # keep another cache layer of shortest access and egress legs
-                access_legs_by_stop = {}
-                egress_legs_by_stop = {}
-
-                for departure_time, state in final_states.items():
-                    trip = Trip()
-                    while state:
-                        if state.stop == -1:  # EgressLeg
-                            try:
-                                leg = egress_legs_by_stop[state.back.stop]
-                            except KeyError:
-                                leg = min(
-                                    [
-                                        self._transit_egress_paths[transport_mode][
-                                            state.back.stop
-                                        ]
-                                        for transport_mode in self._transit_egress_paths
-                                    ]
-                                )
-                                egress_legs_by_stop[state.back.stop] = leg
-                            leg.wait_time = ZERO_SECONDS
-                            leg.departure_time = (
-                                midnight
-                                + datetime.timedelta(seconds=state.back.time)
-                                + ONE_MINUTE
-                            )
-                            leg.arrival_time = leg.departure_time + leg.travel_time
-
-                        elif state.back is None:  # AccessLeg
-                            try:
-                                leg = access_legs_by_stop[state.stop]
-                            except KeyError:
-                                leg = min(
-                                    [
-                                        self._transit_access_paths[transport_mode][
-                                            state.stop
-                                        ]
-                                        for transport_mode in self._transit_access_paths
-                                    ]
-                                )
-                                access_legs_by_stop[state.stop] = leg
-                            leg.wait_time = ZERO_SECONDS
-                            leg.arrival_time = midnight + datetime.timedelta(
-                                seconds=state.time
-                            )
-                            leg.departure_time = leg.arrival_time - leg.travel_time
+                )
 
-                        else:
-                            if state.pattern == -1:  # TransferLeg
-                                departure_stop = state.back.stop
-                                arrival_stop = state.stop
+                with self.instrumentation.phase("assemble_itineraries"):
+                    transit_paths += self._transit_trip_fields_from_final_states(
+                        final_states
+                    )
 
-                                leg = self._transit_transfer_path(
-                                    departure_stop, arrival_stop
-                                )
+        return transit_paths
 
-                                leg.departure_time = (
-                                    midnight
-                                    + datetime.timedelta(seconds=state.back.time)
-                                    + ONE_MINUTE
-                                )
-                                leg.arrival_time = leg.departure_time + leg.travel_time
-                                leg.wait_time = (
-                                    datetime.timedelta(
-                                        seconds=(state.time - state.back.time)
-                                    )
-                                    - leg.travel_time
-                                    + ONE_MINUTE  # the slack added above
-                                )
+    @staticmethod
+    def _final_state_per_departure_time(final_states):
+        """
+        Select one final router state per departure time.
 
-                            else:  # TransitLeg
-                                pattern = transit_layer.trip_patterns[state.pattern]
+        For each departure time, select the state that arrives first, and,
+        among those that arrive at the same time, the one with the fewest
+        public transport rides (and then, to be deterministic, the one with
+        the lowest stops, patterns, and times along its chain of states).
+        Both a search per origin/destination pair and a search per origin
+        (`r5py.r5.OriginTransitSearch`) find these states, so that they
+        report the same routes.
 
-                                # Use the indices to look up the stop ids, which
-                                # are scoped by the GTFS feed supplied
-                                start_stop_id = transit_layer.get_stop_id_from_index(
-                                    state.back.stop
-                                ).split(":")[1]
-                                end_stop = transit_layer.get_stop_id_from_index(
-                                    state.stop
-                                )
-                                end_stop_id = end_stop.split(":")[1]
-                                feed = end_stop.split(":")[0]
-
-                                route = transit_layer.routes[pattern.routeIndex]
-                                transport_mode = TransportMode(
-                                    com.conveyal.r5.transit.TransitLayer.getTransitModes(  # noqa: E501
-                                        route.route_type
-                                    ).toString()
-                                )
-                                departure_time = midnight + datetime.timedelta(
-                                    seconds=state.boardTime
-                                )
-                                travel_time = datetime.timedelta(
-                                    seconds=(state.time - state.boardTime)
-                                )
-                                wait_time = datetime.timedelta(
-                                    seconds=(state.boardTime - state.back.time)
-                                )
+        Arguments
+        ---------
+        final_states : collections.abc.Iterable[tuple[int, McRaptorState]]
+            Departure times (in seconds since midnight) and final router
+            states (at the destination)
 
-                                # ‘hops’ in R5 terminology are the LineStrings
-                                # between each pair of consecutive stops of a route
-                                hops = list(pattern.getHopGeometries(transit_layer))
-
-                                # select only the ‘hops’ between our stops, and merge
-                                # them into one LineString
-                                hops = hops[
-                                    state.boardStopPosition : state.alightStopPosition  # noqa: E203, E501
-                                ]
-                                geometry = shapely.line_merge(
-                                    shapely.MultiLineString(
-                                        [
-                                            shapely.from_wkt(str(geometry.toText()))
-                                            for geometry in hops
-                                        ]
-                                    )
-                                )
+        Returns
+        -------
+        list[tuple[int, McRaptorState]]
+            Departure times and final router states, ordered by departure
+            time
+        """
+
+        def rank(state):
+            chain = []
+            rides = 0
+            back = state.back
+            while back is not None:
+                chain.append((int(back.stop), int(back.pattern), int(back.time)))
+                if back.back is not None and back.pattern != -1:
+                    rides += 1
+                back = back.back
+            return int(state.time), rides, chain
+
+        final_state_per_departure_time = {}
+        for departure_time, state in final_states:
+            departure_time = int(departure_time)
+            final_state_per_departure_time.setdefault(departure_time, []).append(state)
+
+        return [
+            (departure_time, min(states, key=rank))
+            for departure_time, states in sorted(final_state_per_departure_time.items())
+        ]
+
+    def _transit_trip_fields_from_final_states(self, final_states):
+        """
+        Assemble trips from the final states of a transit router.
 
-                                # distance: based on the geometry, which might
-                                # be inaccurate.
-                                distance = shapely.ops.transform(
-                                    self._crs_transformer_function,
-                                    geometry,
-                                ).length
-
-                                leg = TransitLeg(
-                                    transport_mode=transport_mode,
-                                    departure_time=departure_time,
-                                    distance=distance,
-                                    travel_time=travel_time,
-                                    wait_time=wait_time,
-                                    feed=str(feed),
-                                    agency_id=str(route.agency_id),
-                                    route_id=str(route.route_id),
-                                    start_stop_id=str(start_stop_id),
-                                    end_stop_id=str(end_stop_id),
-                                    geometry=geometry,
+        Arguments
+        ---------
+        final_states : collections.abc.Iterable[tuple[int, McRaptorState]]
+            Departure times (in seconds since midnight) and final router
+            states (at the destination)
+
+        Returns
+        -------
+        list[tuple[r5py.r5.LegFields, ...]]
+            The fields of the legs of each trip
+
+        If ``max_options`` is set, rank the final states by the overall
+        duration and number of transfers of their trips, computed from the
+        chain of router states, and assemble only as many trips as needed.
+        """
+        import com.conveyal.r5
+
+        transit_layer = self.transport_network.transit_layer
+        hop_geometries = self.transport_network.hop_geometries
+        transit_paths = []
+        signatures = set()
+
+        # keep another cache layer of shortest access and egress legs (and
+        # of the fields of the street legs, the stops and the routes)
+        access_legs_by_stop = {}
+        egress_legs_by_stop = {}
+        street_leg_fields = {}
+        stop_ids_by_stop = {}
+        routes_by_index = {}
+
+        def access_leg(stop):
+            try:
+                leg = access_legs_by_stop[stop]
+            except KeyError:
+                leg = min(
+                    [
+                        self._transit_access_paths[transport_mode][stop]
+                        for transport_mode in self._transit_access_paths
+                    ]
+                )
+                access_legs_by_stop[stop] = leg
+            return leg
+
+        def egress_leg(stop):
+            try:
+                leg = egress_legs_by_stop[stop]
+            except KeyError:
+                leg = min(
+                    [
+                        self._transit_egress_paths[transport_mode][stop]
+                        for transport_mode in self._transit_egress_paths
+                    ]
+                )
+                egress_legs_by_stop[stop] = leg
+            return leg
+
+        def leg_fields(leg):
+            # (the legs are shared, their times are set on each trip’s fields)
+            try:
+                _, fields = street_leg_fields[id(leg)]
+            except KeyError:
+                fields = self._street_leg_fields(leg)
+                street_leg_fields[id(leg)] = (leg, fields)  # (keep `id()` unique)
+            return fields
+
+        def stop_id(stop):
+            # feed and stop ID (the stop IDs are scoped by their GTFS feed)
+            try:
+                feed_and_stop_id = stop_ids_by_stop[stop]
+            except KeyError:
+                feed_and_stop_id = tuple(
+                    str(part)
+                    for part in transit_layer.get_stop_id_from_index(stop).split(":")[
+                        :2
+                    ]
+                )
+                stop_ids_by_stop[stop] = feed_and_stop_id
+            return feed_and_stop_id
+
+        def route(route_index):
+            # transport mode, agency ID, and route ID
+            try:
+                route_details = routes_by_index[route_index]
+            except KeyError:
+                route = transit_layer.routes[route_index]
+                route_details = (
+                    TransportMode(
+                        com.conveyal.r5.transit.TransitLayer.getTransitModes(
+                            route.route_type
+                        ).toString()
+                    ),
+                    str(route.agency_id),
+                    str(route.route_id),
+                )
+                routes_by_index[route_index] = route_details
+            return route_details
+
+        if self.max_options is not None:
+            # (`sorted()` is stable: among equally good final states, the
+            # trips of the first ones are reported, as without ranking)
+            final_states = sorted(
+                final_states,
+                key=lambda final_state: self._final_state_rank(
+                    final_state[1], access_leg, egress_leg
+                ),
+            )
+
+        for _, state in final_states:
+            if self.max_options is not None and len(transit_paths) >= self.max_options:
+                break
+
+            legs = []
+            while state:
+                if state.stop == -1:  # EgressLeg
+                    leg = leg_fields(egress_leg(int(state.back.stop)))._replace(
+                        departure_time=int(state.back.time) + ONE_MINUTE_SECONDS
+                    )
+
+                elif state.back is None:  # AccessLeg
+                    leg = leg_fields(access_leg(int(state.stop)))
+                    leg = leg._replace(departure_time=int(state.time) - leg.travel_time)
+
+                else:
+                    if state.pattern == -1:  # TransferLeg
+                        leg = leg_fields(
+                            self._transit_transfer_path(state.back.stop, state.stop)
+                        )
+                        leg = leg._replace(
+                            departure_time=int(state.back.time) + ONE_MINUTE_SECONDS,
+                            wait_time=(
+                                int(state.time - state.back.time)
+                                - leg.travel_time
+                                + ONE_MINUTE_SECONDS  # the slack added above
+                            ),
+                        )
+
+                    else:  # TransitLeg
+                        pattern = transit_layer.trip_patterns[state.pattern]
+
+                        _, start_stop_id = stop_id(int(state.back.stop))
+                        feed, end_stop_id = stop_id(int(state.stop))
+                        transport_mode, agency_id, route_id = route(
+                            int(pattern.routeIndex)
+                        )
+
+                        # geometry and distance: the pattern’s ‘hops’
+                        # between our stops, the distance is based on the
+                        # geometry, which might be inaccurate
+                        pattern_hops = hop_geometries.pattern_hops(state.pattern)
+                        board_stop_position = int(state.boardStopPosition)
+                        alight_stop_position = int(state.alightStopPosition)
+
+                        leg = LegFields(
+                            TransitLeg,
+                            transport_mode,
+                            int(state.boardTime),
+                            pattern_hops.distance(
+                                board_stop_position, alight_stop_position
+                            ),
+                            int(state.time - state.boardTime),
+                            int(state.boardTime - state.back.time),
+                            feed,
+                            agency_id,
+                            route_id,
+                            start_stop_id,
+                            end_stop_id,
+                            (
+                                pattern_hops.wkb(
+                                    board_stop_position, alight_stop_position
                                 )
+                                if self.geometry
+                                else None
+                            ),
+                        )
 
-                        # we traverse in reverse order:
-                        # add leg to beginning of trip,
-                        # then fetch previous state (=leg)
-                        trip = leg + trip
-                        state = state.back
+                # we traverse in reverse order: collect the legs, then
+                # fetch previous state (=leg)
+                legs.append(leg)
+                state = state.back
 
-                    # R5 sometimes reports the same path more than once, skip duplicates
-                    if trip not in transit_paths:
-                        transit_paths.append(trip)
+            legs = tuple(reversed(legs))
+
+            # R5 sometimes reports the same path more than once, skip duplicates
+            signature = tuple(leg.signature for leg in legs)
+            if signature not in signatures:
+                signatures.add(signature)
+                transit_paths.append(legs)
 
         return transit_paths
 
+    @staticmethod
+    def _final_state_rank(state, access_leg, egress_leg):
+        """
+        Rank a final router state like the trip assembled from it.
+
+        Arguments
+        ---------
+        state : McRaptorState
+            A final router state (at the destination)
+        access_leg : collections.abc.Callable[[int], r5py.r5.AccessLeg]
+            Look up the shortest access leg to a stop
+        egress_leg : collections.abc.Callable[[int], r5py.r5.EgressLeg]
+            Look up the shortest egress leg from a stop
+
+        Returns
+        -------
+        tuple[datetime.timedelta, int]
+            The overall duration (travel and wait time) and the number of
+            transfers of the trip, the sort key of ``TripPlanner.trips``
+        """
+        # cf. `_transit_trip_fields_from_final_states()`: the trip’s legs are
+        # contiguous, apart from the slack before the egress leg (which is
+        # not counted) and after each transfer leg (which is counted as
+        # wait time)
+        duration = egress_leg(state.back.stop).travel_time
+        arrival_time = state.back.time
+        rides = 0
+        transfer_legs = 0
+
+        state = state.back
+        while state.back is not None:
+            if state.pattern == -1:
+                transfer_legs += 1
+            else:
+                rides += 1
+            state = state.back
+
+        duration += (
+            access_leg(state.stop).travel_time
+            + datetime.timedelta(seconds=(arrival_time - state.time))
+            + transfer_legs * ONE_MINUTE
+        )
+        return duration, max(rides - 1, 0)
+
     @functools.cached_property
     def _transit_access_paths(self):
+        import com.conveyal.r5
+
         access_paths = {}
 
         request = copy.copy(self.request)
@@ -422,24 +705,25 @@ class TripPlanner:
 
         transit_layer = self.transport_network.transit_layer
 
-        for transport_mode in request.access_modes:
-            access_paths[transport_mode] = {}
+        with self.instrumentation.phase("access_search"):
+            for transport_mode in request.access_modes:
+                access_paths[transport_mode] = {}
 
-            street_router.streetMode = transport_mode
-            street_router.route()
-            reached_stops = street_router.getReachedStops()
+                street_router.streetMode = transport_mode
+                street_router.route()
+                reached_stops = street_router.getReachedStops()
 
-            for stop in reached_stops.keys():
-                router_state = street_router.getStateAtVertex(
-                    transit_layer.get_street_vertex_for_stop(stop)
-                )
-                street_segment = self._street_segment_from_router_state(
-                    router_state,
-                    transport_mode,
-                )
-                access_paths[transport_mode][stop] = AccessLeg(
-                    transport_mode, street_segment
-                )
+                for stop in reached_stops.keys():
+                    router_state = street_router.getStateAtVertex(
+                        transit_layer.get_street_vertex_for_stop(stop)
+                    )
+                    street_segment = self._street_segment_from_router_state(
+                        router_state,
+                        transport_mode,
+                    )
+                    access_paths[transport_mode][stop] = AccessLeg(
+                        transport_mode, street_segment
+                    )
         return access_paths
 
     @functools.cached_property
@@ -449,6 +733,9 @@ class TripPlanner:
 
         In the format required by McRaptorSuboptimalPathProfileRouter.
         """
+        import com.conveyal.r5
+        import gnu.trove.map
+
         access_times = jpype.JObject(
             {
                 com.conveyal.r5.api.util.LegMode
@@ -467,6 +754,8 @@ class TripPlanner:
 
     @functools.cached_property
     def _transit_egress_paths(self):
+        import com.conveyal.r5
+
         egress_paths = {}
 
         request = copy.copy(self.request)
@@ -485,25 +774,26 @@ class TripPlanner:
 
         transit_layer = self.transport_network.transit_layer
 
-        for transport_mode in request.egress_modes:
-            egress_paths[transport_mode] = {}
+        with self.instrumentation.phase("egress_search"):
+            for transport_mode in request.egress_modes:
+                egress_paths[transport_mode] = {}
 
-            street_router.streetMode = transport_mode
+                street_router.streetMode = transport_mode
 
-            street_router.route()
-            reached_stops = street_router.getReachedStops()
+                street_router.route()
+                reached_stops = street_router.getReachedStops()
 
-            for stop in reached_stops.keys():
-                router_state = street_router.getStateAtVertex(
-                    transit_layer.get_street_vertex_for_stop(stop)
-                )
-                street_segment = self._street_segment_from_router_state(
-                    router_state,
-                    transport_mode,
-                )
-                egress_paths[transport_mode][stop] = EgressLeg(
-                    transport_mode, street_segment
-                )
+                for stop in reached_stops.keys():
+                    router_state = street_router.getStateAtVertex(
+                        transit_layer.get_street_vertex_for_stop(stop)
+                    )
+                    street_segment = self._street_segment_from_router_state(
+                        router_state,
+                        transport_mode,
+                    )
+                    egress_paths[transport_mode][stop] = EgressLeg(
+                        transport_mode, street_segment
+                    )
         return egress_paths
 
     @functools.cached_property
@@ -513,6 +803,9 @@ class TripPlanner:
 
         In the format required by McRaptorSuboptimalPathProfileRouter.
         """
+        import com.conveyal.r5
+        import gnu.trove.map
+
         egress_times = jpype.JObject(
             {
                 com.conveyal.r5.api.util.LegMode
@@ -530,46 +823,61 @@ class TripPlanner:
         return egress_times
 
     def _transit_transfer_path(self, from_stop, to_stop):
-        """Find a transfer path between two transit stops."""
-        self._transfer_paths = {}
-        while True:
-            try:
-                transfer_path = self._transfer_paths[(from_stop, to_stop)]
-            except KeyError:
-                request = copy.copy(self.request)
+        """
+        Find a transfer path between two transit stops.
 
-                street_router = com.conveyal.r5.streets.StreetRouter(
-                    self.transport_network.street_layer
-                )
-                street_router.profileRequest = request
-                street_router.streetMode = TransportMode.WALK
+        Transfer paths are cached in the transport network’s
+        `transfer_legs`, and shared between all trip planners. The returned
+        leg is shared, too, do not modify it.
+        """
+        # (plain Python types, rather than Java integers, so that the keys
+        # can be pickled, cf. `TransferLegCache.save()`)
+        transfer_path = self.transport_network.transfer_legs.get(
+            (
+                int(from_stop),
+                int(to_stop),
+                float(self.request.speed_walking),
+                bool(self.geometry),
+            ),
+            lambda: self._find_transit_transfer_path(from_stop, to_stop),
+        )
+        return transfer_path
 
-                get_coordinates_for_stop = (
-                    self.transport_network.transit_layer._transit_layer.getCoordinateForStopFixed  # noqa: E501
-                )
-                from_stop_coordinates = get_coordinates_for_stop(from_stop)
-                to_stop_coordinates = get_coordinates_for_stop(to_stop)
+    def _find_transit_transfer_path(self, from_stop, to_stop):
+        """Search a walking route between two transit stops."""
+        import com.conveyal.r5
 
-                from_lat = from_stop_coordinates.getY() / COORDINATE_CORRECTION_FACTOR
-                from_lon = from_stop_coordinates.getX() / COORDINATE_CORRECTION_FACTOR
-                to_lat = to_stop_coordinates.getY() / COORDINATE_CORRECTION_FACTOR
-                to_lon = to_stop_coordinates.getX() / COORDINATE_CORRECTION_FACTOR
+        fixed_factor = com.conveyal.r5.streets.VertexStore.FIXED_FACTOR
 
-                street_router.setOrigin(from_lat, from_lon)
-                street_router.setDestination(to_lat, to_lon)
+        with self.instrumentation.phase("transfer_search"):
+            request = copy.copy(self.request)
 
-                street_router.route()
+            street_router = com.conveyal.r5.streets.StreetRouter(
+                self.transport_network.street_layer
+            )
+            street_router.profileRequest = request
+            street_router.streetMode = TransportMode.WALK
 
-                router_state = street_router.getState(
-                    street_router.getDestinationSplit()
-                )
-                street_segment = self._street_segment_from_router_state(
-                    router_state,
-                    TransportMode.WALK,
-                )
+            get_coordinates_for_stop = (
+                self.transport_network.transit_layer._transit_layer.getCoordinateForStopFixed  # noqa: E501
+            )
+            from_stop_coordinates = get_coordinates_for_stop(from_stop)
+            to_stop_coordinates = get_coordinates_for_stop(to_stop)
 
-                transfer_path = self._transfer_paths[(from_stop, to_stop)] = (
-                    TransferLeg(TransportMode.WALK, street_segment)
-                )
+            from_lat = from_stop_coordinates.getY() / fixed_factor
+            from_lon = from_stop_coordinates.getX() / fixed_factor
+            to_lat = to_stop_coordinates.getY() / fixed_factor
+            to_lon = to_stop_coordinates.getX() / fixed_factor
+
+            street_router.setOrigin(from_lat, from_lon)
+            street_router.setDestination(to_lat, to_lon)
+
+            street_router.route()
+
+            router_state = street_router.getState(street_router.getDestinationSplit())
+            street_segment = self._street_segment_from_router_state(
+                router_state,
+                TransportMode.WALK,
+            )
 
-                return transfer_path
+        return TransferLeg(TransportMode.WALK, street_segment)
@@ -5,13 +5,18 @@
 from . import environment  # noqa: F401
 
 from .camel_to_snake_case import camel_to_snake_case
+from .clip_geometry import clip_geometry
 from .config import Config
 from .contains_gtfs_data import contains_gtfs_data
 from .data_validation import check_od_data_set
 from .file_digest import FileDigest
+from .flight_recording import FlightRecording
 from .good_enough_equidistant_crs import GoodEnoughEquidistantCrs
+from .instrumentation import Instrumentation, PhaseTiming
 from .jvm import start_jvm
+from .jvm_metrics import jvm_metrics, JvmMetricsRecorder
 from .parse_int_date import parse_int_date
+from .shared_cache import SharedCache
 from .snake_to_camel_case import snake_to_camel_case
 from .spatially_clustered_geodataframe import SpatiallyClusteredGeoDataFrame
 from .working_copy import WorkingCopy
@@ -19,11 +24,18 @@ from .working_copy import WorkingCopy
 __all__ = [
     "camel_to_snake_case",
     "check_od_data_set",
+    "clip_geometry",
     "Config",
     "contains_gtfs_data",
     "FileDigest",
+    "FlightRecording",
     "GoodEnoughEquidistantCrs",
+    "Instrumentation",
+    "jvm_metrics",
+    "JvmMetricsRecorder",
     "parse_int_date",
+    "PhaseTiming",
+    "SharedCache",
     "snake_to_camel_case",
     "SpatiallyClusteredGeoDataFrame",
     "start_jvm",
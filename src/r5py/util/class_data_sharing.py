@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""Reuse a class data sharing (CDS) archive to speed up JVM start-up."""
+
+import atexit
+import hashlib
+import os
+import pathlib
+
+import jpype
+
+from .classpath import r5_jar_digest
+from .config import Config
+
+__all__ = ["class_data_sharing_options"]
+
+
+config = Config()
+
+config.argparser.add(
+    "--class-data-sharing",
+    help="""
+        Archive the Java classes loaded by R5 in the cache directory,
+        and reuse the archive to start the JVM faster next time
+    """,
+    action="store_true",
+)
+
+
+def _archive_path(r5_classpath, jvm_path):
+    """Find a cache file name that is unique for this R5 jar and this JVM."""
+    # the R5 jar by its content (the same digest that verifies it, see
+    # `r5_jar_digest()`), the JVM by its path, size, and modification time
+    jvm_path = pathlib.Path(jvm_path).resolve()
+    stat = jvm_path.stat()
+    fingerprint = [
+        r5_jar_digest(r5_classpath),
+        f"{jvm_path}:{stat.st_size:d}:{stat.st_mtime_ns:d}",
+    ]
+    digest = hashlib.sha256("\n".join(fingerprint).encode("utf-8")).hexdigest()
+    return Config().CACHE_DIR / f"r5-{digest}.jsa"
+
+
+def _move_archive_into_place(temporary_archive, archive):
+    # the JVM writes the archive when it shuts down, so shut it down first
+    # (this runs before jpype’s own exit handler, which then has nothing
+    # left to do)
+    try:
+        jpype.shutdownJVM()
+    except RuntimeError:  # pragma: no cover
+        pass
+    try:
+        temporary_archive.replace(archive)
+    except OSError:  # pragma: no cover
+        temporary_archive.unlink(missing_ok=True)
+
+
+def class_data_sharing_options(r5_classpath, jvm_path):
+    """
+    Return JVM options that create or use a class data sharing archive.
+
+    If an archive for `r5_classpath` and `jvm_path` exists in the cache
+    directory, the JVM maps the classes it contains instead of loading them
+    from the R5 jar. Otherwise, the JVM records the classes it loads, and
+    writes an archive when it shuts down. Several processes starting at the
+    same time all write their own temporary archive, the last one to finish
+    moves it into place.
+
+    Arguments
+    ---------
+    r5_classpath : str | pathlib.Path
+        path to the R5 jar
+    jvm_path : str | pathlib.Path
+        path to the JVM library that will run R5
+
+    Returns
+    -------
+    list[str]
+        Options to pass on to `jpype.startJVM()`, empty if class data sharing
+        is disabled or not possible for `r5_classpath`
+    """
+    if (
+        not config.arguments.class_data_sharing
+        # only classes from jar files can be archived
+        or pathlib.Path(r5_classpath).suffix != ".jar"
+    ):
+        return []
+
+    archive = _archive_path(r5_classpath, jvm_path)
+
+    if config.arguments.verbose:
+        options = []
+    else:
+        options = ["-Xlog:cds=off", "-Xlog:cds+dynamic=off"]
+
+    if archive.exists():
+        options += [
+            f"-XX:SharedArchiveFile={archive}",
+            "-Xshare:auto",  # proceed without archive if it cannot be used
+        ]
+    else:
+        temporary_archive = archive.with_name(f"{archive.name}.{os.getpid():d}")
+        options += [f"-XX:ArchiveClassesAtExit={temporary_archive}"]
+        atexit.register(_move_archive_into_place, temporary_archive, archive)
+
+    return options
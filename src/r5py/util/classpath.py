@@ -2,7 +2,7 @@
 
 """Make sure R5 is in the class path, download it if not."""
 
-import hashlib
+import functools
 import pathlib
 import string
 import urllib.parse
@@ -12,6 +12,7 @@ import requests
 
 from .config import Config
 from .exceptions import UnexpectedClasspathSchema
+from .file_digest import FileDigest
 from .validating_requests_session import ValidatingRequestsSession
 from .warnings import R5pyWarning
 
@@ -23,7 +24,7 @@ R5_JAR_SHA256 = "d50be106cadd7b636cfc0e209052767d7df570629f79fdf98ecd5cf5d2d89be
 # ---
 
 
-__all__ = ["R5_CLASSPATH"]
+__all__ = ["find_r5_classpath", "r5_jar_digest"]
 
 
 config = Config()
@@ -67,8 +68,7 @@ def find_r5_classpath(arguments):
     if r5_classpath is None:
         r5_classpath = str(config.CACHE_DIR / pathlib.Path(R5_JAR_URL).name)
         try:
-            with open(r5_classpath, "rb") as jar:
-                assert hashlib.sha256(jar.read()).hexdigest() == R5_JAR_SHA256
+            assert _is_verified_r5_jar(r5_classpath)
         except (AssertionError, FileNotFoundError):
             if arguments.verbose:
                 warnings.warn(
@@ -82,6 +82,7 @@ def find_r5_classpath(arguments):
                 open(r5_classpath, "wb") as jar,
             ):
                 jar.write(response.content)
+            _record_r5_jar_digest(r5_classpath, R5_JAR_SHA256)
             if arguments.verbose:
                 warnings.warn(
                     f"Successfully downloaded {pathlib.Path(R5_JAR_URL).name}",
@@ -92,4 +93,99 @@ def find_r5_classpath(arguments):
     return r5_classpath
 
 
-R5_CLASSPATH = find_r5_classpath(config.arguments)
+def _fingerprint(r5_jar):
+    """Describe `r5_jar` by its path, inode, size, and change times."""
+    r5_jar = pathlib.Path(r5_jar).resolve()
+    stat = r5_jar.stat()
+    # (unlike the modification time, the status change time cannot be set
+    # by users, it changes whenever the file is written)
+    return (
+        f"{r5_jar}\n{stat.st_ino:d}\n{stat.st_size:d}\n"
+        f"{stat.st_mtime_ns:d}\n{stat.st_ctime_ns:d}"
+    )
+
+
+def _verification_record(r5_jar):
+    r5_jar = pathlib.Path(r5_jar)
+    return r5_jar.with_name(f"{r5_jar.name}.verified")
+
+
+def r5_jar_digest(r5_jar):
+    """
+    Find the SHA256 digest of an R5 jar.
+
+    Hashing the entire jar file is slow, so remember the digest together with
+    a fingerprint (path, inode, size, and change times) of the jar, and only
+    compute the digest again if the fingerprint changed.
+
+    Arguments
+    ---------
+    r5_jar : str | pathlib.Path
+        path to an R5 jar
+
+    Returns
+    -------
+    str
+        The hexadecimal SHA256 digest of `r5_jar`
+
+    Raises
+    ------
+    FileNotFoundError
+        If `r5_jar` does not exist
+    """
+    fingerprint = _fingerprint(r5_jar)
+    try:
+        recorded_fingerprint, digest = (
+            _verification_record(r5_jar).read_text().rsplit("\n", 1)
+        )
+        if recorded_fingerprint == fingerprint:
+            return digest
+    except (FileNotFoundError, PermissionError, ValueError):
+        pass
+
+    digest = str(FileDigest(r5_jar, "sha256"))
+    _record_r5_jar_digest(r5_jar, digest, fingerprint)
+    return digest
+
+
+def _is_verified_r5_jar(r5_jar):
+    """
+    Check whether `r5_jar` is the expected R5 jar.
+
+    Arguments
+    ---------
+    r5_jar : str | pathlib.Path
+        path to an R5 jar
+
+    Returns
+    -------
+    bool
+        Whether `r5_jar` has the checksum `R5_JAR_SHA256`
+
+    Raises
+    ------
+    FileNotFoundError
+        If `r5_jar` does not exist
+    """
+    return r5_jar_digest(r5_jar) == R5_JAR_SHA256
+
+
+def _record_r5_jar_digest(r5_jar, digest, fingerprint=None):
+    if fingerprint is None:
+        fingerprint = _fingerprint(r5_jar)
+    try:
+        _verification_record(r5_jar).write_text(f"{fingerprint}\n{digest}")
+    except OSError:  # e.g., read-only directory, hash again next time
+        pass
+
+
+@functools.cache
+def _r5_classpath():
+    return find_r5_classpath(config.arguments)
+
+
+def __getattr__(name):
+    # find (and, if necessary, download) R5 only once it is needed
+    if name == "R5_CLASSPATH":
+        return _r5_classpath()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
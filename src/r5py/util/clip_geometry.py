@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+
+"""Interpret a study area to clip input data to."""
+
+import collections.abc
+
+import geopandas
+import shapely
+
+from .exceptions import UnexpectedCrsError
+from .good_enough_equidistant_crs import GoodEnoughEquidistantCrs
+
+__all__ = ["clip_geometry"]
+
+
+def clip_geometry(clip, buffer=0.0):
+    """
+    Interpret a study area to clip input data to.
+
+    Arguments
+    ---------
+    clip : shapely.Geometry | geopandas.GeoSeries | tuple[float]
+        The study area: a polygon (in `EPSG:4326`), a `geopandas.GeoSeries`
+        or `GeoDataFrame` (in any reference system, all geometries are
+        combined), or a bounding box `(min_x, min_y, max_x, max_y)` (in
+        `EPSG:4326`)
+    buffer : float
+        Extend the study area by `buffer` metres in all directions, for
+        instance, to include nearby streets and public transport stops that
+        trips starting or ending in the study area might use.
+
+    Returns
+    -------
+    shapely.Geometry
+        A (normalised) polygon or multipolygon in `EPSG:4326`
+    """
+    if isinstance(clip, (geopandas.GeoSeries, geopandas.GeoDataFrame)):
+        if clip.crs is None:
+            raise UnexpectedCrsError("`clip` does not have a reference system")
+        clip = clip.to_crs("EPSG:4326").union_all()
+    elif isinstance(clip, shapely.Geometry):
+        pass
+    elif isinstance(clip, collections.abc.Sequence) and len(clip) == 4:
+        clip = shapely.box(*clip)
+    else:
+        raise ValueError(
+            "`clip` must be a shapely geometry, a geopandas data frame or series, "
+            "or a bounding box `(min_x, min_y, max_x, max_y)`"
+        )
+
+    if not GoodEnoughEquidistantCrs._is_plausible_in_epsg4326(clip):
+        raise UnexpectedCrsError("`clip` does not seem to be in `EPSG:4326`")
+
+    if buffer > 0.0:
+        clip = (
+            geopandas.GeoSeries([clip], crs="EPSG:4326")
+            .to_crs(GoodEnoughEquidistantCrs(clip))
+            .buffer(buffer)
+            .to_crs("EPSG:4326")
+            .iloc[0]
+        )
+    elif clip.area == 0.0:
+        raise ValueError("`clip` must be an area, use `buffer` to clip around points")
+
+    return shapely.normalize(clip)
@@ -29,6 +29,7 @@ class Config:
     """Load configuration from config files or command line arguments."""
 
     _instance = None  # stores singleton instance
+    _adopted_arguments = None  # arguments of another process, cf. `adopt_arguments`
 
     def __init__(self):
         """Load configuration from config files or command line arguments."""
@@ -51,8 +52,27 @@ class Config:
         Arguments passed from command line or config file.
 
         Ignores `--help`: can be used while not all modules have added arguments.
+        Arguments adopted from another process (see `adopt_arguments()`)
+        take precedence.
         """
-        return self.get_arguments(ignore_help_args=True)
+        arguments = self.get_arguments(ignore_help_args=True)
+        if self._adopted_arguments is not None:
+            vars(arguments).update(vars(self._adopted_arguments))
+        return arguments
+
+    def adopt_arguments(self, arguments):
+        """
+        Use the arguments of another process.
+
+        Worker processes do not see the command line of the process that
+        started them; they adopt its arguments before starting a JVM.
+
+        Arguments
+        ---------
+        arguments : argparse.Namespace
+            Arguments as resolved by another process (its `Config().arguments`)
+        """
+        Config._adopted_arguments = arguments
 
     @property
     def argparser(self):
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+
+
+"""Create a reduced copy of a GTFS data set in a cache directory."""
+
+import datetime
+import hashlib
+import io
+import os
+import pathlib
+import zipfile
+
+import filelock
+import numpy
+import pandas
+import shapely
+
+from .config import Config
+from .file_digest import FileDigest
+
+__all__ = ["FilteredGtfs"]
+
+
+CHUNK_SIZE = 1_000_000  # rows of stop_times.txt to process at a time
+
+
+class FilteredGtfs(pathlib.Path):
+    """Create a reduced copy of a GTFS data set in a cache directory."""
+
+    def __new__(
+        cls,
+        path,
+        clip=None,
+        service_dates=None,
+        route_types=None,
+        agencies=None,
+    ):
+        """
+        Create a reduced copy of a GTFS data set in a cache directory.
+
+        Only the parts of the data set that are relevant for the analysis are
+        kept, so that R5 builds a smaller transit layer faster. The result is
+        cached, and reused if the same GTFS data set is filtered the same way
+        again.
+
+        Arguments
+        ---------
+        path : str | pathlib.Path
+            The GTFS data set to filter.
+        clip : shapely.Geometry
+            Keep only the stops within this polygon (in `EPSG:4326`), and the
+            parts of trips that serve them. Trips are cut to the section
+            between the first and the last stop within `clip` (extended to
+            the nearest stops with arrival and departure times); trips that
+            serve fewer than two stops within `clip` are dropped.
+        service_dates : tuple[datetime.date, datetime.date]
+            Keep only trips that run on at least one day between these two
+            dates (inclusive).
+        route_types : collections.abc.Iterable[int]
+            Keep only routes of these GTFS `route_type`s, e.g., `[0, 1, 2]`
+            for tram, subway, and rail services.
+        agencies : collections.abc.Iterable[str]
+            Keep only routes operated by these agencies, identified by their
+            `agency_id` or `agency_name`.
+
+        Returns
+        -------
+        pathlib.Path
+            The path of the filtered GTFS data set, or `path` if no filter
+            applies.
+        """
+        path = pathlib.Path(path)
+        filters = cls.normalise_filters(service_dates, route_types, agencies)
+        if clip is None and not filters:
+            return path
+
+        digest = hashlib.sha256(
+            "".join(
+                [FileDigest(path)]
+                + ([shapely.to_wkb(clip, hex=True)] if clip is not None else [])
+                + ([f"{filters}"] if filters else [])
+            ).encode("utf-8")
+        ).hexdigest()
+        destination = Config().CACHE_DIR / f"{digest}.gtfs.zip"
+
+        with filelock.FileLock(destination.parent / f"{destination.name}.lock"):
+            if not destination.exists():
+                temporary_destination = destination.with_name(
+                    f"{destination.name}.{os.getpid():d}"
+                )
+                try:
+                    cls._filter(path, temporary_destination, clip, **filters)
+                    temporary_destination.replace(destination)
+                finally:
+                    temporary_destination.unlink(missing_ok=True)
+
+        return destination
+
+    @staticmethod
+    def normalise_filters(service_dates=None, route_types=None, agencies=None):
+        """
+        Bring filter arguments into a canonical form.
+
+        Arguments
+        ---------
+        service_dates : tuple[datetime.date, datetime.date]
+            First and last date of the analysis period
+        route_types : collections.abc.Iterable[int]
+            GTFS route types to keep
+        agencies : collections.abc.Iterable[str]
+            Agency ids or names to keep
+
+        Returns
+        -------
+        dict
+            The filters that are set, with sorted values, e.g., for use in
+            a cache digest. Empty if no filter is set.
+        """
+        filters = {}
+        if service_dates is not None:
+            first_date, last_date = (
+                date.date() if isinstance(date, datetime.datetime) else date
+                for date in service_dates
+            )
+            if first_date > last_date:
+                raise ValueError(
+                    "`service_dates` must be a (first date, last date) tuple"
+                )
+            filters["service_dates"] = (first_date, last_date)
+        if route_types is not None:
+            filters["route_types"] = tuple(
+                sorted({int(route_type) for route_type in route_types})
+            )
+        if agencies is not None:
+            if isinstance(agencies, str):
+                agencies = [agencies]
+            filters["agencies"] = tuple(sorted({f"{agency}" for agency in agencies}))
+        return filters
+
+    @staticmethod
+    def _read_csv(archive, name, **kwargs):
+        # read all columns as strings, to write them back unchanged
+        return pandas.read_csv(
+            archive.open(name),
+            dtype=str,
+            keep_default_na=False,
+            encoding="utf-8-sig",
+            **kwargs,
+        )
+
+    @staticmethod
+    def _write_csv(archive, name, data_frames):
+        with (
+            archive.open(name, "w") as f,
+            io.TextIOWrapper(f, encoding="utf-8", newline="") as text_file,
+        ):
+            header = True
+            for data_frame in data_frames:
+                data_frame.to_csv(text_file, index=False, header=header)
+                header = False
+
+    @classmethod
+    def _filter(
+        cls,
+        path,
+        destination,
+        clip,
+        service_dates=None,
+        route_types=None,
+        agencies=None,
+    ):
+        with zipfile.ZipFile(path) as source:
+            names = set(source.namelist())
+
+            routes = cls._read_csv(source, "routes.txt")
+            if route_types is not None:
+                routes = routes[
+                    pandas.to_numeric(routes["route_type"], errors="coerce").isin(
+                        route_types
+                    )
+                ]
+            if agencies is not None:
+                routes = cls._routes_of_agencies(
+                    routes, cls._read_csv(source, "agency.txt"), agencies
+                )
+
+            trips = cls._read_csv(source, "trips.txt")
+            trips = trips[trips["route_id"].isin(routes["route_id"])]
+            if service_dates is not None:
+                trips = trips[
+                    trips["service_id"].isin(
+                        cls._active_services(source, names, *service_dates)
+                    )
+                ]
+
+            if clip is not None:
+                frequency_based_trips = set()
+                if "frequencies.txt" in names:
+                    frequency_based_trips = set(
+                        cls._read_csv(source, "frequencies.txt", usecols=["trip_id"])[
+                            "trip_id"
+                        ]
+                    )
+
+                stops = cls._read_csv(source, "stops.txt")
+                stops_within_clip = set(
+                    stops.loc[
+                        shapely.contains_xy(
+                            clip,
+                            pandas.to_numeric(stops["stop_lon"], errors="coerce"),
+                            pandas.to_numeric(stops["stop_lat"], errors="coerce"),
+                        ),
+                        "stop_id",
+                    ]
+                )
+
+                # which section of each trip to keep (first and last
+                # stop_sequence)
+                trip_sections = cls._trip_sections(
+                    source,
+                    set(trips["trip_id"]),
+                    stops_within_clip,
+                    frequency_based_trips,
+                )
+                trips = trips[trips["trip_id"].isin(trip_sections.index)]
+            else:
+                # keep all stops of the remaining trips
+                trip_sections = pandas.DataFrame(
+                    {"first": -numpy.inf, "last": numpy.inf},
+                    index=pandas.Index(trips["trip_id"].unique()),
+                )
+
+            # stop_times: stream through, only keep the rows within the
+            # sections of the trips, remember which stops are served
+            served_stops = set()
+
+            def _stop_times():
+                for stop_times in cls._read_csv(
+                    source, "stop_times.txt", chunksize=CHUNK_SIZE
+                ):
+                    section = trip_sections.reindex(stop_times["trip_id"])
+                    stop_sequence = pandas.to_numeric(stop_times["stop_sequence"])
+                    stop_times = stop_times[
+                        (stop_sequence >= section["first"].to_numpy())
+                        & (stop_sequence <= section["last"].to_numpy())
+                    ]
+                    served_stops.update(stop_times["stop_id"])
+                    yield stop_times
+
+            with zipfile.ZipFile(
+                destination, "w", compression=zipfile.ZIP_DEFLATED
+            ) as filtered:
+                cls._write_csv(filtered, "stop_times.txt", _stop_times())
+
+                stops = cls._stops_and_parent_stations(
+                    cls._read_csv(source, "stops.txt"), served_stops
+                )
+                routes = routes[routes["route_id"].isin(trips["route_id"])]
+
+                stop_ids = set(stops["stop_id"])
+                trip_ids = set(trips["trip_id"])
+                references = {
+                    "agency.txt": {
+                        "agency_id": set(routes.get("agency_id", pandas.Series()))
+                    },
+                    "calendar.txt": {"service_id": set(trips["service_id"])},
+                    "calendar_dates.txt": {"service_id": set(trips["service_id"])},
+                    "fare_rules.txt": {"route_id": set(routes["route_id"])},
+                    "frequencies.txt": {"trip_id": trip_ids},
+                    "pathways.txt": {"from_stop_id": stop_ids, "to_stop_id": stop_ids},
+                    "shapes.txt": {
+                        "shape_id": set(trips.get("shape_id", pandas.Series()))
+                    },
+                    "transfers.txt": {
+                        "from_stop_id": stop_ids,
+                        "to_stop_id": stop_ids,
+                        "from_trip_id": trip_ids,
+                        "to_trip_id": trip_ids,
+                    },
+                }
+                if "agency_id" not in routes.columns:
+                    # single-agency feed
+                    del references["agency.txt"]
+
+                for name in sorted(names - {"stop_times.txt"}):
+                    if name in ("routes.txt", "stops.txt", "trips.txt"):
+                        data = {"routes.txt": routes, "stops.txt": stops}.get(
+                            name, trips
+                        )
+                        cls._write_csv(filtered, name, [data])
+                    elif name in references:
+                        data = cls._read_csv(source, name)
+                        for column, values in references[name].items():
+                            data = cls._filter_column(data, column, values)
+                        cls._write_csv(filtered, name, [data])
+                    else:
+                        with source.open(name) as f, filtered.open(name, "w") as g:
+                            while data := f.read(io.DEFAULT_BUFFER_SIZE):
+                                g.write(data)
+
+    @classmethod
+    def _active_services(cls, source, names, first_date, last_date):
+        """Find the services that run on at least one day between two dates."""
+        dates = pandas.date_range(first_date, last_date, freq="D")
+        date_strings = dates.strftime("%Y%m%d")
+        weekdays = [
+            "monday",
+            "tuesday",
+            "wednesday",
+            "thursday",
+            "friday",
+            "saturday",
+            "sunday",
+        ]
+
+        service_days = {}
+        if "calendar.txt" in names:
+            for _, service in cls._read_csv(source, "calendar.txt").iterrows():
+                runs = (
+                    (date_strings >= service["start_date"].strip())
+                    & (date_strings <= service["end_date"].strip())
+                    & numpy.isin(
+                        dates.dayofweek,
+                        [
+                            day
+                            for day, weekday in enumerate(weekdays)
+                            if service[weekday].strip() == "1"
+                        ],
+                    )
+                )
+                service_days[service["service_id"]] = set(date_strings[runs])
+
+        if "calendar_dates.txt" in names:
+            calendar_dates = cls._read_csv(source, "calendar_dates.txt")
+            calendar_dates = calendar_dates[
+                calendar_dates["date"].str.strip().isin(date_strings)
+            ]
+            for _, exception in calendar_dates.iterrows():
+                days = service_days.setdefault(exception["service_id"], set())
+                if exception["exception_type"].strip() == "1":  # added
+                    days.add(exception["date"].strip())
+                else:  # removed
+                    days.discard(exception["date"].strip())
+
+        return {service_id for service_id, days in service_days.items() if days}
+
+    @staticmethod
+    def _routes_of_agencies(routes, agency, agencies):
+        """Find the routes operated by one of `agencies` (ids or names)."""
+        no_agency_id = pandas.Series("", index=agency.index)
+        agency_ids = agency.get("agency_id", no_agency_id)
+        matching_agency_ids = set(
+            agency_ids[agency_ids.isin(agencies) | agency["agency_name"].isin(agencies)]
+        )
+
+        route_agency_ids = routes.get(
+            "agency_id", pandas.Series("", index=routes.index)
+        )
+        if len(agency) == 1:
+            # in single-agency data sets, `agency_id` is optional
+            route_agency_ids = route_agency_ids.replace("", agency_ids.iloc[0])
+
+        return routes[route_agency_ids.isin(matching_agency_ids)]
+
+    @staticmethod
+    def _filter_column(data_frame, column, values):
+        # keep rows that reference one of `values` in `column`, or none at all
+        # (many references in GTFS are optional)
+        if column not in data_frame.columns:
+            return data_frame
+        return data_frame[data_frame[column].isin(values) | (data_frame[column] == "")]
+
+    @staticmethod
+    def _stops_and_parent_stations(stops, stop_ids):
+        stop_ids = set(stop_ids)
+        if "parent_station" in stops.columns:
+            while True:
+                parent_stations = set(
+                    stops.loc[stops["stop_id"].isin(stop_ids), "parent_station"]
+                ) - {""}
+                if parent_stations <= stop_ids:
+                    break
+                stop_ids |= parent_stations
+        return stops[stops["stop_id"].isin(stop_ids)]
+
+    @classmethod
+    def _trip_sections(cls, source, trip_ids, stops_within_clip, frequency_based_trips):
+        # first pass: find trips that serve stops within the clip
+        candidate_trip_ids = trip_ids
+        trip_ids = set()
+        for stop_times in cls._read_csv(
+            source,
+            "stop_times.txt",
+            usecols=["trip_id", "stop_id"],
+            chunksize=CHUNK_SIZE,
+        ):
+            trip_ids.update(
+                stop_times.loc[
+                    stop_times["stop_id"].isin(stops_within_clip)
+                    & stop_times["trip_id"].isin(candidate_trip_ids),
+                    "trip_id",
+                ]
+            )
+
+        # second pass: read the stop times of only those trips
+        stop_times = pandas.concat(
+            [
+                stop_times[stop_times["trip_id"].isin(trip_ids)]
+                for stop_times in cls._read_csv(
+                    source,
+                    "stop_times.txt",
+                    usecols=[
+                        "trip_id",
+                        "stop_id",
+                        "stop_sequence",
+                        "arrival_time",
+                        "departure_time",
+                    ],
+                    chunksize=CHUNK_SIZE,
+                )
+            ]
+        )
+        stop_times["stop_sequence"] = pandas.to_numeric(stop_times["stop_sequence"])
+        stop_times = stop_times.sort_values(["trip_id", "stop_sequence"])
+
+        within_clip = stop_times["stop_id"].isin(stops_within_clip)
+        # frequency-based trips’ times are relative to their first stop, do
+        # not cut them
+        within_clip |= stop_times["trip_id"].isin(frequency_based_trips)
+        timed = (stop_times["arrival_time"].str.strip() != "") & (
+            stop_times["departure_time"].str.strip() != ""
+        )
+        # first and last stop within the clip, ...
+        first = stop_times["stop_sequence"].where(within_clip)
+        first = first.groupby(stop_times["trip_id"]).transform("min")
+        last = stop_times["stop_sequence"].where(within_clip)
+        last = last.groupby(stop_times["trip_id"]).transform("max")
+
+        # ... extended to the nearest stops with times
+        first = stop_times["stop_sequence"].where(
+            timed & (stop_times["stop_sequence"] <= first)
+        )
+        last = stop_times["stop_sequence"].where(
+            timed & (stop_times["stop_sequence"] >= last)
+        )
+        sections = pandas.DataFrame(
+            {
+                "first": first.groupby(stop_times["trip_id"]).max(),
+                "last": last.groupby(stop_times["trip_id"]).min(),
+            }
+        )
+
+        # at least two stops per trip
+        stop_sequence = stop_times["stop_sequence"]
+        within_section = (
+            stop_sequence >= stop_times["trip_id"].map(sections["first"])
+        ) & (stop_sequence <= stop_times["trip_id"].map(sections["last"]))
+        stops_per_trip = within_section.groupby(stop_times["trip_id"]).sum()
+        return sections[stops_per_trip.reindex(sections.index) >= 2].dropna()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+
+"""Profile the Java side of r5py with Java Flight Recorder (JFR)."""
+
+import atexit
+import collections
+import datetime
+import os
+import pathlib
+
+import jpype
+import pandas
+
+from .config import Config
+
+__all__ = ["FlightRecording", "record_session"]
+
+
+# the settings shipped with the JDK: `default` (low overhead, suitable for
+# continuous recording), or `profile` (more detail, e.g., more frequent
+# method samples)
+JFR_SETTINGS = ["default", "profile"]
+
+# summarise method samples of these packages
+R5_PACKAGE = "com.conveyal."
+
+
+config = Config()
+config.argparser.add(
+    "--flight-recording",
+    help="""
+        Record the Java Virtual Machine’s activity with Java Flight Recorder
+        for as long as r5py runs, and save the recording to
+        --flight-recording-directory
+    """,
+    action="store_true",
+)
+config.argparser.add(
+    "--flight-recording-directory",
+    help="""
+        Save Java Flight Recorder recordings (.jfr files) to this directory.
+        Default: the current working directory
+    """,
+    default=".",
+)
+
+
+def _recording_path(directory, name):
+    directory = pathlib.Path(directory).absolute()
+    directory.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
+    return directory / f"{name}-{timestamp}-{os.getpid():d}.jfr"
+
+
+def record_session(directory="."):
+    """
+    Record the JVM’s activity with JFR until the Python interpreter exits.
+
+    Arguments
+    ---------
+    directory : str | pathlib.Path
+        Save the recording into this directory (config parameter
+        `--flight-recording-directory`)
+
+    Returns
+    -------
+    r5py.util.FlightRecording
+        The running recording
+    """
+    # (JFR’s own `dumponexit` does not work reliably when the JVM is shut
+    # down by jpype, save the recording before that)
+    flight_recording = FlightRecording(directory)
+    flight_recording.__enter__()
+    atexit.register(flight_recording.__exit__, None, None, None)
+    return flight_recording
+
+
+class FlightRecording:
+    """Record the JVM’s activity with Java Flight Recorder in a `with` block."""
+
+    def __init__(
+        self,
+        directory=None,
+        name="r5py",
+        settings="profile",
+        hot_methods=False,
+    ):
+        """
+        Record the JVM’s activity with Java Flight Recorder in a `with` block.
+
+        The recording is saved as a `.jfr` file when the `with` block is left,
+        and can be analysed with, e.g., JDK Mission Control or `jfr print`.
+
+        Arguments
+        ---------
+        directory : str | pathlib.Path
+            Save the recording into this directory, default: config parameter
+            `--flight-recording-directory`
+        name : str
+            Name of the recording, the file name starts with it
+        settings : str
+            Which of the JDK’s JFR settings to use, `profile` (more detail) or
+            `default` (lower overhead)
+        hot_methods : bool
+            After recording, summarise the R5 methods that the JVM spent the
+            most time in, and save the summary (a `pandas.DataFrame`) in the
+            `hot_methods` attribute
+        """
+        if settings not in JFR_SETTINGS:
+            raise ValueError(
+                f"Unknown JFR `settings` ('{settings}'), "
+                f"use one of {', '.join(JFR_SETTINGS)}."
+            )
+        if directory is None:
+            directory = Config().arguments.flight_recording_directory
+        self.directory = pathlib.Path(directory)
+        self.name = name
+        self.settings = settings
+        self.summarise_hot_methods = hot_methods
+
+        self.path = None
+        self.hot_methods = None
+        self._recording = None
+
+    def __enter__(self):
+        """Start recording."""
+        from .jvm import start_jvm
+
+        start_jvm()
+
+        # (the `jdk` Python package, if installed, shadows Java’s `jdk` domain)
+        Configuration = jpype.JClass("jdk.jfr.Configuration")
+        Recording = jpype.JClass("jdk.jfr.Recording")
+
+        self._recording = Recording(Configuration.getConfiguration(self.settings))
+        self._recording.setName(self.name)
+        self._recording.start()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        """Stop recording, save the recording file."""
+        import java.nio.file
+
+        self._recording.stop()
+        self.path = _recording_path(self.directory, self.name)
+        self._recording.dump(java.nio.file.Path.of(f"{self.path}"))
+        self._recording.close()
+        self._recording = None
+
+        if self.summarise_hot_methods:
+            self.hot_methods = self._summarise_hot_methods(self.path)
+        return False
+
+    @staticmethod
+    def _summarise_hot_methods(path, package=R5_PACKAGE):
+        """
+        Find the methods of `package` that the JVM spent the most time in.
+
+        Arguments
+        ---------
+        path : pathlib.Path
+            A JFR recording
+        package : str
+            Prefix of the fully qualified class names to summarise
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per method, sorted by `self_samples`: `method` (fully
+            qualified), `self_samples` (number of execution samples in which
+            this was the innermost method of `package`, i.e., including time
+            spent in JDK and library methods it called), `total_samples`
+            (samples in which the method was anywhere on the stack), and
+            `self_share` (`self_samples` as a share of all samples)
+        """
+        import java.nio.file
+
+        RecordingFile = jpype.JClass("jdk.jfr.consumer.RecordingFile")
+
+        self_samples = collections.Counter()
+        total_samples = collections.Counter()
+        samples = 0
+
+        for event in RecordingFile.readAllEvents(java.nio.file.Path.of(f"{path}")):
+            if f"{event.getEventType().getName()}" != "jdk.ExecutionSample":
+                continue
+            stack_trace = event.getStackTrace()
+            if stack_trace is None:
+                continue
+            samples += 1
+
+            methods = []
+            for frame in stack_trace.getFrames():
+                method = frame.getMethod()
+                class_name = f"{method.getType().getName()}"
+                if class_name.startswith(package):
+                    methods.append(f"{class_name}.{method.getName()}")
+            if methods:
+                self_samples[methods[0]] += 1
+                total_samples.update(set(methods))
+
+        hot_methods = pandas.DataFrame(
+            {
+                "method": pandas.Series(list(total_samples.keys()), dtype=str),
+                "self_samples": pandas.Series(
+                    [self_samples[method] for method in total_samples], dtype=int
+                ),
+                "total_samples": pandas.Series(list(total_samples.values()), dtype=int),
+            }
+        )
+        hot_methods["self_share"] = hot_methods["self_samples"] / max(samples, 1)
+        return hot_methods.sort_values(
+            ["self_samples", "total_samples"], ascending=False, ignore_index=True
+        )
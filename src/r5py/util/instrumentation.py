@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+
+"""Record how much time the phases of a computation take."""
+
+import collections
+import contextlib
+import threading
+import time
+
+import numpy
+import pandas
+
+__all__ = ["Instrumentation", "PhaseTiming"]
+
+
+# The time one run of a computation phase took: `wall_time` is the elapsed
+# (real) time, `cpu_time` the CPU time of the thread that ran the phase, both
+# in seconds. `cpu_time` does not include work R5 hands off to other (JVM)
+# threads, e.g., its parallel public transport searches. `parent` is the
+# phase this phase ran in (in the same thread), if any, and
+# `nested_wall_time` and `nested_cpu_time` are the parts of `wall_time` and
+# `cpu_time` spent in phases nested in this one
+PhaseTiming = collections.namedtuple(
+    "PhaseTiming",
+    [
+        "phase",
+        "wall_time",
+        "cpu_time",
+        "parent",
+        "nested_wall_time",
+        "nested_cpu_time",
+    ],
+    defaults=[None, 0.0, 0.0],
+)
+
+
+class Instrumentation:
+    """Record how much time the phases of a computation take."""
+
+    def __init__(self, enabled=True, callbacks=()):
+        """
+        Record how much time the phases of a computation take.
+
+        Pass `instrumentation=True` (or an `Instrumentation` instance) to
+        `r5py.TravelTimeMatrix` or `r5py.DetailedItineraries` to find out
+        which phases (e.g., input validation, snapping, routing, parsing the
+        results) take the most time. The `instrumentation` attribute of the
+        results then holds the timings.
+
+        Phases that run once per origin (or per origin/destination pair) are
+        recorded every time they run, and their `histogram()` shows how the
+        time per origin is distributed.
+
+        CPU times are those of the Python thread that ran a phase (including
+        the Java code it called), not of R5’s own worker threads: for phases
+        in which R5 computes in parallel, the wall time is the better measure.
+
+        Phases can be nested (e.g., `transit_search` runs within
+        `route_od_pair`). Each record names the enclosing phase as its
+        `parent`, and the `summary` counts the time of nested phases only
+        for them, not again for the enclosing phase.
+
+        Arguments
+        ---------
+        enabled : bool
+            Whether to record anything. A disabled instrumentation adds
+            (almost) no overhead.
+        callbacks : collections.abc.Iterable[collections.abc.Callable]
+            Functions that are called with a `PhaseTiming` every time a phase
+            has completed, e.g., to forward timings to a monitoring system.
+            Callbacks are called from the thread that ran the phase.
+        """
+        self.enabled = enabled
+        self.callbacks = list(callbacks)
+        self._records = []
+        self._lock = threading.Lock()
+        self._local = threading.local()  # the phases each thread is in
+
+    @classmethod
+    def from_argument(cls, instrumentation):
+        """
+        Interpret an `instrumentation` argument.
+
+        Arguments
+        ---------
+        instrumentation : bool | r5py.util.Instrumentation | None
+            `True` to record timings, `False` or `None` not to, or an
+            `Instrumentation` instance to use
+
+        Returns
+        -------
+        r5py.util.Instrumentation
+        """
+        if isinstance(instrumentation, cls):
+            return instrumentation
+        if instrumentation is None or isinstance(instrumentation, bool):
+            return cls(enabled=bool(instrumentation))
+        raise TypeError(
+            "`instrumentation` must be a boolean or an `r5py.util.Instrumentation`"
+        )
+
+    def phase(self, name):
+        """
+        Time a phase of a computation, use as a context manager.
+
+        Arguments
+        ---------
+        name : str
+            Name of the phase
+        """
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return _Phase(self, name)
+
+    def record(
+        self,
+        name,
+        wall_time,
+        cpu_time,
+        parent=None,
+        nested_wall_time=0.0,
+        nested_cpu_time=0.0,
+    ):
+        """
+        Record the time a phase took.
+
+        Arguments
+        ---------
+        name : str
+            Name of the phase
+        wall_time : float
+            Elapsed (real) time in seconds
+        cpu_time : float
+            CPU time in seconds
+        parent : str | None
+            Name of the phase this phase ran in, if any
+        nested_wall_time : float
+            Part of `wall_time` spent in nested phases, in seconds
+        nested_cpu_time : float
+            Part of `cpu_time` spent in nested phases, in seconds
+        """
+        phase_timing = PhaseTiming(
+            name, wall_time, cpu_time, parent, nested_wall_time, nested_cpu_time
+        )
+        with self._lock:
+            self._records.append(phase_timing)
+        for callback in self.callbacks:
+            callback(phase_timing)
+
+    @property
+    def records(self):
+        """
+        All recorded timings.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per run of a phase, with the columns `phase`,
+            `wall_time`, `cpu_time`, `parent`, `nested_wall_time`, and
+            `nested_cpu_time` (cf. `PhaseTiming`, times in seconds)
+        """
+        with self._lock:
+            return pandas.DataFrame(self._records, columns=PhaseTiming._fields)
+
+    @property
+    def summary(self):
+        """
+        Timings per phase.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per phase (index), in the order the phases first ran, with
+            the columns `count` (how often the phase ran), `wall_time` and
+            `cpu_time` (in total, seconds, excluding the time spent in nested
+            phases, so that the totals of all phases do not overlap), and
+            `mean_wall_time` and `max_wall_time` (per run, seconds, including
+            nested phases)
+        """
+        records = self.records.assign(
+            own_wall_time=lambda records: (
+                records["wall_time"] - records["nested_wall_time"]
+            ),
+            own_cpu_time=lambda records: (
+                records["cpu_time"] - records["nested_cpu_time"]
+            ),
+        )
+        return (
+            records.groupby("phase", sort=False)
+            .agg(
+                count=("wall_time", "size"),
+                wall_time=("own_wall_time", "sum"),
+                cpu_time=("own_cpu_time", "sum"),
+                mean_wall_time=("wall_time", "mean"),
+                max_wall_time=("wall_time", "max"),
+            )
+            .astype({"count": int})
+        )
+
+    def histogram(self, phase, bins=10):
+        """
+        Distribution of the wall time of the runs of a phase.
+
+        Arguments
+        ---------
+        phase : str
+            Name of the phase, e.g., `compute_travel_times` (once per origin)
+        bins : int | collections.abc.Sequence[float]
+            Number of bins, or bin edges (seconds), see `numpy.histogram()`
+
+        Returns
+        -------
+        tuple[numpy.ndarray, numpy.ndarray]
+            Counts per bin, and bin edges (seconds)
+        """
+        records = self.records
+        return numpy.histogram(
+            records.loc[records.phase == phase, "wall_time"],
+            bins=bins,
+        )
+
+
+class _Phase:
+    """Measure the wall and CPU time between entering and leaving a context."""
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.nested_wall_time = 0.0
+        self.nested_cpu_time = 0.0
+
+    def __enter__(self):
+        try:
+            phases = self.instrumentation._local.phases
+        except AttributeError:
+            phases = self.instrumentation._local.phases = []
+        self._parent = phases[-1] if phases else None
+        phases.append(self)
+
+        self._wall_time = time.perf_counter()
+        self._cpu_time = time.thread_time()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        wall_time = time.perf_counter() - self._wall_time
+        cpu_time = time.thread_time() - self._cpu_time
+
+        self.instrumentation._local.phases.pop()
+        if self._parent is not None:
+            self._parent.nested_wall_time += wall_time
+            self._parent.nested_cpu_time += cpu_time
+
+        self.instrumentation.record(
+            self.name,
+            wall_time,
+            cpu_time,
+            None if self._parent is None else self._parent.name,
+            self.nested_wall_time,
+            self.nested_cpu_time,
+        )
+        return False
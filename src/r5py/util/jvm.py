@@ -6,99 +6,126 @@ import os
 import pathlib
 import shutil
 import sys
+import threading
 
 import jpype
 import jpype.imports
 
-from .classpath import R5_CLASSPATH
+from .class_data_sharing import class_data_sharing_options
+from .classpath import find_r5_classpath
 from .config import Config
-from .memory_footprint import MAX_JVM_MEMORY
+from .flight_recording import record_session
+from .jvm_options import jvm_options
+from .memory_footprint import max_jvm_memory
 
 __all__ = ["start_jvm"]
 
 
+# Java top-level packages R5 and its dependencies live in, in addition to
+# the ones jpype knows about (`com`, `java`, `org`, …)
+JAVA_DOMAINS = ["ch", "gnu"]
+
+_jvm_lock = threading.RLock()
+
+
 def start_jvm():
     """
     Start a Java Virtual Machine (JVM) if none is running already.
 
-    Takes into account the `--max-memory` and `--verbose` command
-    line and configuration options.
+    Takes into account the `--max-memory`, `--r5-classpath`, `--jvm-profile`,
+    `--jvm-options`, `--flight-recording`, and `--verbose` command line and
+    configuration options.
     """
-    if not jpype.isJVMStarted():
-        # preload signal handling; this, among other things, prevents some of
-        # the warning messages we have been seeing
-        # (cf. https://stackoverflow.com/q/15790403 and
-        #  https://docs.oracle.com/en/java/javase/19/vm/signal-chaining.html )
-        JVM_PATH = pathlib.Path(jpype.getDefaultJVMPath()).resolve()
-        if sys.platform == "linux":
-            try:
-                LIBJSIG = next(JVM_PATH.parent.glob("**/libjsig.so"))
-                os.environ["LD_PRELOAD"] = str(LIBJSIG)
-            except StopIteration:  # pragma: no cover
-                pass  # don’t fail completely if libjsig not found
-        elif sys.platform == "darwin":
-            try:
-                LIBJSIG = next(JVM_PATH.parent.glob("**/libjsig.dylib"))
-                os.environ["DYLD_INSERT_LIBRARIES"] = str(LIBJSIG)
-            except StopIteration:  # pragma: no cover
-                pass  # don’t fail completely if libjsig not found
-
-        TEMP_DIR = Config().TEMP_DIR
-
-        jpype.startJVM(
-            f"-Xmx{MAX_JVM_MEMORY:d}",
-            "-XX:+RestoreMXCSROnJNICalls",  # https://github.com/r5py/r5py/issues/485
-            "-Xcheck:jni",
-            "-Xrs",  # https://stackoverflow.com/q/34951812
-            "-Duser.language=en",  # Set a default locale, …
-            "-Duser.country=US",  # … as R5 formats numeric return …
-            "-Duser.variant=",  # … values as a localised string
-            f"-Djava.io.tmpdir={TEMP_DIR}",
-            "--enable-native-access=ALL-UNNAMED",
-            classpath=[R5_CLASSPATH],
-            interrupt=True,
-        )
-
-        # Add shutdown hook that cleans up the temporary directory
-        @jpype.JImplements("java.lang.Runnable")
-        class ShutdownHookToCleanUpTempDir:
-            @jpype.JOverride
-            def run(self):  # pragma: no cover
-                shutil.rmtree(TEMP_DIR)
-
+    with _jvm_lock:
+        if not jpype.isJVMStarted():
+            _start_jvm()
+
+
+def _start_jvm():
+    """Start a JVM, assumes that none is running, yet."""
+    # preload signal handling; this, among other things, prevents some of
+    # the warning messages we have been seeing
+    # (cf. https://stackoverflow.com/q/15790403 and
+    #  https://docs.oracle.com/en/java/javase/19/vm/signal-chaining.html )
+    JVM_PATH = pathlib.Path(jpype.getDefaultJVMPath()).resolve()
+    if sys.platform == "linux":
+        try:
+            LIBJSIG = next(JVM_PATH.parent.glob("**/libjsig.so"))
+            os.environ["LD_PRELOAD"] = str(LIBJSIG)
+        except StopIteration:  # pragma: no cover
+            pass  # don’t fail completely if libjsig not found
+    elif sys.platform == "darwin":
+        try:
+            LIBJSIG = next(JVM_PATH.parent.glob("**/libjsig.dylib"))
+            os.environ["DYLD_INSERT_LIBRARIES"] = str(LIBJSIG)
+        except StopIteration:  # pragma: no cover
+            pass  # don’t fail completely if libjsig not found
+
+    TEMP_DIR = Config().TEMP_DIR
+    R5_CLASSPATH = find_r5_classpath(Config().arguments)
+
+    jpype.startJVM(
+        f"-Xmx{max_jvm_memory():d}",
+        "-XX:+RestoreMXCSROnJNICalls",  # https://github.com/r5py/r5py/issues/485
+        "-Xrs",  # https://stackoverflow.com/q/34951812
+        "-Duser.language=en",  # Set a default locale, …
+        "-Duser.country=US",  # … as R5 formats numeric return …
+        "-Duser.variant=",  # … values as a localised string
+        f"-Djava.io.tmpdir={TEMP_DIR}",
+        "--enable-native-access=ALL-UNNAMED",
+        *class_data_sharing_options(R5_CLASSPATH, JVM_PATH),
+        *jvm_options(Config().arguments.jvm_profile, Config().arguments.jvm_options),
+        classpath=[R5_CLASSPATH],
+        interrupt=True,
+    )
+
+    # Add shutdown hook that cleans up the temporary directory
+    @jpype.JImplements("java.lang.Runnable")
+    class ShutdownHookToCleanUpTempDir:
+        @jpype.JOverride
+        def run(self):  # pragma: no cover
+            shutil.rmtree(TEMP_DIR)
+
+    import java.lang
+
+    java.lang.Runtime.getRuntime().addShutdownHook(
+        java.lang.Thread(ShutdownHookToCleanUpTempDir())
+    )
+
+    if Config().arguments.flight_recording:
+        record_session(Config().arguments.flight_recording_directory)
+
+    if not Config().arguments.verbose:
+        import ch.qos.logback.classic
+        import java.io
         import java.lang
-
-        java.lang.Runtime.getRuntime().addShutdownHook(
-            java.lang.Thread(ShutdownHookToCleanUpTempDir())
-        )
-
-        if not Config().arguments.verbose:
-            import ch.qos.logback.classic
-            import java.io
-            import java.lang
-            import org.slf4j.LoggerFactory
-
-            logger_context = org.slf4j.LoggerFactory.getILoggerFactory()
-            for log_target in (
-                "com.conveyal.gtfs",
-                "com.conveyal.osmlib",
-                "com.conveyal.r5",
-                "com.conveyal.r5.profile.ExecutionTimer",
-                "com.conveyal.r5.profile.FastRaptorWorker",
-                "graphql.GraphQL",
-                "org.eclipse.jetty",
-                "org.hsqldb.persist.Logger" "org.mongodb.driver.connection",
-            ):
-                logger_context.getLogger(log_target).setLevel(
-                    ch.qos.logback.classic.Level.valueOf("OFF")
-                )
-
-            if sys.platform == "win32":  # Windows
-                null_stream = java.io.PrintStream("NUL")
-            else:
-                null_stream = java.io.PrintStream("/dev/null")
-            java.lang.System.setErr(null_stream)
-            java.lang.System.setOut(null_stream)
+        import org.slf4j.LoggerFactory
+
+        logger_context = org.slf4j.LoggerFactory.getILoggerFactory()
+        for log_target in (
+            "com.conveyal.gtfs",
+            "com.conveyal.osmlib",
+            "com.conveyal.r5",
+            "com.conveyal.r5.profile.ExecutionTimer",
+            "com.conveyal.r5.profile.FastRaptorWorker",
+            "graphql.GraphQL",
+            "org.eclipse.jetty",
+            "org.hsqldb.persist.Logger" "org.mongodb.driver.connection",
+        ):
+            logger_context.getLogger(log_target).setLevel(
+                ch.qos.logback.classic.Level.valueOf("OFF")
+            )
+
+        if sys.platform == "win32":  # Windows
+            null_stream = java.io.PrintStream("NUL")
+        else:
+            null_stream = java.io.PrintStream("/dev/null")
+        java.lang.System.setErr(null_stream)
+        java.lang.System.setOut(null_stream)
+
+
+for domain in JAVA_DOMAINS:
+    jpype.imports.registerDomain(domain)
 
 
 # The JVM should be started before we attempt to import any Java package.
@@ -112,6 +139,9 @@ def start_jvm():
 # Java package (or, more precisely, a package that’s likely to be a
 # Java package), the `import` statement would trigger `start_jvm()`
 
+# None of r5py’s modules imports Java packages at module level, so that
+# `import r5py` stays cheap and the JVM starts only once it is actually used
+
 # see:
 # https://github.com/jpype-project/jpype/blob/master/jpype/imports.py#L146
 
@@ -124,9 +154,11 @@ class _JImportLoaderThatStartsTheJvm(jpype.imports._JImportLoader):
         # knew about the package we try to load), and naturally, we’re
         # towards the end of that list.
 
-        # Let’s assume the requested packages is a Java package,
-        # and start the JVM
-        start_jvm()
+        # If the requested package lives in a Java domain, let’s assume
+        # it is a Java package, and start the JVM (other failing imports,
+        # e.g., of optional Python dependencies, should not start a JVM)
+        if name.partition(".")[0] in jpype.imports._JDOMAINS:
+            start_jvm()
 
         # then go the standard jpype way:
         return super().find_spec(name, path, target)
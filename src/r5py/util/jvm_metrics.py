@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+"""Report memory use and garbage collection of the Java Virtual Machine."""
+
+import threading
+import time
+
+import pandas
+
+__all__ = ["jvm_metrics", "JvmMetricsRecorder"]
+
+
+def jvm_metrics():
+    """
+    Report memory use and garbage collection activity of the JVM.
+
+    Read from the JVM’s management beans (`java.lang.management`). Use these
+    numbers to tune `--max-memory`: if `heap_used` stays well below
+    `heap_max`, a lower limit will do; if `gc_time` grows quickly, the JVM
+    spends much of its time freeing memory, and a higher limit (or fewer
+    concurrent processes) could speed up routing.
+
+    Returns
+    -------
+    dict
+        - heap_used, heap_committed, heap_max (int): heap memory in bytes
+          that is in use, reserved by the JVM, and the maximum heap size
+          (`None` if not limited)
+        - non_heap_used, non_heap_committed (int): memory outside the heap
+          (class metadata, compiled code, …) in bytes
+        - gc_count (int): number of garbage collections so far
+        - gc_time (float): approximate accumulated time spent in garbage
+          collection in seconds
+        - garbage_collectors (dict): `count` and `time` per garbage
+          collector (e.g., ‘G1 Young Generation’)
+    """
+    import java.lang.management
+
+    memory = java.lang.management.ManagementFactory.getMemoryMXBean()
+    heap = memory.getHeapMemoryUsage()
+    non_heap = memory.getNonHeapMemoryUsage()
+
+    garbage_collectors = {
+        f"{garbage_collector.getName()}": {
+            # (-1 if a collector does not report count or time)
+            "count": max(int(garbage_collector.getCollectionCount()), 0),
+            "time": max(int(garbage_collector.getCollectionTime()), 0) / 1000.0,
+        }
+        for garbage_collector in (
+            java.lang.management.ManagementFactory.getGarbageCollectorMXBeans()
+        )
+    }
+
+    return {
+        "heap_used": int(heap.getUsed()),
+        "heap_committed": int(heap.getCommitted()),
+        "heap_max": int(heap.getMax()) if heap.getMax() >= 0 else None,
+        "non_heap_used": int(non_heap.getUsed()),
+        "non_heap_committed": int(non_heap.getCommitted()),
+        "gc_count": sum(
+            garbage_collector["count"]
+            for garbage_collector in garbage_collectors.values()
+        ),
+        "gc_time": sum(
+            garbage_collector["time"]
+            for garbage_collector in garbage_collectors.values()
+        ),
+        "garbage_collectors": garbage_collectors,
+    }
+
+
+class JvmMetricsRecorder:
+    """Record `jvm_metrics()` periodically, while inside a `with` block."""
+
+    def __init__(self, interval=1.0):
+        """
+        Record `jvm_metrics()` periodically, while inside a `with` block.
+
+        Metrics are recorded when entering and leaving the context, and every
+        `interval` seconds in between (in a background thread).
+
+        Arguments
+        ---------
+        interval : float
+            Time in seconds between two records
+        """
+        if interval <= 0:
+            raise ValueError("`interval` must be a positive number of seconds")
+        self.interval = interval
+        self._records = []
+        self._start = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._record_periodically, daemon=True)
+
+    def __enter__(self):
+        """Start recording."""
+        self._start = time.monotonic()
+        self._record()
+        self._thread.start()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        """Stop recording."""
+        self._stop.set()
+        self._thread.join()
+        self._record()
+        return False
+
+    @property
+    def metrics(self):
+        """
+        The recorded metrics.
+
+        Returns
+        -------
+        pandas.DataFrame
+            One row per record, with a column `elapsed` (seconds since
+            recording started), and the scalar values of `jvm_metrics()`
+        """
+        return pandas.DataFrame(self._records)
+
+    def _record(self):
+        metrics = jvm_metrics()
+        del metrics["garbage_collectors"]
+        self._records.append({"elapsed": time.monotonic() - self._start} | metrics)
+
+    def _record_periodically(self):
+        import java.lang
+
+        # do not keep the JVM from shutting down
+        java.lang.Thread.attachAsDaemon()
+        try:
+            while not self._stop.wait(self.interval):
+                self._record()
+        finally:
+            java.lang.Thread.detach()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""Pick JVM options suitable for the workload."""
+
+import shlex
+
+from .config import Config
+
+__all__ = ["jvm_options"]
+
+
+# Options that are always passed to the JVM, as are `--max-memory`,
+# and `--temporary-directory`, see `start_jvm()`
+JVM_PROFILES = {
+    # check every JNI call for invalid arguments (slow)
+    "debug": ["-Xcheck:jni"],
+    # the JVM’s defaults (G1 garbage collector)
+    "default": [],
+    # most work done per CPU time, at the expense of longer GC pauses
+    "throughput": ["-XX:+UseParallelGC"],
+    # short GC pauses, at the expense of some CPU time and memory
+    "low-latency": ["-XX:+UseZGC"],
+}
+
+
+config = Config()
+
+config.argparser.add(
+    "--jvm-profile",
+    help=f"""
+        Tune the JVM for a type of workload, one of
+        {", ".join(JVM_PROFILES.keys())}
+    """,
+    choices=JVM_PROFILES.keys(),
+    default="default",
+)
+config.argparser.add(
+    "--jvm-options",
+    help="""
+        Additional options passed to the JVM, e.g.,
+        --jvm-options='-XX:+AlwaysPreTouch -Xss4m'. Take precedence over
+        options set by r5py
+    """,
+    default="",
+)
+
+
+def jvm_options(jvm_profile="default", additional_jvm_options=""):
+    """
+    List the JVM options for `jvm_profile` and `additional_jvm_options`.
+
+    Arguments
+    ---------
+    jvm_profile : str
+        One of the keys of `JVM_PROFILES`
+    additional_jvm_options : str
+        Further options, separated by white space, quoted as in a shell
+
+    Returns
+    -------
+    list[str]
+        JVM options
+    """
+    try:
+        options = list(JVM_PROFILES[jvm_profile])
+    except KeyError as exception:
+        raise ValueError(
+            f"Unknown `--jvm-profile` ('{jvm_profile}'), "
+            f"use one of {', '.join(JVM_PROFILES.keys())}."
+        ) from exception
+    options += shlex.split(additional_jvm_options)
+    return options
@@ -2,6 +2,7 @@
 
 """Determine a reasonable memory footprint for the Java virtual machine."""
 
+import pathlib
 import psutil
 import re
 import warnings
@@ -9,11 +10,14 @@ import warnings
 from .config import Config
 from .warnings import R5pyWarning
 
-__all__ = ["MAX_JVM_MEMORY"]
+__all__ = ["MAX_JVM_MEMORY", "max_jvm_memory"]  # noqa: F822, cf. `__getattr__`
 
 
 ABSOLUTE_MINIMUM_MEMORY = 200 * 1024**2  # never grant less than 200 MiB to JVM
 
+CGROUP_ROOT = pathlib.Path("/sys/fs/cgroup")
+PROC_SELF_CGROUP = pathlib.Path("/proc/self/cgroup")
+
 
 config = Config()
 config.argparser.add(
@@ -22,18 +26,117 @@ config.argparser.add(
     help="""
         Memory limit for the JVM running R5.
 
-        Use % as a suffix to specify a share of total RAM;
+        Use % as a suffix to specify a share of total RAM (or of the
+        container’s memory limit, if any);
         K, M, G, T to specify KiB, MiB, GiB, or TiB, respectively.
         Values without suffix are interpreted as bytes.
     """,
     default="80%",
 )
+config.argparser.add(
+    "--max-memory-processes",
+    help="""
+        Number of r5py processes sharing the same machine or container.
+        A relative `--max-memory` is divided evenly between them.
+    """,
+    type=int,
+    default=1,
+)
+
+
+def _cgroup_memory_limit(proc_self_cgroup=PROC_SELF_CGROUP, cgroup_root=CGROUP_ROOT):
+    """
+    Find the memory limit of the control group this process runs in.
+
+    Container runtimes (Docker, Kubernetes, …) limit the memory available
+    to a container using Linux control groups (cgroups), both in their
+    version 1 and version 2 flavours, while `psutil.virtual_memory()`
+    reports the host’s total RAM.
+
+    Arguments
+    ---------
+    proc_self_cgroup : pathlib.Path
+        File listing the control groups of the current process.
+        Default: /proc/self/cgroup
+    cgroup_root : pathlib.Path
+        Mount point of the control group file system.
+        Default: /sys/fs/cgroup
+
+    Returns
+    -------
+    int | None
+        The lowest memory limit of the control group and its ancestors, in
+        bytes, or `None` if no limit is set or control
+        groups are not available (e.g., on operating systems other than Linux)
+    """
+    try:
+        control_groups = proc_self_cgroup.read_text().splitlines()
+    except OSError:
+        return None
+
+    candidates = []
+    for control_group in control_groups:
+        try:
+            _, controllers, path = control_group.split(":", 2)
+        except ValueError:
+            continue
+        # limits set on any ancestor control group apply, too (e.g., a
+        # Kubernetes pod’s limit on the containers below it)
+        ancestors = [pathlib.PurePosixPath(path.lstrip("/"))]
+        ancestors += ancestors[0].parents
+        if controllers == "":  # cgroup v2 (unified hierarchy)
+            for directory in (cgroup_root, cgroup_root / "unified"):
+                candidates += [
+                    directory / ancestor / "memory.max" for ancestor in ancestors
+                ]
+        elif "memory" in controllers.split(","):  # cgroup v1
+            directory = cgroup_root / "memory"
+            candidates += [
+                directory / ancestor / "memory.limit_in_bytes" for ancestor in ancestors
+            ]
+
+    total_ram = psutil.virtual_memory().total
+    limits = []
+    for candidate in candidates:
+        try:
+            limit = candidate.read_text().strip()
+        except OSError:
+            continue
+        if limit == "max":  # cgroup v2: no limit
+            continue
+        try:
+            limit = int(limit)
+        except ValueError:
+            continue
+        # cgroup v1 reports ‘no limit’ as a very large number (close to 2⁶³)
+        if 0 < limit < total_ram:
+            limits.append(limit)
+    return min(limits, default=None)
+
+
+def _total_memory():
+    """
+    Find the total memory available to this process.
+
+    Returns
+    -------
+    int
+        Total RAM, or the control group (container) memory limit, if it is
+        lower, in bytes.
+    """
+    total_memory = psutil.virtual_memory().total
+    cgroup_memory_limit = _cgroup_memory_limit()
+    if cgroup_memory_limit is not None:
+        total_memory = min(total_memory, cgroup_memory_limit)
+    return total_memory
 
 
-def _share_of_ram(share=0.8, leave_at_least=(2 * 1024**3)):
+def _share_of_ram(share=0.8, leave_at_least=(2 * 1024**3), processes=1):
     """
     Calculate a share of total RAM.
 
+    Inside a container, total RAM is the container’s memory limit.
+
     Arguments
     ---------
     share : float
@@ -44,18 +147,24 @@ def _share_of_ram(share=0.8, leave_at_least=(2 * 1024**3)):
         any case.  If `total RAM - (total RAM ⨉ share)` is smaller than
         `leave_at_least`, return `total RAM - leave_at_least`, instead.
         Default: 2GiB
+    processes : int
+        Among how many processes to split the share of RAM.
+        Default: 1
 
     Returns
     -------
     int
-        A value in bytes that is close to `share` portion of total RAM.
+        A value in bytes that is close to `share` portion of total RAM,
+        divided by `processes`.
     """
-    total_ram = psutil.virtual_memory().total
+    if processes < 1:
+        raise ValueError(f"Number of processes must be at least 1, got {processes:d}.")
+    total_ram = _total_memory()
     if total_ram * (1.0 - share) > leave_at_least:
-        share_of_ram = round(share * total_ram)
+        share_of_ram = share * total_ram
     else:
-        share_of_ram = round(total_ram - leave_at_least)
-    return share_of_ram
+        share_of_ram = total_ram - leave_at_least
+    return round(share_of_ram / processes)
 
 
 def _parse_value_and_unit(value_and_unit, max_unit_length=1):
@@ -131,7 +240,7 @@ def _interpret_power_of_two_units(value, unit):
     return value
 
 
-def _get_max_memory(max_memory):
+def _get_max_memory(max_memory, processes=1):
     """
     Interpret the config parameter --max-memory.
 
@@ -144,6 +253,10 @@ def _get_max_memory(max_memory):
         Use % as a suffix to specify a share of total RAM;
         K, M, G, T suffix specify KiB, MiB, GiB, or TiB, respectively.
         Values without suffix are interpreted as bytes.
+    processes : int
+        Number of processes sharing the same memory, a relative `max_memory`
+        is divided between them (config parameter --max-memory-processes).
+        Default: 1
 
     Returns
     -------
@@ -156,7 +269,7 @@ def _get_max_memory(max_memory):
         raise ValueError(f"Could not interpret `--max-memory` ('{max_memory}').")
 
     if unit == "%":
-        value = _share_of_ram(share=(value / 100.0))
+        value = _share_of_ram(share=(value / 100.0), processes=processes)
     else:
         # convert to bytes
         value = _interpret_power_of_two_units(value, unit)
@@ -175,4 +288,27 @@ def _get_max_memory(max_memory):
     return max_memory
 
 
-MAX_JVM_MEMORY = _get_max_memory(config.arguments.max_memory)
+def max_jvm_memory():
+    """
+    Determine the maximum heap size for the JVM.
+
+    Takes into account the `--max-memory` and `--max-memory-processes`
+    configuration options as they are set at the time of the call (worker
+    processes adopt the options of their parent process before starting a
+    JVM, cf. `r5py.util.Config.adopt_arguments()`).
+
+    Returns
+    -------
+    int
+        Maximum heap size, in bytes
+    """
+    return _get_max_memory(
+        config.arguments.max_memory, config.arguments.max_memory_processes
+    )
+
+
+def __getattr__(name):
+    # `MAX_JVM_MEMORY` reflects the configuration at the time of access
+    if name == "MAX_JVM_MEMORY":
+        return max_jvm_memory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
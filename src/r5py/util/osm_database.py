@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+"""Decide where R5 stores the OpenStreetMap data it imports."""
+
+import pathlib
+
+from .config import Config
+from .memory_footprint import _interpret_power_of_two_units, _parse_value_and_unit
+
+__all__ = ["osm_database"]
+
+
+# osmlib’s magic ‘file name’ for an in-memory (off-heap) database
+IN_MEMORY = "__MEMORY__"
+
+
+config = Config()
+config.argparser.add(
+    "--in-memory-osm-threshold",
+    help="""
+        Import OpenStreetMap extracts smaller than this into memory, rather
+        than into a database file in the cache directory. K, M, G suffixes
+        specify KiB, MiB, GiB, respectively; values without suffix are
+        interpreted as bytes. 0 always uses a database file.
+    """,
+    default="64M",
+)
+
+
+def _parse_threshold(threshold):
+    """
+    Interpret the config parameter --in-memory-osm-threshold.
+
+    Arguments
+    ---------
+    threshold : str | int
+        Size limit of OpenStreetMap extracts that are imported into memory,
+        optionally with a K, M, G, or T suffix
+
+    Returns
+    -------
+    int
+        Size limit in bytes
+    """
+    try:
+        value, unit = _parse_value_and_unit(f"{threshold}")
+        value = _interpret_power_of_two_units(value, unit)
+    except (TypeError, ValueError) as exception:
+        raise ValueError(
+            f"Could not interpret `--in-memory-osm-threshold` ('{threshold}')."
+        ) from exception
+    return round(value)
+
+
+def osm_database(osm_pbf, digest, threshold=None):
+    """
+    Find a location for the database R5 imports `osm_pbf` into.
+
+    Small extracts are imported into memory: for them, writing a database file
+    and reading it back takes longer than building the street network, and
+    this avoids writing to slow, network, or read-only file systems.
+
+    Arguments
+    ---------
+    osm_pbf : pathlib.Path
+        The OpenStreetMap extract to import
+    digest : str
+        A hash identifying the transport network, used as the database file
+        name
+    threshold : str | int | None
+        Import extracts smaller than this into memory, default: config
+        parameter `--in-memory-osm-threshold`
+
+    Returns
+    -------
+    str
+        Path of a database file in the cache directory, or `IN_MEMORY`
+    """
+    if threshold is None:
+        threshold = Config().arguments.in_memory_osm_threshold
+    threshold = _parse_threshold(threshold)
+
+    if pathlib.Path(osm_pbf).stat().st_size < threshold:
+        return IN_MEMORY
+    return f"{Config().CACHE_DIR / f'{digest}.mapdb'}"
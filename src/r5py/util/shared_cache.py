@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+"""Compute values once, and share them between threads."""
+
+import collections
+import threading
+
+__all__ = ["SharedCache"]
+
+
+class SharedCache:
+    """Compute values once, and share them between threads."""
+
+    def __init__(self, max_size=None):
+        """
+        Compute values once, and share them between threads.
+
+        `get()` returns the cached value for a key, or computes it. If more
+        than one thread asks for the same missing key at the same time, only
+        one of them computes the value, the others wait for it. Values for
+        different keys are computed concurrently.
+
+        Arguments
+        ---------
+        max_size : int | None
+            Keep at most this many values, discard the least recently used
+            ones first. `None`: do not limit the size of the cache.
+        """
+        if max_size is not None and max_size < 1:
+            raise ValueError("`max_size` must be a positive integer or `None`")
+        self.max_size = max_size
+        self._values = collections.OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        """Check whether a value for `key` has been computed."""
+        return key in self._values
+
+    def __len__(self):
+        """Count the cached values."""
+        return len(self._values)
+
+    def get(self, key, compute):
+        """
+        Return the value for `key`, compute it if it is not cached, yet.
+
+        Arguments
+        ---------
+        key : collections.abc.Hashable
+            Identifies the value
+        compute : collections.abc.Callable
+            Function without arguments that computes the value for `key`
+
+        Returns
+        -------
+        The (cached) value for `key`
+        """
+        with self._lock:
+            try:
+                self._values.move_to_end(key)
+                return self._values[key]
+            except KeyError:
+                lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            with self._lock:
+                try:
+                    return self._values[key]
+                except KeyError:
+                    pass
+            value = compute()
+            self._store(key, value)
+        with self._lock:
+            self._locks.pop(key, None)
+        return value
+
+    def items(self):
+        """
+        List the cached keys and values.
+
+        Returns
+        -------
+        list[tuple]
+            A snapshot of the cached (key, value) pairs, least recently used
+            first
+        """
+        with self._lock:
+            return list(self._values.items())
+
+    def update(self, items):
+        """
+        Add precomputed values to the cache.
+
+        Arguments
+        ---------
+        items : collections.abc.Iterable[tuple]
+            (key, value) pairs
+        """
+        for key, value in items:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._values[key] = value
+            self._values.move_to_end(key)
+            if self.max_size is not None:
+                while len(self._values) > self.max_size:
+                    self._values.popitem(last=False)
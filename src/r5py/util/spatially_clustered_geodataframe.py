@@ -8,7 +8,6 @@ import warnings
 import geopandas
 import numpy
 import shapely
-import sklearn.cluster
 
 from .good_enough_equidistant_crs import GoodEnoughEquidistantCrs
 
@@ -32,6 +31,8 @@ class SpatiallyClusteredGeoDataFrame:
         min_cluster_size : int
             Do not form clusters with less members
         """
+        import sklearn.cluster  # expensive to import, load only when needed
+
         data = geopandas.GeoDataFrame(data)
 
         EQUIDISTANT_CRS = GoodEnoughEquidistantCrs(
@@ -0,0 +1,3 @@
+#!/usr/bin/env python3
+
+"""Benchmarks, run with `python -m pytest -m benchmark`."""
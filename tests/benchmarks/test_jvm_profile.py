@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+
+import json
+import statistics
+
+import pytest
+
+from ..fresh_interpreter import run_in_fresh_interpreter
+
+REPETITIONS = 5
+TOLERANCE = 0.1  # allow 10% of noise
+
+# Number of calls from Python into the JVM, to measure the per-call overhead
+JNI_CALLS = 100_000
+
+# Start a fresh JVM, load a (cached) transport network, and time a call-heavy
+# micro benchmark, a travel time matrix, and detailed itineraries
+WORKLOADS = f"""
+import datetime
+import json
+import time
+
+import geopandas
+import r5py
+import r5py.sampledata.helsinki
+
+transport_network = r5py.TransportNetwork(
+    r5py.sampledata.helsinki.osm_pbf,
+    [r5py.sampledata.helsinki.gtfs],
+)
+origins = geopandas.read_file(r5py.sampledata.helsinki.population_grid)
+origins.geometry = origins.geometry.to_crs("EPSG:3067").centroid.to_crs("EPSG:4326")
+
+import java.lang
+
+timings = {{}}
+
+start = time.perf_counter()
+for i in range({JNI_CALLS:d}):
+    java.lang.Integer.valueOf(i)
+timings["jni_call"] = (time.perf_counter() - start) / {JNI_CALLS:d}
+
+start = time.perf_counter()
+r5py.TravelTimeMatrix(
+    transport_network,
+    origins=origins.head(20),
+    destinations=origins,
+    departure=datetime.datetime(2022, 2, 22, 8, 30),
+    transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+)
+timings["travel_time_matrix"] = time.perf_counter() - start
+
+start = time.perf_counter()
+r5py.DetailedItineraries(
+    transport_network,
+    origins=origins.head(5),
+    destinations=origins.tail(5),
+    departure=datetime.datetime(2022, 2, 22, 8, 30),
+    transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+)
+timings["detailed_itineraries"] = time.perf_counter() - start
+
+print(json.dumps(timings))
+"""
+
+
+def _timings(jvm_profile):
+    return json.loads(
+        run_in_fresh_interpreter(WORKLOADS, f"--jvm-profile={jvm_profile}")
+    )
+
+
+@pytest.mark.benchmark
+class TestJvmProfile:
+    def test_default_profile_faster_than_debug_profile(self, record_property):
+        # warm up: build and cache the transport network
+        _timings("default")
+
+        timings = {"debug": [], "default": []}
+        for _ in range(REPETITIONS):
+            for jvm_profile, profile_timings in timings.items():
+                profile_timings.append(_timings(jvm_profile))
+
+        for workload in ("jni_call", "travel_time_matrix", "detailed_itineraries"):
+            debug = statistics.median(timing[workload] for timing in timings["debug"])
+            default = statistics.median(
+                timing[workload] for timing in timings["default"]
+            )
+
+            record_property(f"{workload}_debug", debug)
+            record_property(f"{workload}_default", default)
+            record_property(f"{workload}_overhead_removed", debug - default)
+
+            assert default <= debug * (1.0 + TOLERANCE)
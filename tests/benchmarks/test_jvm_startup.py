@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+
+import json
+import statistics
+
+import pytest
+
+from ..fresh_interpreter import run_in_fresh_interpreter
+
+REPETITIONS = 5
+TOLERANCE = 0.1  # allow 10% of noise
+
+# Start a fresh JVM, load a (cached) transport network, and compute travel
+# times from one origin, report the time it took and whether a class data
+# sharing archive was used
+TIME_TO_FIRST_ROUTE = """
+import datetime
+import json
+import time
+
+start = time.perf_counter()
+
+import geopandas
+import r5py
+import r5py.sampledata.helsinki
+
+transport_network = r5py.TransportNetwork(
+    r5py.sampledata.helsinki.osm_pbf,
+    [r5py.sampledata.helsinki.gtfs],
+)
+origins = geopandas.read_file(r5py.sampledata.helsinki.population_grid)
+origins.geometry = origins.geometry.to_crs("EPSG:3067").centroid.to_crs("EPSG:4326")
+
+travel_time_matrix = r5py.TravelTimeMatrix(
+    transport_network,
+    origins=origins.head(1),
+    destinations=origins,
+    departure=datetime.datetime(2022, 2, 22, 8, 30),
+    transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+)
+
+time_to_first_route = time.perf_counter() - start
+
+import java.lang.management
+
+jvm_arguments = (
+    java.lang.management.ManagementFactory.getRuntimeMXBean().getInputArguments()
+)
+print(
+    json.dumps(
+        {
+            "time_to_first_route": time_to_first_route,
+            "class_data_sharing": any(
+                str(argument).startswith("-XX:SharedArchiveFile=")
+                for argument in jvm_arguments
+            ),
+        }
+    )
+)
+"""
+
+
+def _time_to_first_route(*arguments):
+    return json.loads(run_in_fresh_interpreter(TIME_TO_FIRST_ROUTE, *arguments))
+
+
+@pytest.mark.benchmark
+class TestJvmStartup:
+    def test_time_to_first_route_with_class_data_sharing(self, record_property):
+        # warm up: build and cache the transport network, create the archive
+        _time_to_first_route()
+        _time_to_first_route("--class-data-sharing")
+
+        without_class_data_sharing = []
+        with_class_data_sharing = []
+        for _ in range(REPETITIONS):
+            result = _time_to_first_route()
+            assert not result["class_data_sharing"]
+            without_class_data_sharing.append(result["time_to_first_route"])
+
+            result = _time_to_first_route("--class-data-sharing")
+            assert result["class_data_sharing"]
+            with_class_data_sharing.append(result["time_to_first_route"])
+
+        without_class_data_sharing = statistics.median(without_class_data_sharing)
+        with_class_data_sharing = statistics.median(with_class_data_sharing)
+
+        record_property("time_to_first_route", without_class_data_sharing)
+        record_property(
+            "time_to_first_route_class_data_sharing", with_class_data_sharing
+        )
+
+        assert with_class_data_sharing <= without_class_data_sharing * (1.0 + TOLERANCE)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+
+
+import json
+import shutil
+import statistics
+
+import pytest
+
+from ..fresh_interpreter import run_in_fresh_interpreter
+
+REPETITIONS = 5
+TOLERANCE = 0.1  # allow 10% of noise
+
+# Start a fresh JVM, and build a transport network from scratch (remove
+# cached transport networks first), report the time it took
+BUILD_TRANSPORT_NETWORK = """
+import json
+import time
+
+import r5py
+import r5py.sampledata.helsinki
+from r5py.util import Config
+
+osm_pbf = r5py.sampledata.helsinki.osm_pbf
+gtfs = r5py.sampledata.helsinki.gtfs
+
+for cached_file in Config().CACHE_DIR.glob("*.transport_network"):
+    cached_file.unlink()
+for cached_file in Config().CACHE_DIR.glob("*.mapdb*"):
+    cached_file.unlink()
+
+start = time.perf_counter()
+transport_network = r5py.TransportNetwork(osm_pbf, [gtfs])
+build_time = time.perf_counter() - start
+
+print(
+    json.dumps(
+        {
+            "build_time": build_time,
+            "mapdb_files": len(list(Config().CACHE_DIR.glob("*.mapdb*"))),
+        }
+    )
+)
+"""
+
+
+# Start a fresh JVM, and build a transport network from scratch (remove
+# cached transport networks and filtered extracts first), with the filters
+# passed as a JSON object in the first command line argument (and r5py
+# configuration options in the following ones), report the time it took,
+# including the time to filter the extract
+BUILD_FILTERED_TRANSPORT_NETWORK = """
+import json
+import sys
+import time
+
+import r5py
+import r5py.sampledata.helsinki
+from r5py.util import Config
+
+filters = json.loads(sys.argv[1])
+
+osm_pbf = r5py.sampledata.helsinki.osm_pbf
+gtfs = r5py.sampledata.helsinki.gtfs
+
+for cached_file in Config().CACHE_DIR.glob("*.transport_network"):
+    cached_file.unlink()
+for cached_file in Config().CACHE_DIR.glob("*.osm.pbf"):
+    # filtered extracts are named after their (SHA256) digest
+    if len(cached_file.name) == 64 + len(".osm.pbf"):
+        cached_file.unlink()
+
+start = time.perf_counter()
+transport_network = r5py.TransportNetwork(osm_pbf, [gtfs], **filters)
+build_time = time.perf_counter() - start
+
+print(json.dumps({"build_time": build_time}))
+"""
+
+HELSINKI_CITY_CENTRE = (24.92, 60.16, 24.96, 60.18)
+
+
+def _build_transport_network(*arguments):
+    return json.loads(run_in_fresh_interpreter(BUILD_TRANSPORT_NETWORK, *arguments))
+
+
+@pytest.mark.benchmark
+class TestOsmIngestion:
+    def test_build_transport_network_in_memory(self, record_property):
+        # warm up: download sample data, create the filtered extracts
+        _build_transport_network()
+
+        on_disk = []
+        in_memory = []
+        for _ in range(REPETITIONS):
+            result = _build_transport_network("--in-memory-osm-threshold", "0")
+            assert result["mapdb_files"] > 0
+            on_disk.append(result["build_time"])
+
+            result = _build_transport_network("--in-memory-osm-threshold", "1G")
+            assert result["mapdb_files"] == 0
+            in_memory.append(result["build_time"])
+
+        on_disk = statistics.median(on_disk)
+        in_memory = statistics.median(in_memory)
+
+        record_property("build_time_osm_on_disk", on_disk)
+        record_property("build_time_osm_in_memory", in_memory)
+
+        assert in_memory <= on_disk * (1.0 + TOLERANCE)
+
+    @pytest.mark.parametrize(
+        ["filters"],
+        [
+            ({"clip": HELSINKI_CITY_CENTRE},),
+            ({"routable_osm_only": True},),
+            ({"clip": HELSINKI_CITY_CENTRE, "routable_osm_only": True},),
+        ],
+    )
+    @pytest.mark.parametrize(
+        ["osm_filter_tool"],
+        [
+            pytest.param(
+                "osmium",
+                marks=pytest.mark.skipif(
+                    shutil.which("osmium") is None,
+                    reason="osmium-tool is not installed",
+                ),
+            ),
+            ("osmlib",),
+        ],
+    )
+    def test_filtered_build_is_faster(self, filters, osm_filter_tool, record_property):
+        # filtering the extract takes time, too: building a transport network
+        # from a filtered extract, filtering included, should still be faster
+        # than building it from the complete extract
+        def build_time(filters):
+            return json.loads(
+                run_in_fresh_interpreter(
+                    BUILD_FILTERED_TRANSPORT_NETWORK,
+                    json.dumps(filters),
+                    "--osm-filter-tool",
+                    osm_filter_tool,
+                )
+            )["build_time"]
+
+        # warm up: download sample data
+        build_time({})
+
+        unfiltered = statistics.median(build_time({}) for _ in range(REPETITIONS))
+        filtered = statistics.median(build_time(filters) for _ in range(REPETITIONS))
+
+        record_property("build_time_unfiltered", unfiltered)
+        record_property(f"build_time_filtered_with_{osm_filter_tool}", filtered)
+
+        assert filtered < unfiltered
+
+    @pytest.mark.skipif(
+        shutil.which("osmium") is None, reason="osmium-tool is not installed"
+    )
+    @pytest.mark.parametrize(
+        ["filters"],
+        [
+            ({"clip": HELSINKI_CITY_CENTRE},),
+            ({"routable_osm_only": True},),
+            ({"clip": HELSINKI_CITY_CENTRE, "routable_osm_only": True},),
+        ],
+    )
+    def test_osmium_filters_faster_than_osmlib(self, filters, record_property):
+        def build_time(osm_filter_tool):
+            return json.loads(
+                run_in_fresh_interpreter(
+                    BUILD_FILTERED_TRANSPORT_NETWORK,
+                    json.dumps(filters),
+                    "--osm-filter-tool",
+                    osm_filter_tool,
+                )
+            )["build_time"]
+
+        # warm up: download sample data
+        build_time("osmium")
+
+        osmium = statistics.median(build_time("osmium") for _ in range(REPETITIONS))
+        osmlib = statistics.median(build_time("osmlib") for _ in range(REPETITIONS))
+
+        record_property("build_time_filtered_with_osmium", osmium)
+        record_property("build_time_filtered_with_osmlib", osmlib)
+
+        assert osmium <= osmlib * (1.0 + TOLERANCE)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+
+import json
+import pathlib
+import statistics
+
+import pytest
+
+from ..fresh_interpreter import run_in_fresh_interpreter
+
+REPETITIONS = 3
+TOLERANCE = 0.1  # allow 10% of noise
+
+# Peak memory use of the workloads, in bytes, measured on the reference
+# machine. Benchmarks fail if a workload has no baseline, or if it uses more
+# memory than its baseline (plus `TOLERANCE`). To record new baselines, e.g.,
+# after a deliberate change, or to lock in an improvement, run the benchmarks
+# on the reference machine with `--update-memory-baseline`, review the
+# changes, and commit the file.
+BASELINE = pathlib.Path(__file__).absolute().parent / "memory_baseline.json"
+
+# Start a fresh JVM, load the (cached) transport network, run one workload,
+# and report the peak resident set size of the process (Python and JVM), and
+# the peak size of the JVM’s heap
+WORKLOAD = """
+import datetime
+import json
+import resource
+import sys
+
+import geopandas
+import r5py
+import r5py.sampledata.helsinki
+
+workload = sys.argv[1]
+
+transport_network = r5py.TransportNetwork(
+    r5py.sampledata.helsinki.osm_pbf,
+    [r5py.sampledata.helsinki.gtfs],
+)
+origins = geopandas.read_file(r5py.sampledata.helsinki.population_grid)
+origins.geometry = origins.geometry.to_crs("EPSG:3067").centroid.to_crs("EPSG:4326")
+
+departure = datetime.datetime(2022, 2, 22, 8, 30)
+transport_modes = [r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK]
+
+if workload == "travel_time_matrix":
+    r5py.TravelTimeMatrix(
+        transport_network,
+        origins=origins.head(20),
+        destinations=origins,
+        departure=departure,
+        transport_modes=transport_modes,
+    )
+elif workload == "detailed_itineraries":
+    r5py.DetailedItineraries(
+        transport_network,
+        origins=origins.head(5),
+        destinations=origins.tail(5),
+        departure=departure,
+        transport_modes=transport_modes,
+    )
+elif workload == "isochrones":
+    r5py.Isochrones(
+        transport_network,
+        origins=origins.head(1),
+        departure=departure,
+        transport_modes=transport_modes,
+    )
+
+import java.lang.management
+
+peak_jvm_heap = sum(
+    memory_pool.getPeakUsage().getUsed()
+    for memory_pool in java.lang.management.ManagementFactory.getMemoryPoolMXBeans()
+    if memory_pool.getType() == java.lang.management.MemoryType.HEAP
+)
+
+print(
+    json.dumps(
+        {
+            # (Linux reports `ru_maxrss` in KiB)
+            "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+            "peak_jvm_heap": int(peak_jvm_heap),
+        }
+    )
+)
+"""
+
+# `transport_network` only loads the network, the other workloads’ peaks
+# include it
+WORKLOADS = [
+    "transport_network",
+    "travel_time_matrix",
+    "detailed_itineraries",
+    "isochrones",
+]
+
+
+def _peak_memory(workload):
+    return json.loads(run_in_fresh_interpreter(WORKLOAD, workload))
+
+
+@pytest.fixture(scope="module")
+def update_memory_baseline(request):
+    """Whether to record new memory baselines (`--update-memory-baseline`)."""
+    yield request.config.getoption("--update-memory-baseline")
+
+
+@pytest.fixture(scope="module")
+def memory_baseline(update_memory_baseline):
+    try:
+        memory_baseline = json.loads(BASELINE.read_text())
+    except FileNotFoundError:
+        memory_baseline = {}
+    yield memory_baseline
+    if update_memory_baseline:
+        BASELINE.write_text(
+            json.dumps(memory_baseline, indent=4, sort_keys=True) + "\n"
+        )
+
+
+@pytest.mark.benchmark
+class TestMemoryFootprint:
+    @pytest.fixture(scope="class", autouse=True)
+    def build_transport_network(self):
+        # warm up: download sample data, build and cache the transport network
+        _peak_memory("transport_network")
+
+    @pytest.mark.parametrize("workload", WORKLOADS)
+    def test_peak_memory(
+        self, workload, memory_baseline, update_memory_baseline, record_property
+    ):
+        measurements = [_peak_memory(workload) for _ in range(REPETITIONS)]
+        peak_memory = {
+            metric: statistics.median(
+                measurement[metric] for measurement in measurements
+            )
+            for metric in ("peak_rss", "peak_jvm_heap")
+        }
+
+        for metric, value in peak_memory.items():
+            record_property(f"{workload}_{metric}", value)
+
+        if update_memory_baseline:
+            memory_baseline[workload] = peak_memory
+            return
+
+        assert workload in memory_baseline, (
+            f"No memory baseline for `{workload}`, "
+            "record one with `--update-memory-baseline`"
+        )
+        for metric, value in peak_memory.items():
+            baseline = memory_baseline[workload][metric]
+            assert value <= baseline * (1.0 + TOLERANCE), (
+                f"Peak memory use of `{workload}` ({metric}) grew from "
+                f"{baseline:,.0f} to {value:,.0f} bytes"
+            )
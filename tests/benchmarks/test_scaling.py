@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+
+import json
+
+import pytest
+
+from ..fresh_interpreter import run_in_fresh_interpreter
+from ..synthetic_data import SyntheticCity
+
+TOLERANCE = 0.1  # allow 10% of noise
+
+# Sizes of the synthetic cities: number of streets in each direction (the
+# street network has `streets²` nodes), and number of bus routes
+SIZES = [
+    (100, 10),
+    (300, 30),
+    (1000, 100),
+]
+
+NUMBER_OF_ORIGINS = 10
+NUMBER_OF_DESTINATIONS = 1000
+NUMBER_OF_OD_PAIRS = 10
+
+# Start a fresh JVM, build a transport network from scratch (remove cached
+# transport networks first), compute a travel time matrix and detailed
+# itineraries, report the time each step took
+WORKLOADS = f"""
+import datetime
+import json
+import sys
+import time
+
+import geopandas
+import r5py
+from r5py.util import Config
+
+osm_pbf, gtfs, origins, destinations = sys.argv[1:]
+origins = geopandas.read_file(origins)
+destinations = geopandas.read_file(destinations)
+
+for cached_file in Config().CACHE_DIR.glob("*.transport_network"):
+    cached_file.unlink()
+
+departure = datetime.datetime(2022, 2, 22, 8, 30)
+transport_modes = [r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK]
+
+timings = {{}}
+
+start = time.perf_counter()
+transport_network = r5py.TransportNetwork(osm_pbf, [gtfs])
+timings["transport_network"] = time.perf_counter() - start
+
+start = time.perf_counter()
+r5py.TravelTimeMatrix(
+    transport_network,
+    origins=origins,
+    destinations=destinations,
+    departure=departure,
+    transport_modes=transport_modes,
+)
+timings["travel_time_matrix"] = time.perf_counter() - start
+
+start = time.perf_counter()
+r5py.DetailedItineraries(
+    transport_network,
+    origins=origins.head({NUMBER_OF_OD_PAIRS:d}),
+    destinations=destinations.head({NUMBER_OF_OD_PAIRS:d}),
+    departure=departure,
+    transport_modes=transport_modes,
+)
+timings["detailed_itineraries"] = time.perf_counter() - start
+
+print(json.dumps(timings))
+"""
+
+
+@pytest.mark.benchmark
+class TestScaling:
+    @pytest.fixture(scope="class")
+    def timings(self, tmp_path_factory):
+        data_directory = tmp_path_factory.mktemp("synthetic_cities")
+        timings = {}
+        for streets, routes in SIZES:
+            synthetic_city = SyntheticCity(
+                data_directory, streets=streets, routes=routes
+            )
+
+            origins = data_directory / f"origins-{streets:d}.geojson"
+            synthetic_city.points(NUMBER_OF_ORIGINS, seed=1).to_file(origins)
+            destinations = data_directory / f"destinations-{streets:d}.geojson"
+            synthetic_city.points(NUMBER_OF_DESTINATIONS, seed=2).to_file(destinations)
+
+            timings[streets] = json.loads(
+                run_in_fresh_interpreter(
+                    WORKLOADS,
+                    f"{synthetic_city.osm_pbf}",
+                    f"{synthetic_city.gtfs}",
+                    f"{origins}",
+                    f"{destinations}",
+                )
+            )
+        yield timings
+
+    @pytest.mark.parametrize(
+        "workload",
+        ["transport_network", "travel_time_matrix", "detailed_itineraries"],
+    )
+    def test_record_timings(self, timings, workload, record_property):
+        for streets, size_timings in timings.items():
+            record_property(f"{workload}_{streets:d}_streets", size_timings[workload])
+
+    def test_transport_network_scales_linearly(self, timings):
+        # the build time per street node should not grow with the size of
+        # the network
+        (smallest, _), *_, (largest, _) = SIZES
+        time_per_node = {
+            streets: timings[streets]["transport_network"] / streets**2
+            for streets in (smallest, largest)
+        }
+        assert time_per_node[largest] <= time_per_node[smallest] * (1.0 + TOLERANCE)
@@ -11,3 +11,16 @@
 # transport network) there and import the fixtures into conftest_d/__init__.py.
 
 from .conftest_d import *  # noqa: F401,F403
+
+
+def pytest_addoption(parser):
+    """Add r5py’s own command line options to pytest."""
+    parser.addoption(
+        "--update-memory-baseline",
+        action="store_true",
+        default=False,
+        help=(
+            "record the peak memory use of the benchmark workloads as the new "
+            "baseline (tests/benchmarks/memory_baseline.json)"
+        ),
+    )
@@ -24,6 +24,11 @@ from .file_digest import (
 
 from .garbage_collection import java_garbage_collection
 
+from .gtfs import (
+    synthetic_gtfs_clip,
+    synthetic_gtfs_file_path,
+)
+
 from .origins import (
     multiple_origins,
     origin_point,
@@ -78,11 +83,13 @@ from .transport_network import (
     elevation_model_sample_file_path,
     gtfs_file_path,
     gtfs_timezone_helsinki,
+    helsinki_city_centre_bbox,
     helsinki_osm_pbf_file_path,
     not_a_gtfs_file,
     sao_paulo_osm_pbf_file_path,
     transport_network,
     transport_network_checksum,
+    transport_network_clipped_to_city_centre,
     transport_network_files_tuple,
     transport_network_from_test_directory,
     transport_network_from_test_files,
@@ -106,6 +113,7 @@ __all__ = [
     "file_digest_test_file_as_str",
     "gtfs_file_path",
     "gtfs_timezone_helsinki",
+    "helsinki_city_centre_bbox",
     "helsinki_osm_pbf_file_path",
     "isochrones_bicycle",
     "isochrones_car",
@@ -135,8 +143,11 @@ __all__ = [
     "sample_data_set_url",
     "sao_paulo_osm_pbf_file_path",
     "snapped_population_grid_points",
+    "synthetic_gtfs_clip",
+    "synthetic_gtfs_file_path",
     "transport_network",
     "transport_network_checksum",
+    "transport_network_clipped_to_city_centre",
     "transport_network_files_tuple",
     "transport_network_from_test_directory",
     "transport_network_from_test_files",
@@ -10,4 +10,5 @@ import pytest
 @pytest.fixture(autouse=True, scope="function")
 def java_garbage_collection():
     """Call Java GC before every function."""
-    jpype.java.lang.System.gc()
+    if jpype.isJVMStarted():
+        jpype.java.lang.System.gc()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+
+"""Fixtures related to filtering GTFS data sets."""
+
+import zipfile
+
+import pytest
+import shapely
+
+# A made-up, minimal GTFS data set: five stops along the equator, one
+# degree apart, and a station (outside of the clip polygon below) that one
+# of the stops belongs to
+SYNTHETIC_GTFS_DATA = {
+    "agency.txt": [
+        "agency_id,agency_name,agency_url,agency_timezone",
+        "A1,First Agency,https://example.com/a1,UTC",
+        "A2,Second Agency,https://example.com/a2,UTC",
+    ],
+    "stops.txt": [
+        "stop_id,stop_name,stop_lat,stop_lon,location_type,parent_station",
+        "s0,Stop 0,0.0,0.0,0,",
+        "s1,Stop 1,0.0,1.0,0,st",
+        "s2,Stop 2,0.0,2.0,0,",
+        "s3,Stop 3,0.0,3.0,0,",
+        "s4,Stop 4,0.0,4.0,0,",
+        "st,Station,0.0,3.0,1,",
+    ],
+    "routes.txt": [
+        "route_id,agency_id,route_short_name,route_long_name,route_type",
+        "r1,A1,1,Bus line,3",
+        "r2,A2,2,Tram line,0",
+    ],
+    "calendar.txt": [
+        (
+            "service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,"
+            "start_date,end_date"
+        ),
+        "weekdays,1,1,1,1,1,0,0,20240101,20241231",
+        "summer,1,1,1,1,1,1,1,20240601,20240831",
+    ],
+    "calendar_dates.txt": [
+        "service_id,date,exception_type",
+        "extra,20240101,1",
+    ],
+    "trips.txt": [
+        "route_id,service_id,trip_id,shape_id",
+        "r1,weekdays,t1,sh1",
+        "r1,weekdays,t2,",
+        "r2,summer,t3,sh3",
+        "r2,extra,t4,",
+    ],
+    "stop_times.txt": [
+        "trip_id,arrival_time,departure_time,stop_id,stop_sequence",
+        "t1,08:00:00,08:00:00,s0,1",
+        "t1,08:10:00,08:10:00,s1,2",
+        "t1,08:20:00,08:20:00,s2,3",
+        "t1,08:30:00,08:30:00,s3,4",
+        "t2,09:00:00,09:00:00,s0,1",
+        "t2,,,s1,2",
+        "t2,,,s2,3",
+        "t2,09:30:00,09:30:00,s3,4",
+        "t3,10:00:00,10:00:00,s3,1",
+        "t3,10:10:00,10:10:00,s4,2",
+        "t4,11:00:00,11:00:00,s1,1",
+        "t4,11:10:00,11:10:00,s2,2",
+    ],
+    "shapes.txt": [
+        "shape_id,shape_pt_lat,shape_pt_lon,shape_pt_sequence",
+        "sh1,0.0,0.0,1",
+        "sh1,0.0,3.0,2",
+        "sh3,0.0,3.0,1",
+        "sh3,0.0,4.0,2",
+    ],
+    "transfers.txt": [
+        "from_stop_id,to_stop_id,transfer_type",
+        "s1,s2,0",
+        "s3,s4,0",
+    ],
+    "feed_info.txt": [
+        "feed_publisher_name,feed_publisher_url,feed_lang",
+        "r5py,https://r5py.readthedocs.io/,en",
+    ],
+}
+
+# Stops s1 and s2 lie within this polygon
+SYNTHETIC_GTFS_CLIP = shapely.box(0.5, -0.5, 2.5, 0.5)
+
+
+@pytest.fixture
+def synthetic_gtfs_file_path(tmp_path):
+    """Return the path of a small, made-up GTFS data set."""
+    synthetic_gtfs_file_path = tmp_path / "synthetic_gtfs.zip"
+    with zipfile.ZipFile(synthetic_gtfs_file_path, "w") as archive:
+        for name, lines in SYNTHETIC_GTFS_DATA.items():
+            archive.writestr(name, "\n".join(lines) + "\n")
+    yield synthetic_gtfs_file_path
+
+
+@pytest.fixture
+def synthetic_gtfs_clip():
+    """Return a polygon that contains some of the stops of the synthetic GTFS."""
+    yield SYNTHETIC_GTFS_CLIP
@@ -62,6 +62,12 @@ def helsinki_osm_pbf_file_path():
     yield r5py.sampledata.helsinki.osm_pbf
 
 
+@pytest.fixture
+def helsinki_city_centre_bbox():
+    """Return a bounding box around Helsinki’s city centre."""
+    yield (24.92, 60.16, 24.96, 60.18)
+
+
 @pytest.fixture
 def sao_paulo_osm_pbf_file_path():
     """Return the path of the OSM sample data set covering São Paulo."""
@@ -143,3 +149,19 @@ def transport_network_from_test_files_without_gtfs():
     yield transport_network
 
     del transport_network
+
+
+@pytest.fixture
+def transport_network_clipped_to_city_centre(helsinki_city_centre_bbox):
+    """Return an `r5py.TransportNetwork` clipped to Helsinki’s city centre."""
+    import r5py
+    import r5py.sampledata.helsinki
+
+    transport_network = r5py.TransportNetwork(
+        r5py.sampledata.helsinki.osm_pbf,
+        [r5py.sampledata.helsinki.gtfs],
+        clip=helsinki_city_centre_bbox,
+    )
+    yield transport_network
+
+    del transport_network
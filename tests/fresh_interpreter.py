@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+
+"""Run Python code in a new interpreter process (and, thus, a new JVM)."""
+
+import subprocess
+import sys
+
+
+def run_in_fresh_interpreter(code, *arguments):
+    """
+    Run `code` in a new Python interpreter, return its (stripped) output.
+
+    Arguments
+    ---------
+    code : str
+        Python source code to run
+    *arguments : str
+        command line arguments (e.g., r5py configuration options)
+    """
+    completed_process = subprocess.run(
+        [sys.executable, "-c", code, *arguments],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return completed_process.stdout.strip()
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+
+
+"""Generate synthetic street networks, GTFS feeds, and origins/destinations."""
+
+# The sample data sets are too small to show how r5py scales, and large real
+# data sets have to be downloaded. `SyntheticCity` writes a grid of streets
+# (OpenStreetMap PBF), bus lines running along some of them (GTFS), and
+# random points within the grid, of any size, without network access.
+
+
+import datetime
+import math
+import pathlib
+import zipfile
+
+import geopandas
+import numpy
+import pandas
+import shapely
+
+__all__ = ["SyntheticCity"]
+
+
+# approximately, on a spherical earth
+METRES_PER_DEGREE = 111_320.0
+
+
+class SyntheticCity:
+    """A grid of streets, with bus lines running along some of the streets."""
+
+    def __init__(
+        self,
+        directory,
+        streets=100,
+        street_spacing=100.0,
+        routes=10,
+        stops_per_route=20,
+        headway=datetime.timedelta(minutes=10),  # noqa: B008
+        speed=25.0,
+        service_start=datetime.timedelta(hours=6),  # noqa: B008
+        service_end=datetime.timedelta(hours=22),  # noqa: B008
+        date=datetime.date(2022, 2, 22),  # noqa: B008
+        centre=shapely.Point(25.0, 60.0),  # noqa: B008
+    ):
+        """
+        Create a grid of streets, with bus lines running along some of them.
+
+        The street network consists of `streets` east-west and `streets`
+        north-south streets that cross each other every `street_spacing`
+        metres, i.e., `streets²` nodes and `2 × streets` ways. Half the bus
+        routes run east-west, the other half north-south, along streets evenly
+        spread over the grid, and stop at `stops_per_route` intersections;
+        buses depart from both ends every `headway`, between `service_start`
+        and `service_end`, every day of the week around `date`.
+
+        The OpenStreetMap extract and the GTFS feed are written to
+        `directory` (once: if the files exist, they are reused).
+
+        Arguments
+        ---------
+        directory : pathlib.Path | str
+            Where to save the data sets
+        streets : int
+            Number of streets in each direction
+        street_spacing : float
+            Distance between two parallel streets, in metres
+        routes : int
+            Number of bus routes
+        stops_per_route : int
+            Number of stops of each route (at most `streets`)
+        headway : datetime.timedelta
+            Time between two departures of a route, in each direction
+        speed : float
+            Travel speed of buses, in km/h
+        service_start : datetime.timedelta
+            First departure of each route, after midnight
+        service_end : datetime.timedelta
+            No departures after this time
+        date : datetime.date
+            Service runs in the week before and after this date
+        centre : shapely.Point
+            Centre of the grid (in `EPSG:4326`)
+        """
+        if streets < 2:
+            raise ValueError("`streets` must be at least 2")
+        if not 2 <= stops_per_route <= streets:
+            raise ValueError("`stops_per_route` must be between 2 and `streets`")
+        if headway <= datetime.timedelta(0):
+            raise ValueError("`headway` must be positive")
+
+        self.streets = streets
+        self.street_spacing = street_spacing
+        self.routes = routes
+        self.stops_per_route = stops_per_route
+        self.headway = headway
+        self.speed = speed
+        self.service_start = service_start
+        self.service_end = service_end
+        self.date = date
+        self.centre = centre
+
+        name = (
+            f"synthetic-city-{streets:d}x{street_spacing:g}m-{routes:d}routes-"
+            f"{stops_per_route:d}stops-{headway.total_seconds():g}s"
+        )
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        self.osm_pbf = directory / f"{name}.osm.pbf"
+        if not self.osm_pbf.exists():
+            self._write_osm_pbf(self.osm_pbf)
+
+        self.gtfs = directory / f"{name}.gtfs.zip"
+        if not self.gtfs.exists():
+            self._write_gtfs(self.gtfs)
+
+    @property
+    def extent(self):
+        """Length of the streets, in metres."""
+        return (self.streets - 1) * self.street_spacing
+
+    def _to_lon_lat(self, x, y):
+        """Convert metres from the grid’s south-west corner to longitude/latitude."""
+        x = numpy.asarray(x, dtype=float) - self.extent / 2.0
+        y = numpy.asarray(y, dtype=float) - self.extent / 2.0
+        lat = self.centre.y + y / METRES_PER_DEGREE
+        lon = self.centre.x + x / (
+            METRES_PER_DEGREE * math.cos(math.radians(self.centre.y))
+        )
+        return lon, lat
+
+    def _node_id(self, row, column):
+        return row * self.streets + column + 1
+
+    def _write_osm_pbf(self, path):
+        from r5py.util.jvm import start_jvm
+
+        start_jvm()
+
+        import com.conveyal.osmlib
+        import java.io
+        import jpype
+
+        streets = numpy.arange(self.streets)
+        lon, lat = self._to_lon_lat(
+            streets * self.street_spacing,
+            streets * self.street_spacing,
+        )
+
+        temporary_path = path.with_name(f"{path.name}.part")
+        output_stream = java.io.BufferedOutputStream(
+            java.io.FileOutputStream(f"{temporary_path}")
+        )
+        try:
+            sink = com.conveyal.osmlib.PBFOutput(output_stream)
+            sink.writeBegin()
+
+            for row in streets:
+                for column in streets:
+                    sink.writeNode(
+                        int(self._node_id(row, column)),
+                        com.conveyal.osmlib.Node(lat[row], lon[column]),
+                    )
+
+            # east-west streets first, then north-south streets
+            for way_id, node_ids in enumerate(
+                [self._node_id(row, streets) for row in streets]
+                + [self._node_id(streets, column) for column in streets],
+                start=1,
+            ):
+                way = com.conveyal.osmlib.Way()
+                way.nodes = jpype.JArray(jpype.JLong)(node_ids.tolist())
+                way.addTag("highway", "residential")
+                way.addTag("name", f"Street {way_id:d}")
+                sink.writeWay(way_id, way)
+
+            sink.writeEnd()
+        finally:
+            output_stream.close()
+        temporary_path.replace(path)
+
+    def _stops(self):
+        """Generate the stops of all routes, in the order they are served."""
+        # the streets the routes run along, evenly spread, avoiding the edges
+        # of the grid; routes alternate between east-west and north-south
+        east_west = numpy.arange(0, self.routes, 2)
+        north_south = numpy.arange(1, self.routes, 2)
+        route_streets = numpy.empty(self.routes, dtype=int)
+        for route_ids in (east_west, north_south):
+            route_streets[route_ids] = numpy.linspace(
+                0, self.streets - 1, len(route_ids) + 2
+            )[1:-1].round()
+
+        # the crossing streets the stops are at
+        stop_streets = numpy.linspace(0, self.streets - 1, self.stops_per_route)
+        stop_streets = numpy.unique(stop_streets.round()).astype(int)
+
+        route_id = numpy.repeat(numpy.arange(self.routes), len(stop_streets))
+        stop_sequence = numpy.tile(numpy.arange(len(stop_streets)), self.routes)
+        along = numpy.tile(stop_streets, self.routes) * self.street_spacing
+        across = numpy.repeat(route_streets, len(stop_streets)) * self.street_spacing
+        is_east_west = route_id % 2 == 0
+
+        lon, lat = self._to_lon_lat(
+            numpy.where(is_east_west, along, across),
+            numpy.where(is_east_west, across, along),
+        )
+
+        return pandas.DataFrame(
+            {
+                "route_id": route_id,
+                "stop_sequence": stop_sequence,
+                "stop_id": [
+                    f"r{route:d}s{stop:d}"
+                    for route, stop in zip(route_id, stop_sequence)
+                ],
+                "stop_lat": lat,
+                "stop_lon": lon,
+                "distance": along,
+            }
+        )
+
+    def _write_gtfs(self, path):
+        stops = self._stops()
+
+        departures = numpy.arange(
+            self.service_start.total_seconds(),
+            self.service_end.total_seconds(),
+            self.headway.total_seconds(),
+        ).astype(int)
+        seconds_per_metre = 3.6 / self.speed
+
+        trips = []
+        stop_times = []
+        for (route_id, direction_id), route_stops in pandas.concat(
+            [stops.assign(direction_id=0), stops.assign(direction_id=1)]
+        ).groupby(["route_id", "direction_id"]):
+            route_stops = route_stops.sort_values(
+                "stop_sequence", ascending=(direction_id == 0)
+            )
+            offsets = (
+                (
+                    (route_stops["distance"] - route_stops["distance"].iloc[0]).abs()
+                    * seconds_per_metre
+                )
+                .round()
+                .astype(int)
+                .to_numpy()
+            )
+            trip_ids = [
+                f"r{route_id:d}d{direction_id:d}t{trip:d}"
+                for trip in range(len(departures))
+            ]
+            trips.append(
+                pandas.DataFrame(
+                    {
+                        "route_id": f"r{route_id:d}",
+                        "service_id": "daily",
+                        "trip_id": trip_ids,
+                        "direction_id": direction_id,
+                    }
+                )
+            )
+            times = (departures[:, numpy.newaxis] + offsets).ravel()
+            stop_times.append(
+                pandas.DataFrame(
+                    {
+                        "trip_id": numpy.repeat(trip_ids, len(offsets)),
+                        "arrival_time": _format_gtfs_times(times),
+                        "departure_time": _format_gtfs_times(times),
+                        "stop_id": numpy.tile(
+                            route_stops["stop_id"].to_numpy(), len(departures)
+                        ),
+                        "stop_sequence": numpy.tile(
+                            numpy.arange(1, len(offsets) + 1), len(departures)
+                        ),
+                    }
+                )
+            )
+
+        feed = {
+            "agency.txt": pandas.DataFrame(
+                {
+                    "agency_id": ["synthetic"],
+                    "agency_name": ["Synthetic City Transport"],
+                    "agency_url": ["https://r5py.readthedocs.io/"],
+                    "agency_timezone": ["UTC"],
+                }
+            ),
+            "stops.txt": stops[["stop_id", "stop_lat", "stop_lon"]].assign(
+                stop_name=stops["stop_id"]
+            ),
+            "routes.txt": pandas.DataFrame(
+                {
+                    "route_id": [f"r{route:d}" for route in range(self.routes)],
+                    "agency_id": "synthetic",
+                    "route_short_name": [f"{route:d}" for route in range(self.routes)],
+                    "route_type": 3,  # bus
+                }
+            ),
+            "calendar.txt": pandas.DataFrame(
+                {
+                    "service_id": ["daily"],
+                    **{
+                        weekday: [1]
+                        for weekday in (
+                            "monday",
+                            "tuesday",
+                            "wednesday",
+                            "thursday",
+                            "friday",
+                            "saturday",
+                            "sunday",
+                        )
+                    },
+                    "start_date": [f"{self.date - datetime.timedelta(days=7):%Y%m%d}"],
+                    "end_date": [f"{self.date + datetime.timedelta(days=7):%Y%m%d}"],
+                }
+            ),
+            "trips.txt": pandas.concat(trips, ignore_index=True),
+            "stop_times.txt": pandas.concat(stop_times, ignore_index=True),
+        }
+
+        temporary_path = path.with_name(f"{path.name}.part")
+        with zipfile.ZipFile(
+            temporary_path, "w", compression=zipfile.ZIP_DEFLATED
+        ) as archive:
+            for name, table in feed.items():
+                archive.writestr(name, table.to_csv(index=False))
+        temporary_path.replace(path)
+
+    def points(self, number_of_points, seed=0):
+        """
+        Random points within the street grid, e.g., as origins or destinations.
+
+        Arguments
+        ---------
+        number_of_points : int
+            How many points to generate
+        seed : int
+            Seed of the random number generator, use different seeds for
+            different sets of points
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            Points (in `EPSG:4326`), with an `id` column
+        """
+        random_number_generator = numpy.random.default_rng(seed)
+        x, y = random_number_generator.uniform(0.0, self.extent, (2, number_of_points))
+        lon, lat = self._to_lon_lat(x, y)
+        return geopandas.GeoDataFrame(
+            {"id": numpy.arange(number_of_points)},
+            geometry=geopandas.points_from_xy(lon, lat),
+            crs="EPSG:4326",
+        )
+
+
+def _format_gtfs_times(seconds):
+    """Format seconds after midnight as GTFS times (`HH:MM:SS`, hours may exceed 23)."""
+    hours, seconds = numpy.divmod(seconds, 3600)
+    minutes, seconds = numpy.divmod(seconds, 60)
+    return [
+        f"{hour:02d}:{minute:02d}:{second:02d}"
+        for hour, minute, second in zip(hours, minutes, seconds)
+    ]
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+
+import atexit
+import os
+import sys
+
+import jpype
+import pytest
+
+import r5py.util.class_data_sharing
+from r5py.util.class_data_sharing import class_data_sharing_options
+
+
+@pytest.fixture
+def fake_r5_jar(tmp_path):
+    """Return the path of a file that looks like an R5 jar."""
+    fake_r5_jar = tmp_path / "r5-all.jar"
+    fake_r5_jar.write_bytes(b"not really a jar")
+    yield fake_r5_jar
+
+
+@pytest.fixture
+def class_data_sharing_enabled():
+    """Enable the `--class-data-sharing` configuration option."""
+    sys.argv.append("--class-data-sharing")
+    yield
+    sys.argv = sys.argv[:-1]
+
+
+@pytest.fixture
+def exit_handlers(monkeypatch):
+    """Collect the functions registered with `atexit`, instead of running them."""
+    exit_handlers = []
+    monkeypatch.setattr(
+        atexit,
+        "register",
+        lambda function, *args: exit_handlers.append((function, args)),
+    )
+    yield exit_handlers
+
+
+class TestClassDataSharing:
+    def test_disabled_by_default(self, fake_r5_jar, exit_handlers):
+        options = class_data_sharing_options(fake_r5_jar, jpype.getDefaultJVMPath())
+        assert options == []
+        assert exit_handlers == []
+
+    def test_create_archive(
+        self, fake_r5_jar, class_data_sharing_enabled, exit_handlers
+    ):
+        options = class_data_sharing_options(fake_r5_jar, jpype.getDefaultJVMPath())
+        assert any(option.startswith("-XX:ArchiveClassesAtExit=") for option in options)
+        assert not any(
+            option.startswith("-XX:SharedArchiveFile=") for option in options
+        )
+
+        (function, (temporary_archive, archive)), *_ = exit_handlers
+        assert function == r5py.util.class_data_sharing._move_archive_into_place
+        assert archive.parent == r5py.util.config.Config().CACHE_DIR
+        assert temporary_archive.parent == archive.parent
+        assert temporary_archive != archive
+
+    def test_use_existing_archive(
+        self, fake_r5_jar, class_data_sharing_enabled, exit_handlers
+    ):
+        archive = r5py.util.class_data_sharing._archive_path(
+            fake_r5_jar, jpype.getDefaultJVMPath()
+        )
+        archive.write_bytes(b"not really an archive")
+
+        options = class_data_sharing_options(fake_r5_jar, jpype.getDefaultJVMPath())
+        assert f"-XX:SharedArchiveFile={archive}" in options
+        assert "-Xshare:auto" in options
+        assert exit_handlers == []
+
+        archive.unlink()
+
+    def test_archive_path_changes_with_r5_jar(self, fake_r5_jar):
+        archive = r5py.util.class_data_sharing._archive_path(
+            fake_r5_jar, jpype.getDefaultJVMPath()
+        )
+        fake_r5_jar.write_bytes(b"a different, still not a jar")
+        assert archive != r5py.util.class_data_sharing._archive_path(
+            fake_r5_jar, jpype.getDefaultJVMPath()
+        )
+
+    def test_archive_path_follows_r5_jar_content(self, fake_r5_jar, tmp_path):
+        archive = r5py.util.class_data_sharing._archive_path(
+            fake_r5_jar, jpype.getDefaultJVMPath()
+        )
+
+        # an identical copy (e.g., downloaded again) uses the same archive
+        copied_r5_jar = tmp_path / "copy" / fake_r5_jar.name
+        copied_r5_jar.parent.mkdir()
+        copied_r5_jar.write_bytes(fake_r5_jar.read_bytes())
+        assert archive == r5py.util.class_data_sharing._archive_path(
+            copied_r5_jar, jpype.getDefaultJVMPath()
+        )
+
+        # a jar swapped in place, with the same size and modification time,
+        # does not
+        stat = fake_r5_jar.stat()
+        fake_r5_jar.write_bytes(b"not really a JAR")
+        os.utime(fake_r5_jar, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert fake_r5_jar.stat().st_size == stat.st_size
+        assert archive != r5py.util.class_data_sharing._archive_path(
+            fake_r5_jar, jpype.getDefaultJVMPath()
+        )
+
+    def test_no_archive_for_class_directories(
+        self, tmp_path, class_data_sharing_enabled, exit_handlers
+    ):
+        options = class_data_sharing_options(tmp_path, jpype.getDefaultJVMPath())
+        assert options == []
+        assert exit_handlers == []
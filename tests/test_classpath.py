@@ -11,6 +11,7 @@ import sys
 from r5py.util.classpath import find_r5_classpath
 from r5py.util.config import Config
 from r5py.util.exceptions import UnexpectedClasspathSchema
+from r5py.util.jvm import start_jvm
 
 
 class TestClassPath:
@@ -115,9 +116,60 @@ class TestClassPath:
         sys.platform == "win32", reason="No signal chaining library for Windows"
     )
     def test_signal_chaining(self):
+        start_jvm()
         if sys.platform == "linux":
             assert "LD_PRELOAD" in os.environ
             assert pathlib.Path(os.environ["LD_PRELOAD"]).exists()
         elif sys.platform == "darwin":
             assert "DYLD_INSERT_LIBRARIES" in os.environ
             assert pathlib.Path(os.environ["DYLD_INSERT_LIBRARIES"]).exists()
+
+    def test_verified_r5_jar_is_not_hashed_again(self, tmp_path, monkeypatch):
+        import r5py.util.classpath
+
+        fake_jar = tmp_path / "r5-all.jar"
+        fake_jar.write_bytes(b"not really a jar")
+        monkeypatch.setattr(
+            r5py.util.classpath,
+            "R5_JAR_SHA256",
+            hashlib.sha256(fake_jar.read_bytes()).hexdigest(),
+        )
+
+        assert r5py.util.classpath._is_verified_r5_jar(fake_jar)
+        assert (tmp_path / "r5-all.jar.verified").exists()
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("R5 jar should not be hashed again")
+
+        monkeypatch.setattr(r5py.util.classpath, "FileDigest", _fail)
+        assert r5py.util.classpath._is_verified_r5_jar(fake_jar)
+
+    def test_changed_r5_jar_is_hashed_again(self, tmp_path, monkeypatch):
+        import r5py.util.classpath
+
+        fake_jar = tmp_path / "r5-all.jar"
+        fake_jar.write_bytes(b"not really a jar")
+        monkeypatch.setattr(
+            r5py.util.classpath,
+            "R5_JAR_SHA256",
+            hashlib.sha256(fake_jar.read_bytes()).hexdigest(),
+        )
+        assert r5py.util.classpath._is_verified_r5_jar(fake_jar)
+
+        fake_jar.write_bytes(b"a different, still not a jar")
+        assert not r5py.util.classpath._is_verified_r5_jar(fake_jar)
+
+    def test_r5_jar_digest_is_recorded(self, tmp_path, monkeypatch):
+        import r5py.util.classpath
+
+        fake_jar = tmp_path / "r5-all.jar"
+        fake_jar.write_bytes(b"not really a jar")
+        expected_digest = hashlib.sha256(fake_jar.read_bytes()).hexdigest()
+
+        assert r5py.util.classpath.r5_jar_digest(fake_jar) == expected_digest
+
+        def _fail(*args, **kwargs):
+            raise AssertionError("R5 jar should not be hashed again")
+
+        monkeypatch.setattr(r5py.util.classpath, "FileDigest", _fail)
+        assert r5py.util.classpath.r5_jar_digest(fake_jar) == expected_digest
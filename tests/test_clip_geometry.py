@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+
+import geopandas
+import pytest
+import shapely
+
+import r5py.util
+from r5py.util import clip_geometry
+
+
+class TestClipGeometry:
+    def test_polygon(self):
+        polygon = shapely.box(24.9, 60.1, 25.0, 60.2)
+        assert clip_geometry(polygon).equals(polygon)
+
+    def test_bounding_box(self):
+        assert clip_geometry((24.9, 60.1, 25.0, 60.2)).equals(
+            shapely.box(24.9, 60.1, 25.0, 60.2)
+        )
+
+    def test_geoseries_is_reprojected_and_combined(self):
+        polygons = geopandas.GeoSeries(
+            [
+                shapely.box(24.9, 60.1, 24.95, 60.2),
+                shapely.box(24.95, 60.1, 25.0, 60.2),
+            ],
+            crs="EPSG:4326",
+        ).to_crs("EPSG:3067")
+        clip = clip_geometry(polygons)
+        assert clip.symmetric_difference(
+            shapely.box(24.9, 60.1, 25.0, 60.2)
+        ).area == pytest.approx(0.0, abs=1e-9)
+
+    def test_geodataframe(self):
+        polygons = geopandas.GeoDataFrame(
+            {"geometry": [shapely.box(24.9, 60.1, 25.0, 60.2)]}, crs="EPSG:4326"
+        )
+        assert clip_geometry(polygons).equals(shapely.box(24.9, 60.1, 25.0, 60.2))
+
+    def test_buffer(self):
+        polygon = shapely.box(24.9, 60.1, 25.0, 60.2)
+        buffered = clip_geometry(polygon, buffer=1000.0)
+        assert buffered.contains(polygon)
+        # 1000 metres are roughly 0.009 degrees latitude
+        assert buffered.bounds[1] == pytest.approx(60.1 - 0.009, abs=0.001)
+
+    def test_buffer_around_point(self):
+        assert clip_geometry(shapely.Point(24.94, 60.17), buffer=500.0).area > 0.0
+
+    def test_point_without_buffer(self):
+        with pytest.raises(ValueError, match="must be an area"):
+            clip_geometry(shapely.Point(24.94, 60.17))
+
+    def test_not_in_epsg4326(self):
+        with pytest.raises(r5py.util.exceptions.UnexpectedCrsError):
+            clip_geometry(shapely.box(385000, 6672000, 386000, 6673000))
+
+    def test_geoseries_without_crs(self):
+        with pytest.raises(r5py.util.exceptions.UnexpectedCrsError):
+            clip_geometry(geopandas.GeoSeries([shapely.box(24.9, 60.1, 25.0, 60.2)]))
+
+    @pytest.mark.parametrize(["clip"], [("Helsinki",), ((24.9, 60.1),), (None,)])
+    def test_invalid_clip(self, clip):
+        with pytest.raises(ValueError):
+            clip_geometry(clip)
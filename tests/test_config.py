@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 
+import copy
 import datetime
 import importlib
 import pathlib
@@ -31,6 +32,17 @@ class TestConfig:
         )
         sys.argv = sys.argv[:-2]
 
+    def test_adopt_arguments(self, monkeypatch, tmp_path):
+        config = r5py.util.config.Config()
+        monkeypatch.setattr(r5py.util.config.Config, "_adopted_arguments", None)
+
+        arguments = copy.copy(config.arguments)
+        arguments.temporary_directory = tmp_path
+        config.adopt_arguments(arguments)
+
+        assert config.arguments.temporary_directory == tmp_path
+        assert r5py.util.config.Config().arguments == arguments
+
     def test_cache_clearing(self):
         config = r5py.util.config.Config()
 
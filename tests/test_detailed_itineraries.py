@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
+import copy
 import datetime
+import sys
 
 import geopandas
 import geopandas.testing
@@ -175,6 +177,457 @@ class TestDetailedItineraries:
         assert isinstance(detailed_itineraries, r5py.DetailedItineraries)
         assert isinstance(detailed_itineraries, geopandas.GeoDataFrame)
 
+    def test_instrumentation(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        departure_datetime,
+    ):
+        detailed_itineraries = r5py.DetailedItineraries(
+            transport_network,
+            origins=population_grid_points_first_three,
+            departure=departure_datetime,
+            transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+            snap_to_network=True,
+            instrumentation=True,
+        )
+        summary = detailed_itineraries.instrumentation.summary
+        for phase in (
+            "validate_origins_destinations",
+            "snap_to_network",
+            "access_search",
+            "egress_search",
+            "transit_search",
+            "assemble_itineraries",
+            "tabulate_trips",
+            "concatenate_results",
+        ):
+            assert phase in summary.index
+        assert summary.loc["route_od_pair", "count"] == len(
+            population_grid_points_first_three
+        ) * len(population_grid_points_first_three)
+
+    def test_street_searches_run_once_per_origin_and_destination(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        population_grid_points_four,
+        departure_datetime,
+    ):
+        detailed_itineraries = r5py.DetailedItineraries(
+            transport_network,
+            origins=population_grid_points_first_three,
+            destinations=population_grid_points_four,
+            departure=departure_datetime,
+            transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+            instrumentation=True,
+        )
+        summary = detailed_itineraries.instrumentation.summary
+        assert summary.loc["route_od_pair", "count"] == 3 * 4
+        assert summary.loc["access_search", "count"] == 3
+        assert summary.loc["egress_search", "count"] == 4
+
+    def test_destinations_of_one_origin_are_split(
+        self,
+        transport_network,
+        origin_point,
+        population_grid_points_four,
+        departure_datetime,
+        monkeypatch,
+    ):
+        monkeypatch.setattr(r5py.DetailedItineraries, "NUM_THREADS", 2)
+
+        tasks = []
+        route_from_origin = r5py.r5.ItineraryRouter.route_from_origin
+
+        def record_task(router, from_id, to_ids):
+            tasks.append((from_id, list(to_ids)))
+            return route_from_origin(router, from_id, to_ids)
+
+        monkeypatch.setattr(r5py.r5.ItineraryRouter, "route_from_origin", record_task)
+
+        detailed_itineraries = r5py.DetailedItineraries(
+            transport_network,
+            origins=origin_point,
+            destinations=population_grid_points_four,
+            departure=departure_datetime,
+            transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+            force_all_to_all=True,
+            instrumentation=True,
+        )
+
+        # one origin, four destinations, two threads: one task per destination
+        assert len(tasks) == 4
+        assert sorted(to_id for _, to_ids in tasks for to_id in to_ids) == sorted(
+            population_grid_points_four.id
+        )
+        # the origin’s access search is still shared
+        summary = detailed_itineraries.instrumentation.summary
+        assert summary.loc["access_search", "count"] == 1
+        assert summary.loc["route_od_pair", "count"] == 4
+
+    def test_egress_searches_of_one_to_one_routing_are_bounded(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        population_grid_points_four,
+        departure_datetime,
+        monkeypatch,
+    ):
+        monkeypatch.setattr(r5py.r5.ItineraryRouter, "MAX_CACHED_DESTINATIONS", 1)
+
+        routers = []
+        router_init = r5py.r5.ItineraryRouter.__init__
+
+        def record_router(router, *args, **kwargs):
+            router_init(router, *args, **kwargs)
+            routers.append(router)
+
+        monkeypatch.setattr(r5py.r5.ItineraryRouter, "__init__", record_router)
+
+        r5py.DetailedItineraries(
+            transport_network,
+            origins=population_grid_points_first_three,
+            destinations=population_grid_points_four[:3],
+            departure=departure_datetime,
+            transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+        )
+
+        (router,) = routers
+        assert router._egress_paths.max_size == 1
+        assert len(router._egress_paths) == 1
+
+    def test_transfer_legs_are_shared(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        departure_datetime,
+        monkeypatch,
+    ):
+        # `transport_network` is shared between tests: start with an empty
+        # cache, so that earlier tests’ transfer legs are not reused
+        transfer_legs = r5py.r5.transfer_leg_cache.TransferLegCache()
+        monkeypatch.setattr(transport_network, "transfer_legs", transfer_legs)
+
+        detailed_itineraries = r5py.DetailedItineraries(
+            transport_network,
+            origins=population_grid_points_first_three,
+            departure=departure_datetime,
+            transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+            instrumentation=True,
+        )
+        summary = detailed_itineraries.instrumentation.summary
+        transfer_searches = summary.loc["transfer_search", "count"]
+
+        assert transfer_searches > 0
+        # each transfer is searched at most once per transport network
+        assert transfer_searches == len(transfer_legs)
+
+    def test_transit_search_per_origin(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        population_grid_points_four,
+        departure_datetime,
+    ):
+        detailed_itineraries = {
+            transit_search_per_origin: r5py.DetailedItineraries(
+                transport_network,
+                origins=population_grid_points_first_three,
+                destinations=population_grid_points_four,
+                departure=departure_datetime,
+                transport_modes=[r5py.TransportMode.TRANSIT],
+                transit_search_per_origin=transit_search_per_origin,
+                instrumentation=True,
+            )
+            for transit_search_per_origin in (False, True)
+        }
+
+        summary = detailed_itineraries[True].instrumentation.summary
+        assert summary.loc["transit_search", "count"] == 3
+
+        # both report the same options, with the same legs (transport modes,
+        # routes, stops, times, distances, and geometries)
+        assert len(detailed_itineraries[False]) > 0
+        geopandas.testing.assert_geodataframe_equal(
+            detailed_itineraries[False],
+            detailed_itineraries[True],
+        )
+
+    def test_detailed_itineraries_without_geometry(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        population_grid_points_four,
+        departure_datetime,
+    ):
+        detailed_itineraries = {
+            geometry: r5py.DetailedItineraries(
+                transport_network,
+                origins=population_grid_points_first_three,
+                destinations=population_grid_points_four,
+                departure=departure_datetime,
+                transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+                geometry=geometry,
+            )
+            for geometry in (True, False)
+        }
+
+        assert detailed_itineraries[True].geometry.notna().all()
+        assert detailed_itineraries[False].geometry.isna().all()
+
+        columns = ["from_id", "to_id", "option", "segment", "travel_time"]
+        pandas.testing.assert_frame_equal(
+            pandas.DataFrame(detailed_itineraries[False][columns]),
+            pandas.DataFrame(detailed_itineraries[True][columns]),
+        )
+        pandas.testing.assert_series_equal(
+            detailed_itineraries[False].distance,
+            detailed_itineraries[True].distance,
+            check_exact=False,
+        )
+
+    def test_max_options(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        population_grid_points_four,
+        departure_datetime,
+    ):
+        detailed_itineraries = {
+            max_options: r5py.DetailedItineraries(
+                transport_network,
+                origins=population_grid_points_first_three,
+                destinations=population_grid_points_four,
+                departure=departure_datetime,
+                transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+                max_options=max_options,
+            )
+            for max_options in (None, 2)
+        }
+
+        options = {
+            max_options: itineraries.groupby(["from_id", "to_id"]).option.nunique()
+            for max_options, itineraries in detailed_itineraries.items()
+        }
+        assert (options[2] <= 2).all()
+        assert (options[2] == options[None].clip(upper=2)).all()
+
+        fastest = {
+            max_options: (
+                (itineraries.travel_time + itineraries.wait_time)
+                .groupby([itineraries.from_id, itineraries.to_id, itineraries.option])
+                .sum()
+                .groupby(["from_id", "to_id"])
+                .min()
+            )
+            for max_options, itineraries in detailed_itineraries.items()
+        }
+        pandas.testing.assert_series_equal(fastest[None], fastest[2])
+
+    @pytest.mark.parametrize("chunk_size", [None, 1, 5])
+    def test_process_backend(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        population_grid_points_four,
+        departure_datetime,
+        chunk_size,
+    ):
+        detailed_itineraries = {
+            backend: r5py.DetailedItineraries(
+                transport_network,
+                origins=population_grid_points_first_three,
+                destinations=population_grid_points_four,
+                departure=departure_datetime,
+                transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+                backend=backend,
+                chunk_size=chunk_size,
+                instrumentation=True,
+            )
+            for backend in ("threads", "processes")
+        }
+
+        summary = detailed_itineraries["processes"].instrumentation.summary
+        assert summary.loc["route_od_pair", "count"] == 3 * 4
+
+        geopandas.testing.assert_geodataframe_equal(
+            detailed_itineraries["processes"],
+            detailed_itineraries["threads"],
+        )
+
+    @pytest.mark.parametrize("max_memory", ["1G", "40%"])
+    def test_process_backend_worker_max_memory(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        population_grid_points_four,
+        departure_datetime,
+        max_memory,
+        monkeypatch,
+    ):
+        import joblib.externals.loky
+
+        from r5py.r5.itinerary_router import (
+            route_in_worker_process,
+            worker_config_arguments,
+        )
+        from r5py.util.memory_footprint import _get_max_memory
+
+        # a configuration the worker can only know from this process
+        arguments = copy.copy(r5py.util.Config().arguments)
+        arguments.max_memory = max_memory
+        monkeypatch.setattr(r5py.util.Config, "_adopted_arguments", arguments)
+
+        def worker_max_memory():
+            import java.lang
+
+            return java.lang.Runtime.getRuntime().maxMemory()
+
+        # a fresh worker process, which has not started a JVM, yet
+        executor = joblib.externals.loky.get_reusable_executor(
+            max_workers=1, kill_workers=True
+        )
+        executor.submit(
+            route_in_worker_process,
+            transport_network.cache_file,
+            {
+                "departure": departure_datetime,
+                "transport_modes": [r5py.TransportMode.WALK],
+            },
+            population_grid_points_first_three,
+            population_grid_points_four,
+            pandas.DataFrame(
+                {
+                    "id_origin": population_grid_points_first_three.id[:1],
+                    "id_destination": population_grid_points_four.id[:1],
+                }
+            ),
+            config_arguments=worker_config_arguments(worker_processes=3),
+        ).result()
+
+        # this process and three workers share a relative `max_memory`
+        assert executor.submit(worker_max_memory).result() == pytest.approx(
+            _get_max_memory(max_memory, 4 * arguments.max_memory_processes),
+            rel=0.1,
+        )
+        executor.shutdown(kill_workers=True)
+
+    @pytest.mark.parametrize(
+        ["backend", "chunk_size", "expected_error_message"],
+        [
+            ("forks", None, "`backend` must be"),
+            ("processes", 0, "`chunk_size` must be"),
+        ],
+    )
+    def test_invalid_backend_arguments(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        departure_datetime,
+        backend,
+        chunk_size,
+        expected_error_message,
+    ):
+        with pytest.raises(ValueError, match=expected_error_message):
+            r5py.DetailedItineraries(
+                transport_network,
+                origins=population_grid_points_first_three,
+                departure=departure_datetime,
+                backend=backend,
+                chunk_size=chunk_size,
+            )
+
+    def test_output_file_without_pyarrow(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        population_grid_points_four,
+        departure_datetime,
+        tmp_path,
+        monkeypatch,
+    ):
+        monkeypatch.setitem(sys.modules, "pyarrow", None)  # `import` fails
+
+        def compute_itineraries(*args, **kwargs):
+            raise AssertionError("computed itineraries without `pyarrow`")
+
+        monkeypatch.setattr(r5py.DetailedItineraries, "_compute", compute_itineraries)
+
+        with pytest.raises(ImportError, match="requires `pyarrow`"):
+            r5py.DetailedItineraries(
+                transport_network,
+                origins=population_grid_points_first_three,
+                destinations=population_grid_points_four,
+                departure=departure_datetime,
+                transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+                output_file=tmp_path / "detailed_itineraries.parquet",
+            )
+
+    @pytest.mark.parametrize("backend", ["threads", "processes"])
+    def test_output_file(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        population_grid_points_four,
+        departure_datetime,
+        backend,
+        tmp_path,
+    ):
+        output_file = tmp_path / "detailed_itineraries.parquet"
+        arguments = {
+            "origins": population_grid_points_first_three,
+            "destinations": population_grid_points_four,
+            "departure": departure_datetime,
+            "transport_modes": [r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+            "backend": backend,
+        }
+
+        detailed_itineraries = r5py.DetailedItineraries(transport_network, **arguments)
+        streamed_detailed_itineraries = r5py.DetailedItineraries(
+            transport_network, output_file=output_file, **arguments
+        )
+        assert streamed_detailed_itineraries.empty
+
+        expected = detailed_itineraries.to_crs("EPSG:4326")
+        expected["transport_mode"] = expected["transport_mode"].map(
+            lambda transport_mode: transport_mode.name
+        )
+        for column in expected.columns:  # (categories are written as values)
+            if isinstance(expected[column].dtype, pandas.CategoricalDtype):
+                expected[column] = expected[column].astype(
+                    expected[column].cat.categories.dtype
+                )
+        result = geopandas.read_parquet(output_file)
+
+        assert len(result) == len(expected)
+        pandas.testing.assert_frame_equal(
+            result.drop(columns=["geometry"]).reset_index(drop=True),
+            pandas.DataFrame(expected.drop(columns=["geometry"])).reset_index(
+                drop=True
+            ),
+            check_dtype=False,
+        )
+        assert result.geometry.geom_equals_exact(
+            expected.geometry.reset_index(drop=True), tolerance=1e-9
+        ).all()
+
+    @pytest.mark.parametrize("max_options", [0, -1])
+    def test_invalid_max_options(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        departure_datetime,
+        max_options,
+    ):
+        with pytest.raises(ValueError, match="`max_options` must be"):
+            r5py.DetailedItineraries(
+                transport_network,
+                origins=population_grid_points_first_three,
+                departure=departure_datetime,
+                max_options=max_options,
+            )
+
     def test_detailed_itineraries_initialization_with_files(
         self,
         transport_network_files_tuple,
@@ -521,6 +974,20 @@ class TestDetailedItineraries:
         travel_details.wait_time = travel_details.wait_time.apply(
             lambda t: t.total_seconds()
         )
+        # (compare the values of the categorical columns)
+        for column in [
+            "transport_mode",
+            "feed",
+            "agency_id",
+            "route_id",
+            "start_stop_id",
+            "end_stop_id",
+        ]:
+            travel_details[column] = (
+                travel_details[column]
+                .astype(object)
+                .where(travel_details[column].notna(), None)
+            )
         travel_details.transport_mode = travel_details.transport_mode.apply(
             lambda t: t.value
         )
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+
+import numpy
+import pytest
+import shapely
+
+import r5py.r5
+from r5py.r5 import EdgeGeometries
+
+
+class TestEdgeGeometries:
+    @pytest.fixture
+    def edge_geometries(self, tmp_path):
+        # three edge pairs: (0, 0) → (1, 0) → (1, 1) → (2, 2), the second
+        # one with an intermediate point
+        path = tmp_path / "test.edge_geometries.npz"
+        numpy.savez(
+            path,
+            coordinates=numpy.array(
+                [
+                    (0.0, 0.0),
+                    (1.0, 0.0),
+                    (1.0, 0.0),
+                    (1.0, 0.5),
+                    (1.0, 1.0),
+                    (1.0, 1.0),
+                    (2.0, 2.0),
+                ]
+            ),
+            offsets=numpy.array([0, 2, 5, 7]),
+        )
+        yield EdgeGeometries(None, path)
+
+    def test_len(self, edge_geometries):
+        assert len(edge_geometries) == 6
+
+    @pytest.mark.parametrize(
+        ["edges", "expected"],
+        [
+            ([], True),
+            ([0, 2, 4], True),
+            ([5], True),
+            ([6], False),
+            ([0, 7], False),
+        ],
+    )
+    def test_covers(self, edge_geometries, edges, expected):
+        assert edge_geometries.covers(numpy.array(edges, dtype=int)) == expected
+
+    @pytest.mark.parametrize(
+        ["edges", "expected_geometry"],
+        [
+            ([0], shapely.LineString([(0, 0), (1, 0)])),
+            ([1], shapely.LineString([(1, 0), (0, 0)])),
+            (
+                [0, 2, 4],
+                shapely.LineString([(0, 0), (1, 0), (1, 0.5), (1, 1), (2, 2)]),
+            ),
+            (
+                [5, 3, 1],
+                shapely.LineString([(2, 2), (1, 1), (1, 0.5), (1, 0), (0, 0)]),
+            ),
+            ([], shapely.LineString()),
+        ],
+    )
+    def test_geometry(self, edge_geometries, edges, expected_geometry):
+        geometry = edge_geometries.geometry(numpy.array(edges, dtype=int))
+        assert geometry.equals_exact(expected_geometry, tolerance=0.0)
+
+    def test_export(self, transport_network):
+        edge_geometries = transport_network.edge_geometries
+        assert isinstance(edge_geometries, r5py.r5.EdgeGeometries)
+
+        edge_store = transport_network.street_layer._street_layer.edgeStore
+        assert len(edge_geometries) == edge_store.nEdges()
+
+        edge = edge_store.getCursor()
+        for edge_index in (0, 1, edge_store.nEdges() - 1):
+            edge.seek(edge_index)
+            assert edge_geometries.geometry(numpy.array([edge_index])).equals_exact(
+                shapely.from_wkt(str(edge.getGeometry().toText())),
+                tolerance=1e-7,
+            )
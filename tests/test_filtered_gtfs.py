@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+
+
+import datetime
+import zipfile
+
+import pandas
+import pytest
+
+import r5py.util
+from r5py.util.filtered_gtfs import FilteredGtfs
+
+
+def _trip_ids(path):
+    return set(_read(path, "trips.txt")["trip_id"])
+
+
+def _read(path, name):
+    with zipfile.ZipFile(path) as archive:
+        return pandas.read_csv(archive.open(name), dtype=str, keep_default_na=False)
+
+
+class TestFilteredGtfs:
+    def test_no_filter(self, synthetic_gtfs_file_path):
+        assert FilteredGtfs(synthetic_gtfs_file_path) == synthetic_gtfs_file_path
+
+    def test_filtered_gtfs_is_gtfs(self, synthetic_gtfs_file_path, synthetic_gtfs_clip):
+        filtered_gtfs = FilteredGtfs(synthetic_gtfs_file_path, clip=synthetic_gtfs_clip)
+        assert filtered_gtfs != synthetic_gtfs_file_path
+        assert r5py.util.contains_gtfs_data(filtered_gtfs)
+
+        with zipfile.ZipFile(filtered_gtfs) as archive:
+            # files that are not filtered are copied
+            assert "feed_info.txt" in archive.namelist()
+
+    def test_clip_cuts_trips(self, synthetic_gtfs_file_path, synthetic_gtfs_clip):
+        filtered_gtfs = FilteredGtfs(synthetic_gtfs_file_path, clip=synthetic_gtfs_clip)
+        stop_times = _read(filtered_gtfs, "stop_times.txt")
+
+        # t1 is cut to the stops within the clip polygon
+        assert list(stop_times.loc[stop_times["trip_id"] == "t1", "stop_id"]) == [
+            "s1",
+            "s2",
+        ]
+        # t2 has no times for s1 and s2, it is extended to the nearest timed stops
+        assert list(stop_times.loc[stop_times["trip_id"] == "t2", "stop_id"]) == [
+            "s0",
+            "s1",
+            "s2",
+            "s3",
+        ]
+        # t3 does not serve any stop within the clip polygon
+        assert "t3" not in set(stop_times["trip_id"])
+        assert list(_read(filtered_gtfs, "trips.txt")["trip_id"]) == ["t1", "t2", "t4"]
+
+    def test_clip_keeps_referenced_entities(
+        self, synthetic_gtfs_file_path, synthetic_gtfs_clip
+    ):
+        filtered_gtfs = FilteredGtfs(synthetic_gtfs_file_path, clip=synthetic_gtfs_clip)
+
+        # served stops, and the parent station of s1
+        assert set(_read(filtered_gtfs, "stops.txt")["stop_id"]) == {
+            "s0",
+            "s1",
+            "s2",
+            "s3",
+            "st",
+        }
+        assert set(_read(filtered_gtfs, "routes.txt")["route_id"]) == {"r1", "r2"}
+        assert set(_read(filtered_gtfs, "agency.txt")["agency_id"]) == {"A1", "A2"}
+        assert set(_read(filtered_gtfs, "calendar.txt")["service_id"]) == {"weekdays"}
+        assert set(_read(filtered_gtfs, "calendar_dates.txt")["service_id"]) == {
+            "extra"
+        }
+        assert set(_read(filtered_gtfs, "shapes.txt")["shape_id"]) == {"sh1"}
+
+        transfers = _read(filtered_gtfs, "transfers.txt")
+        assert list(zip(transfers["from_stop_id"], transfers["to_stop_id"])) == [
+            ("s1", "s2")
+        ]
+
+    def test_filtered_gtfs_is_cached(
+        self, synthetic_gtfs_file_path, synthetic_gtfs_clip, monkeypatch
+    ):
+        filtered_gtfs = FilteredGtfs(synthetic_gtfs_file_path, clip=synthetic_gtfs_clip)
+
+        def _filter(*args, **kwargs):
+            raise AssertionError("filtered again")
+
+        monkeypatch.setattr(FilteredGtfs, "_filter", _filter)
+        assert (
+            FilteredGtfs(synthetic_gtfs_file_path, clip=synthetic_gtfs_clip)
+            == filtered_gtfs
+        )
+
+    def test_different_clip_different_file(
+        self, synthetic_gtfs_file_path, synthetic_gtfs_clip
+    ):
+        assert FilteredGtfs(
+            synthetic_gtfs_file_path, clip=synthetic_gtfs_clip
+        ) != FilteredGtfs(
+            synthetic_gtfs_file_path, clip=synthetic_gtfs_clip.buffer(0.1)
+        )
+
+    @pytest.mark.parametrize(["chunk_size"], [(1,), (5,)])
+    def test_chunked_stop_times(
+        self, synthetic_gtfs_file_path, synthetic_gtfs_clip, monkeypatch, chunk_size
+    ):
+        expected = _read(
+            FilteredGtfs(synthetic_gtfs_file_path, clip=synthetic_gtfs_clip),
+            "stop_times.txt",
+        )
+        monkeypatch.setattr(r5py.util.filtered_gtfs, "CHUNK_SIZE", chunk_size)
+        # a different buffer, so that the cached file is not reused
+        filtered_gtfs = FilteredGtfs(
+            synthetic_gtfs_file_path, clip=synthetic_gtfs_clip.buffer(0.01)
+        )
+        pandas.testing.assert_frame_equal(
+            _read(filtered_gtfs, "stop_times.txt"), expected
+        )
+
+    @pytest.mark.parametrize(
+        ["service_dates", "expected_trips"],
+        [
+            # a week in spring
+            ((datetime.date(2024, 3, 4), datetime.date(2024, 3, 10)), {"t1", "t2"}),
+            # a weekend in summer
+            ((datetime.date(2024, 7, 6), datetime.date(2024, 7, 7)), {"t3"}),
+            # the added service day
+            (
+                (datetime.date(2024, 1, 1), datetime.date(2024, 1, 1)),
+                {"t1", "t2", "t4"},
+            ),
+            # datetimes are accepted, too
+            (
+                (datetime.datetime(2024, 7, 5, 8, 0), datetime.datetime(2024, 7, 5)),
+                {"t1", "t2", "t3"},
+            ),
+        ],
+    )
+    def test_service_dates(
+        self, synthetic_gtfs_file_path, service_dates, expected_trips
+    ):
+        filtered_gtfs = FilteredGtfs(
+            synthetic_gtfs_file_path, service_dates=service_dates
+        )
+        assert _trip_ids(filtered_gtfs) == expected_trips
+        assert set(_read(filtered_gtfs, "stop_times.txt")["trip_id"]) == expected_trips
+
+    def test_service_dates_removed_exception(self, tmp_path, synthetic_gtfs_file_path):
+        # remove one weekday from the `weekdays` service
+        gtfs_file_path = tmp_path / "gtfs_with_removed_day.zip"
+        with (
+            zipfile.ZipFile(synthetic_gtfs_file_path) as source,
+            zipfile.ZipFile(gtfs_file_path, "w") as destination,
+        ):
+            for name in source.namelist():
+                data = source.read(name)
+                if name == "calendar_dates.txt":
+                    data += b"weekdays,20240304,2\n"
+                destination.writestr(name, data)
+
+        filtered_gtfs = FilteredGtfs(
+            gtfs_file_path,
+            service_dates=(datetime.date(2024, 3, 4), datetime.date(2024, 3, 4)),
+        )
+        assert _trip_ids(filtered_gtfs) == set()
+
+    def test_service_dates_prune_calendar(self, synthetic_gtfs_file_path):
+        filtered_gtfs = FilteredGtfs(
+            synthetic_gtfs_file_path,
+            service_dates=(datetime.date(2024, 3, 4), datetime.date(2024, 3, 10)),
+        )
+        assert set(_read(filtered_gtfs, "calendar.txt")["service_id"]) == {"weekdays"}
+        assert set(_read(filtered_gtfs, "routes.txt")["route_id"]) == {"r1"}
+        assert set(_read(filtered_gtfs, "agency.txt")["agency_id"]) == {"A1"}
+        # s4 is only served by t3
+        assert "s4" not in set(_read(filtered_gtfs, "stops.txt")["stop_id"])
+
+    @pytest.mark.parametrize(
+        ["route_types", "expected_trips"],
+        [
+            ([0], {"t3", "t4"}),
+            ([3], {"t1", "t2"}),
+            ([0, 3], {"t1", "t2", "t3", "t4"}),
+            ([1, 2], set()),
+        ],
+    )
+    def test_route_types(self, synthetic_gtfs_file_path, route_types, expected_trips):
+        filtered_gtfs = FilteredGtfs(synthetic_gtfs_file_path, route_types=route_types)
+        assert _trip_ids(filtered_gtfs) == expected_trips
+
+    @pytest.mark.parametrize(
+        ["agencies", "expected_trips"],
+        [
+            (["A1"], {"t1", "t2"}),
+            ("A1", {"t1", "t2"}),
+            (["Second Agency"], {"t3", "t4"}),
+            (["A1", "A2"], {"t1", "t2", "t3", "t4"}),
+            (["A3"], set()),
+        ],
+    )
+    def test_agencies(self, synthetic_gtfs_file_path, agencies, expected_trips):
+        filtered_gtfs = FilteredGtfs(synthetic_gtfs_file_path, agencies=agencies)
+        assert _trip_ids(filtered_gtfs) == expected_trips
+
+    def test_combined_filters(self, synthetic_gtfs_file_path, synthetic_gtfs_clip):
+        filtered_gtfs = FilteredGtfs(
+            synthetic_gtfs_file_path,
+            clip=synthetic_gtfs_clip,
+            service_dates=(datetime.date(2024, 1, 1), datetime.date(2024, 1, 1)),
+            route_types=[0],
+        )
+        assert _trip_ids(filtered_gtfs) == {"t4"}
+
+    def test_normalise_filters(self):
+        assert FilteredGtfs.normalise_filters() == {}
+        assert FilteredGtfs.normalise_filters(
+            service_dates=(datetime.datetime(2024, 1, 1, 8), datetime.date(2024, 1, 7)),
+            route_types=[3, 0, 3],
+            agencies="A1",
+        ) == {
+            "service_dates": (datetime.date(2024, 1, 1), datetime.date(2024, 1, 7)),
+            "route_types": (0, 3),
+            "agencies": ("A1",),
+        }
+
+    def test_invalid_service_dates(self, synthetic_gtfs_file_path):
+        with pytest.raises(ValueError, match="service_dates"):
+            FilteredGtfs(
+                synthetic_gtfs_file_path,
+                service_dates=(datetime.date(2024, 1, 7), datetime.date(2024, 1, 1)),
+            )
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+
+
+import pathlib
+import sys
+
+import numpy
+import pytest
+import shapely
+
+import r5py
+import r5py.util
+from r5py.r5.filtered_osm_pbf import (
+    _contains,
+    _has_tags,
+    _osmium,
+    _osmium_extract_command,
+    _osmium_tags_filter_command,
+    _OsmEntitySelection,
+    FilteredOsmPbf,
+    ROUTABLE_NODE_TAGS,
+    ROUTABLE_WAY_TAGS,
+)
+
+
+class _FakeOsmEntity:
+    """Mimic the tag methods of com.conveyal.osmlib.OSMEntity."""
+
+    def __init__(self, **tags):
+        self.tags = tags
+
+    def hasNoTags(self):
+        return not self.tags
+
+    def getTag(self, key):
+        return self.tags.get(key)
+
+
+class _FakeOsmNode(_FakeOsmEntity):
+    """Mimic com.conveyal.osmlib.Node."""
+
+    def __init__(self, lon, lat, **tags):
+        super().__init__(**tags)
+        self.lon = lon
+        self.lat = lat
+
+    def getLon(self):
+        return self.lon
+
+    def getLat(self):
+        return self.lat
+
+
+class TestFilteredOsmPbf:
+    @pytest.mark.parametrize(
+        ["sorted_ids", "ids", "expected"],
+        [
+            ([1, 3, 5], [1, 2, 5, 6], [True, False, True, False]),
+            ([], [1, 2], [False, False]),
+            ([1, 3, 5], [], []),
+            ([2**40], [2**40, 0], [True, False]),
+        ],
+    )
+    def test_contains(self, sorted_ids, ids, expected):
+        numpy.testing.assert_array_equal(
+            _contains(numpy.array(sorted_ids, dtype=numpy.int64), ids), expected
+        )
+
+    @pytest.mark.parametrize(
+        ["tags", "routable_tags", "expected"],
+        [
+            ({}, ROUTABLE_WAY_TAGS, False),
+            ({"building": "yes"}, ROUTABLE_WAY_TAGS, False),
+            ({"highway": "residential"}, ROUTABLE_WAY_TAGS, True),
+            ({"highway": "no"}, ROUTABLE_WAY_TAGS, False),
+            ({"railway": "platform"}, ROUTABLE_WAY_TAGS, True),
+            ({"railway": "rail"}, ROUTABLE_WAY_TAGS, False),
+            ({"amenity": "bicycle_rental"}, ROUTABLE_NODE_TAGS, True),
+            ({"amenity": "cafe"}, ROUTABLE_NODE_TAGS, False),
+        ],
+    )
+    def test_has_tags(self, tags, routable_tags, expected):
+        assert _has_tags(_FakeOsmEntity(**tags), routable_tags) == expected
+
+    @pytest.mark.parametrize(
+        ["street_modes", "expected"],
+        [
+            (None, None),
+            (
+                [r5py.TransportMode.WALK, r5py.TransportMode.BICYCLE],
+                (r5py.TransportMode.BICYCLE, r5py.TransportMode.WALK),
+            ),
+            ({"walk"}, (r5py.TransportMode.WALK,)),
+            (r5py.TransportMode.CAR, (r5py.TransportMode.CAR,)),
+            (
+                [r5py.TransportMode.BICYCLE_RENT],
+                (r5py.TransportMode.BICYCLE, r5py.TransportMode.WALK),
+            ),
+            # all street modes: no need to filter
+            (
+                [r5py.TransportMode.CAR_PARK, r5py.TransportMode.BICYCLE],
+                None,
+            ),
+        ],
+    )
+    def test_normalise_street_modes(self, street_modes, expected):
+        assert FilteredOsmPbf.normalise_street_modes(street_modes) == expected
+
+    @pytest.mark.parametrize(
+        ["street_modes"],
+        [([r5py.TransportMode.TRANSIT],), (["teleportation"],), ([],)],
+    )
+    def test_invalid_street_modes(self, street_modes):
+        with pytest.raises(ValueError, match="street_modes"):
+            FilteredOsmPbf.normalise_street_modes(street_modes)
+
+    @pytest.mark.parametrize(
+        ["routable_only", "expected"],
+        [
+            (False, [False, True, True, False]),
+            (True, [False, False, True, False]),
+        ],
+    )
+    def test_keeps_standalone_nodes(self, routable_only, expected):
+        selection = _OsmEntitySelection(
+            shapely.box(0, 0, 1, 1), routable_only=routable_only, street_modes=None
+        )
+        nodes = [
+            _FakeOsmNode(0.5, 0.5),
+            _FakeOsmNode(0.5, 0.5, amenity="cafe"),
+            _FakeOsmNode(0.5, 0.5, amenity="bicycle_rental"),
+            _FakeOsmNode(1.5, 0.5, amenity="bicycle_rental"),
+        ]
+        numpy.testing.assert_array_equal(
+            selection.keeps_standalone_nodes(nodes), expected
+        )
+
+    @pytest.mark.parametrize(
+        ["osm_filter_tool", "installed", "expected"],
+        [
+            ("auto", True, "/usr/bin/osmium"),
+            ("auto", False, None),
+            ("osmium", True, "/usr/bin/osmium"),
+            ("osmlib", True, None),
+            ("osmlib", False, None),
+        ],
+    )
+    def test_osm_filter_tool(self, osm_filter_tool, installed, expected, monkeypatch):
+        monkeypatch.setattr(
+            sys, "argv", sys.argv + ["--osm-filter-tool", osm_filter_tool]
+        )
+        monkeypatch.setattr(
+            "shutil.which", lambda name: f"/usr/bin/{name}" if installed else None
+        )
+        assert _osmium() == expected
+
+    def test_osmium_not_installed(self, monkeypatch):
+        monkeypatch.setattr(sys, "argv", sys.argv + ["--osm-filter-tool", "osmium"])
+        monkeypatch.setattr("shutil.which", lambda name: None)
+        with pytest.raises(FileNotFoundError, match="osmium"):
+            _osmium()
+
+    @pytest.mark.parametrize(
+        ["clip", "expected_area"],
+        [
+            (
+                shapely.box(24.92, 60.16, 24.96, 60.18),
+                ["--bbox", "24.920000,60.160000,24.960000,60.180000"],
+            ),
+            (
+                shapely.Polygon([(24.92, 60.16), (24.96, 60.16), (24.94, 60.18)]),
+                ["--polygon", "clip.geojson"],
+            ),
+        ],
+    )
+    def test_osmium_extract_command(self, clip, expected_area):
+        assert _osmium_extract_command(
+            "osmium", "in.osm.pbf", "out.osm.pbf", clip, "clip.geojson"
+        ) == (
+            ["osmium", "extract", "--strategy", "complete_ways"]
+            + expected_area
+            + ["--overwrite", "--output-format", "pbf", "--output", "out.osm.pbf"]
+            + ["in.osm.pbf"]
+        )
+
+    def test_osmium_tags_filter_command(self):
+        command = _osmium_tags_filter_command("osmium", "in.osm.pbf", "out.osm.pbf")
+        assert command[:8] == [
+            "osmium",
+            "tags-filter",
+            "--overwrite",
+            "--output-format",
+            "pbf",
+            "--output",
+            "out.osm.pbf",
+            "in.osm.pbf",
+        ]
+        assert sorted(command[8:]) == sorted(
+            [
+                "w/highway!=no",
+                "w/park_ride!=no",
+                "w/public_transport=platform",
+                "w/railway=platform",
+                "n/amenity=bicycle_rental",
+                "n/park_ride!=no",
+                "r/type=restriction",
+            ]
+        )
+
+    @pytest.mark.parametrize(
+        ["clip", "routable_only", "street_modes", "expected_commands", "osmlib"],
+        [
+            (shapely.box(0, 0, 1, 1), False, None, ["extract"], None),
+            (None, True, None, ["tags-filter"], None),
+            (
+                shapely.box(0, 0, 1, 1),
+                True,
+                None,
+                ["extract", "tags-filter"],
+                None,
+            ),
+            # street modes need R5’s traversal permission labeler
+            (
+                shapely.box(0, 0, 1, 1),
+                True,
+                (r5py.TransportMode.CAR,),
+                ["extract", "tags-filter"],
+                ("filtered.osm.pbf.routable", None, True, (r5py.TransportMode.CAR,)),
+            ),
+            (
+                None,
+                False,
+                (r5py.TransportMode.CAR,),
+                [],
+                ("in.osm.pbf", None, False, (r5py.TransportMode.CAR,)),
+            ),
+            # osmium-tool clips to polygons only
+            (
+                shapely.Point(0.5, 0.5),
+                True,
+                None,
+                ["tags-filter"],
+                ("filtered.osm.pbf.routable", shapely.Point(0.5, 0.5), True, None),
+            ),
+        ],
+    )
+    def test_filter_with_osmium(
+        self,
+        clip,
+        routable_only,
+        street_modes,
+        expected_commands,
+        osmlib,
+        tmp_path,
+        monkeypatch,
+    ):
+        monkeypatch.setattr("shutil.which", lambda name: f"/usr/bin/{name}")
+        monkeypatch.setattr(sys, "argv", sys.argv + ["--osm-filter-tool", "osmium"])
+
+        commands = []
+
+        def run(command, **kwargs):
+            commands.append(command[1])
+            pathlib.Path(command[command.index("--output") + 1]).write_text(command[1])
+
+        monkeypatch.setattr("subprocess.run", run)
+
+        filtered_with_osmlib = []
+
+        def _filter_with_osmlib(path, destination, *args):
+            filtered_with_osmlib.append((path.name, *args))
+            destination.write_text("osmlib")
+
+        monkeypatch.setattr(
+            FilteredOsmPbf, "_filter_with_osmlib", staticmethod(_filter_with_osmlib)
+        )
+
+        destination = tmp_path / "filtered.osm.pbf"
+        FilteredOsmPbf._filter(
+            pathlib.Path("in.osm.pbf"), destination, clip, routable_only, street_modes
+        )
+
+        assert commands == expected_commands
+        if osmlib is None:
+            assert filtered_with_osmlib == []
+            assert destination.read_text() == expected_commands[-1]
+        else:
+            assert filtered_with_osmlib == [osmlib]
+            assert destination.read_text() == "osmlib"
+        # intermediate files are removed
+        assert list(tmp_path.iterdir()) == [destination]
+
+    def test_no_filter(self, helsinki_osm_pbf_file_path):
+        assert FilteredOsmPbf(helsinki_osm_pbf_file_path) == helsinki_osm_pbf_file_path
+
+    def test_clip(self, helsinki_osm_pbf_file_path, helsinki_city_centre_bbox):
+        filtered_osm_pbf = FilteredOsmPbf(
+            helsinki_osm_pbf_file_path,
+            clip=r5py.util.clip_geometry(helsinki_city_centre_bbox),
+        )
+        assert filtered_osm_pbf != helsinki_osm_pbf_file_path
+        assert (
+            0
+            < filtered_osm_pbf.stat().st_size
+            < helsinki_osm_pbf_file_path.stat().st_size
+        )
+
+    def test_clipped_osm_pbf_is_readable(
+        self, helsinki_osm_pbf_file_path, helsinki_city_centre_bbox
+    ):
+        import com.conveyal.osmlib
+
+        filtered_osm_pbf = FilteredOsmPbf(
+            helsinki_osm_pbf_file_path,
+            clip=r5py.util.clip_geometry(helsinki_city_centre_bbox),
+        )
+        osm = com.conveyal.osmlib.OSM(None)
+        osm.readFromFile(f"{filtered_osm_pbf}")
+        assert osm.ways.size() > 0
+
+        # all nodes of all ways are present
+        for way in osm.ways.values():
+            for node_id in way.nodes:
+                assert osm.nodes.containsKey(node_id)
+
+        # all ways touch the clip polygon
+        clip = shapely.box(*helsinki_city_centre_bbox)
+        for way in osm.ways.values():
+            assert any(
+                clip.contains(
+                    shapely.Point(
+                        osm.nodes.get(node_id).getLon(), osm.nodes.get(node_id).getLat()
+                    )
+                )
+                for node_id in way.nodes
+            )
+        osm.close()
+
+    def test_filtered_osm_pbf_is_cached(
+        self, helsinki_osm_pbf_file_path, helsinki_city_centre_bbox, monkeypatch
+    ):
+        clip = r5py.util.clip_geometry(helsinki_city_centre_bbox)
+        filtered_osm_pbf = FilteredOsmPbf(helsinki_osm_pbf_file_path, clip=clip)
+
+        def _filter(*args, **kwargs):
+            raise AssertionError("filtered again")
+
+        monkeypatch.setattr(FilteredOsmPbf, "_filter", _filter)
+        assert FilteredOsmPbf(helsinki_osm_pbf_file_path, clip=clip) == filtered_osm_pbf
+
+    def test_routable_only(self, helsinki_osm_pbf_file_path):
+        import com.conveyal.osmlib
+
+        filtered_osm_pbf = FilteredOsmPbf(
+            helsinki_osm_pbf_file_path, routable_only=True
+        )
+        assert (
+            0
+            < filtered_osm_pbf.stat().st_size
+            < helsinki_osm_pbf_file_path.stat().st_size
+        )
+
+        osm = com.conveyal.osmlib.OSM(None)
+        osm.readFromFile(f"{filtered_osm_pbf}")
+        assert osm.ways.size() > 0
+        for way in osm.ways.values():
+            assert _has_tags(way, ROUTABLE_WAY_TAGS)
+            for node_id in way.nodes:
+                assert osm.nodes.containsKey(node_id)
+        osm.close()
+
+    def test_routable_only_and_clip(
+        self, helsinki_osm_pbf_file_path, helsinki_city_centre_bbox
+    ):
+        clip = r5py.util.clip_geometry(helsinki_city_centre_bbox)
+        clipped = FilteredOsmPbf(helsinki_osm_pbf_file_path, clip=clip)
+        clipped_routable = FilteredOsmPbf(
+            helsinki_osm_pbf_file_path, clip=clip, routable_only=True
+        )
+        assert clipped_routable != clipped
+        assert clipped_routable.stat().st_size < clipped.stat().st_size
+
+    def test_street_modes(self, helsinki_osm_pbf_file_path):
+        filtered_osm_pbf = FilteredOsmPbf(
+            helsinki_osm_pbf_file_path, street_modes=[r5py.TransportMode.CAR]
+        )
+        assert (
+            filtered_osm_pbf.stat().st_size < helsinki_osm_pbf_file_path.stat().st_size
+        )
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+
+import sys
+
+import pandas
+import pytest
+
+import r5py.util.config
+from r5py.util import FlightRecording
+
+from .fresh_interpreter import run_in_fresh_interpreter
+
+
+class TestSessionRecording:
+    def test_disabled_by_default(self):
+        assert not r5py.util.config.Config().arguments.flight_recording
+
+    def test_config_options(self, tmp_path):
+        sys.argv.extend(
+            ["--flight-recording", "--flight-recording-directory", f"{tmp_path}"]
+        )
+        arguments = r5py.util.config.Config().arguments
+        assert arguments.flight_recording
+        assert arguments.flight_recording_directory == f"{tmp_path}"
+        sys.argv = sys.argv[:-3]
+
+    def test_session_recording(self, tmp_path):
+        run_in_fresh_interpreter(
+            "import jpype; "
+            "jpype.startJVM(); "
+            "from r5py.util.flight_recording import record_session; "
+            f"record_session({str(tmp_path / 'recordings')!r})"
+        )
+        (recording,) = (tmp_path / "recordings").glob("r5py-*.jfr")
+        assert recording.stat().st_size > 0
+
+
+class TestFlightRecording:
+    def test_invalid_settings(self):
+        with pytest.raises(ValueError, match="Unknown JFR `settings`"):
+            FlightRecording(settings="definitely-not-a-setting")
+
+    def test_recording(
+        self,
+        tmp_path,
+        transport_network,
+        population_grid_points,
+        departure_datetime,
+    ):
+        with FlightRecording(tmp_path, name="ttm", hot_methods=True) as recording:
+            r5py.TravelTimeMatrix(
+                transport_network,
+                origins=population_grid_points,
+                departure=departure_datetime,
+                transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+            )
+
+        assert recording.path.parent == tmp_path
+        assert recording.path.name.startswith("ttm-")
+        assert recording.path.suffix == ".jfr"
+        assert recording.path.stat().st_size > 0
+
+        hot_methods = recording.hot_methods
+        assert isinstance(hot_methods, pandas.DataFrame)
+        assert list(hot_methods.columns) == [
+            "method",
+            "self_samples",
+            "total_samples",
+            "self_share",
+        ]
+        assert not hot_methods.empty
+        assert hot_methods["method"].str.startswith("com.conveyal.").all()
+        assert hot_methods["self_samples"].is_monotonic_decreasing
+        assert (hot_methods["self_samples"] <= hot_methods["total_samples"]).all()
+        assert hot_methods["self_share"].sum() <= 1.0
+
+    def test_no_hot_methods_by_default(self, tmp_path):
+        import java.lang
+
+        with FlightRecording(tmp_path) as recording:
+            java.lang.Math.sqrt(2.0)
+        assert recording.path.exists()
+        assert recording.hot_methods is None
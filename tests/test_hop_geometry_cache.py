@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+
+import pytest
+import shapely
+
+import r5py.r5
+from r5py.r5.hop_geometry_cache import PatternHops
+
+
+def planar(x, y):
+    return x, y
+
+
+class TestPatternHops:
+    @pytest.fixture
+    def hops(self):
+        yield [
+            shapely.LineString([(0, 0), (1, 0), (1, 1)]),
+            shapely.LineString([(1, 1), (1, 3)]),
+            shapely.LineString([(1, 3), (2, 3), (4, 3)]),
+        ]
+
+    @pytest.mark.parametrize(
+        ["board_stop_position", "alight_stop_position", "expected_geometry"],
+        [
+            (0, 1, shapely.LineString([(0, 0), (1, 0), (1, 1)])),
+            (1, 2, shapely.LineString([(1, 1), (1, 3)])),
+            (
+                0,
+                3,
+                shapely.LineString([(0, 0), (1, 0), (1, 1), (1, 3), (2, 3), (4, 3)]),
+            ),
+            (1, 3, shapely.LineString([(1, 1), (1, 3), (2, 3), (4, 3)])),
+        ],
+    )
+    def test_geometry(
+        self, hops, board_stop_position, alight_stop_position, expected_geometry
+    ):
+        pattern_hops = PatternHops(hops, planar)
+        geometry = pattern_hops.geometry(board_stop_position, alight_stop_position)
+        assert geometry.equals_exact(expected_geometry, tolerance=0.0)
+
+    def test_wkb(self, hops):
+        pattern_hops = PatternHops(hops, planar)
+        wkb = pattern_hops.wkb(1, 3)
+        assert wkb == shapely.to_wkb(pattern_hops.geometry(1, 3))
+        assert pattern_hops.wkb(1, 3) is wkb  # computed once
+
+    @pytest.mark.parametrize(
+        ["board_stop_position", "alight_stop_position", "expected_distance"],
+        [
+            (0, 1, 2.0),
+            (1, 2, 2.0),
+            (2, 3, 3.0),
+            (0, 3, 7.0),
+        ],
+    )
+    def test_distance(
+        self, hops, board_stop_position, alight_stop_position, expected_distance
+    ):
+        pattern_hops = PatternHops(hops, planar)
+        assert pattern_hops.distance(
+            board_stop_position, alight_stop_position
+        ) == pytest.approx(expected_distance)
+
+    def test_gap_between_hops(self):
+        pattern_hops = PatternHops(
+            [
+                shapely.LineString([(0, 0), (1, 0)]),
+                shapely.LineString([(2, 0), (3, 0)]),
+            ],
+            planar,
+        )
+        assert pattern_hops.distance(0, 2) == pytest.approx(2.0)
+        assert pattern_hops.geometry(1, 2).equals_exact(
+            shapely.LineString([(2, 0), (3, 0)]), tolerance=0.0
+        )
+
+
+class TestHopGeometryCache:
+    def test_pattern_hops(self, transport_network):
+        hop_geometries = transport_network.hop_geometries
+        assert isinstance(hop_geometries, r5py.r5.HopGeometryCache)
+        assert hop_geometries is transport_network.hop_geometries
+
+        pattern_hops = hop_geometries.pattern_hops(0)
+        assert pattern_hops is hop_geometries.pattern_hops(0)
+
+        last_stop_position = len(pattern_hops.stop_positions) - 1
+        geometry = pattern_hops.geometry(0, last_stop_position)
+        assert isinstance(geometry, shapely.LineString)
+        assert pattern_hops.distance(0, last_stop_position) > 0
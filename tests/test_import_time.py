@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+
+import pytest
+
+from .fresh_interpreter import run_in_fresh_interpreter
+
+# Importing r5py used to start a JVM and hash the R5 jar, which took several
+# seconds. Keep a generous margin, so slow CI runners do not fail this test.
+MAX_IMPORT_TIME = 10.0  # seconds
+
+# `find_r5_classpath` is imported by name into other modules (so patching
+# it would not catch all calls): record calls to any function of that name
+RECORD_FIND_R5_CLASSPATH_CALLS = (
+    "import sys; "
+    "calls = []; "
+    "sys.setprofile("
+    "    lambda frame, event, _: calls.append(frame.f_code.co_name)"
+    "    if event == 'call' and frame.f_code.co_name == 'find_r5_classpath'"
+    "    else None"
+    "); "
+)
+
+
+class TestImportTime:
+    def test_import_does_not_start_jvm(self):
+        output = run_in_fresh_interpreter(
+            "import jpype; import r5py; print(jpype.isJVMStarted())"
+        )
+        assert output == "False"
+
+    def test_import_does_not_look_for_r5_jar(self):
+        output = run_in_fresh_interpreter(
+            RECORD_FIND_R5_CLASSPATH_CALLS
+            + "import jpype; "
+            + "import r5py; "
+            + "sys.setprofile(None); "
+            + "print(len(calls), jpype.isJVMStarted())"
+        )
+        assert output == "0 False"
+
+    def test_find_r5_classpath_calls_are_recorded(self):
+        # make sure `test_import_does_not_look_for_r5_jar` would notice a call
+        output = run_in_fresh_interpreter(
+            RECORD_FIND_R5_CLASSPATH_CALLS
+            + "import types; "
+            + "import r5py.util.classpath; "
+            + "r5py.util.classpath.find_r5_classpath("
+            + "    types.SimpleNamespace(r5_classpath=sys.executable)"
+            + "); "
+            + "sys.setprofile(None); "
+            + "print(len(calls))"
+        )
+        assert output == "1"
+
+    def test_import_time(self):
+        import_time = float(
+            run_in_fresh_interpreter(
+                "import time; "
+                "start = time.perf_counter(); "
+                "import r5py; "
+                "print(time.perf_counter() - start)"
+            )
+        )
+        assert import_time < MAX_IMPORT_TIME
+
+    @pytest.mark.parametrize(
+        ["r5py_class"],
+        [
+            ("TransportMode",),
+            ("ElevationCostFunction",),
+        ],
+    )
+    def test_using_enums_does_not_start_jvm(self, r5py_class):
+        output = run_in_fresh_interpreter(
+            "import jpype; "
+            "import r5py; "
+            f"_ = list(r5py.{r5py_class}); "
+            "print(jpype.isJVMStarted())"
+        )
+        assert output == "False"
+
+    @pytest.mark.parametrize(
+        ["module"],
+        [
+            ("geohexgrid",),
+            ("joblib",),
+            ("rasterio",),
+            ("simplification",),
+            ("sklearn",),
+        ],
+    )
+    def test_import_does_not_load_optional_dependencies(self, module):
+        output = run_in_fresh_interpreter(
+            f"import sys; import r5py; print({module!r} in sys.modules)"
+        )
+        assert output == "False"
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+
+
+import threading
+import time
+
+import numpy
+import pandas
+import pytest
+
+from r5py.util import Instrumentation, PhaseTiming
+
+
+class TestInstrumentation:
+    def test_disabled(self):
+        instrumentation = Instrumentation(enabled=False)
+        with instrumentation.phase("phase"):
+            pass
+        assert instrumentation.records.empty
+        assert instrumentation.summary.empty
+
+    def test_phase(self):
+        instrumentation = Instrumentation()
+        with instrumentation.phase("sleep"):
+            time.sleep(0.05)
+        with instrumentation.phase("busy"):
+            sum(range(1_000_000))
+
+        records = instrumentation.records
+        assert list(records.phase) == ["sleep", "busy"]
+        sleep, busy = records.itertuples(index=False)
+        assert sleep.wall_time >= 0.05
+        assert sleep.cpu_time < sleep.wall_time
+        assert busy.cpu_time > 0.0
+
+    def test_phase_records_on_exception(self):
+        instrumentation = Instrumentation()
+        with pytest.raises(ZeroDivisionError):
+            with instrumentation.phase("fail"):
+                1 / 0
+        assert list(instrumentation.records.phase) == ["fail"]
+
+    def test_summary(self):
+        instrumentation = Instrumentation()
+        instrumentation.record("b", 1.0, 0.5)
+        instrumentation.record("a", 2.0, 1.0)
+        instrumentation.record("b", 3.0, 1.5)
+
+        summary = instrumentation.summary
+        assert list(summary.index) == ["b", "a"]
+        assert summary.loc["b", "count"] == 2
+        assert summary.loc["b", "wall_time"] == pytest.approx(4.0)
+        assert summary.loc["b", "cpu_time"] == pytest.approx(2.0)
+        assert summary.loc["b", "mean_wall_time"] == pytest.approx(2.0)
+        assert summary.loc["b", "max_wall_time"] == pytest.approx(3.0)
+        assert summary.loc["a", "count"] == 1
+
+    def test_nested_phases(self):
+        instrumentation = Instrumentation()
+        with instrumentation.phase("outer"):
+            time.sleep(0.02)
+            with instrumentation.phase("inner"):
+                time.sleep(0.05)
+            with instrumentation.phase("inner"):
+                sum(range(1_000_000))
+
+        records = instrumentation.records.set_index("phase")
+        outer = records.loc["outer"]
+        inner = records.loc["inner"]
+        assert list(inner.parent) == ["outer", "outer"]
+        assert pandas.isna(outer.parent)
+        assert outer.nested_wall_time == pytest.approx(inner.wall_time.sum())
+        assert outer.nested_cpu_time == pytest.approx(inner.cpu_time.sum())
+        assert inner.nested_wall_time.sum() == 0.0
+
+        # the summary counts the time of nested phases only once
+        summary = instrumentation.summary
+        assert summary.wall_time.sum() == pytest.approx(outer.wall_time)
+        assert summary.cpu_time.sum() == pytest.approx(outer.cpu_time)
+        assert summary.loc["outer", "wall_time"] == pytest.approx(
+            outer.wall_time - outer.nested_wall_time
+        )
+        assert summary.loc["outer", "wall_time"] >= 0.02
+        # (per run, including nested phases)
+        assert summary.loc["outer", "max_wall_time"] == pytest.approx(outer.wall_time)
+
+    def test_nested_phases_per_thread(self):
+        instrumentation = Instrumentation()
+
+        def run_phase():
+            with instrumentation.phase("other thread"):
+                pass
+
+        with instrumentation.phase("outer"):
+            thread = threading.Thread(target=run_phase)
+            thread.start()
+            thread.join()
+
+        parents = instrumentation.records.set_index("phase").parent
+        assert pandas.isna(parents["other thread"])
+        assert pandas.isna(parents["outer"])
+
+    def test_histogram(self):
+        instrumentation = Instrumentation()
+        for wall_time in (0.1, 0.2, 0.2, 0.9):
+            instrumentation.record("route_origin", wall_time, 0.0)
+        instrumentation.record("other", 5.0, 0.0)
+
+        counts, bin_edges = instrumentation.histogram("route_origin", bins=[0, 0.5, 1])
+        numpy.testing.assert_array_equal(counts, [3, 1])
+        numpy.testing.assert_array_equal(bin_edges, [0, 0.5, 1])
+
+    def test_callbacks(self):
+        phase_timings = []
+        instrumentation = Instrumentation(callbacks=[phase_timings.append])
+        with instrumentation.phase("phase"):
+            pass
+        assert len(phase_timings) == 1
+        assert isinstance(phase_timings[0], PhaseTiming)
+        assert phase_timings[0].phase == "phase"
+
+    def test_threads(self):
+        instrumentation = Instrumentation()
+
+        def run_phases():
+            for _ in range(100):
+                with instrumentation.phase("phase"):
+                    pass
+
+        threads = [threading.Thread(target=run_phases) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert instrumentation.summary.loc["phase", "count"] == 800
+
+    @pytest.mark.parametrize(
+        ["argument", "expected_enabled"],
+        [(None, False), (False, False), (True, True)],
+    )
+    def test_from_argument(self, argument, expected_enabled):
+        assert Instrumentation.from_argument(argument).enabled == expected_enabled
+
+    def test_from_argument_instance(self):
+        instrumentation = Instrumentation()
+        assert Instrumentation.from_argument(instrumentation) is instrumentation
+
+    def test_from_argument_invalid(self):
+        with pytest.raises(TypeError, match="instrumentation"):
+            Instrumentation.from_argument("yes")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+
+import datetime
+
+import numpy
+import pandas
+import pytest
+import shapely
+
+import r5py
+
+
+class TestItineraryColumns:
+    @pytest.fixture
+    def trips(self):
+        yield [
+            r5py.r5.Trip(
+                [
+                    r5py.r5.trip_leg.TripLeg(
+                        transport_mode=r5py.TransportMode.WALK,
+                        distance=123.4,
+                    ),
+                    r5py.r5.TransitLeg(
+                        transport_mode=r5py.TransportMode.BUS,
+                        departure_time=datetime.datetime(2022, 2, 22, 8, 35),
+                        distance=1234.5,
+                        travel_time=datetime.timedelta(minutes=7),
+                        wait_time=datetime.timedelta(minutes=2),
+                        feed="feed",
+                        agency_id="agency",
+                        route_id="route",
+                        start_stop_id="stop 1",
+                        end_stop_id="stop 2",
+                        geometry=shapely.LineString([(0, 0), (1, 1)]),
+                    ),
+                ]
+            ),
+            r5py.r5.Trip(
+                [
+                    r5py.r5.trip_leg.TripLeg(
+                        transport_mode=r5py.TransportMode.WALK,
+                        distance=None,
+                        travel_time=datetime.timedelta(minutes=20),
+                        geometry=None,
+                    ),
+                ]
+            ),
+        ]
+
+    @pytest.fixture
+    def itinerary_columns(self, trips):
+        itinerary_columns = r5py.r5.ItineraryColumns()
+        itinerary_columns.append(1, 2, trips)
+        yield itinerary_columns
+
+    def test_len(self, itinerary_columns):
+        assert len(itinerary_columns) == 3
+
+    def test_to_frame(self, itinerary_columns, trips):
+        frame = itinerary_columns.to_frame()
+
+        assert list(frame.columns) == r5py.r5.ItineraryColumns.COLUMNS
+        assert list(frame.option) == [0, 0, 1]
+        assert list(frame.segment) == [0, 1, 0]
+        assert list(frame.transport_mode) == [
+            r5py.TransportMode.WALK,
+            r5py.TransportMode.BUS,
+            r5py.TransportMode.WALK,
+        ]
+        assert frame.departure_time.isna().tolist() == [True, False, True]
+        assert frame.departure_time[1] == datetime.datetime(2022, 2, 22, 8, 35)
+        assert frame.distance[1] == 1234.5
+        assert numpy.isnan(frame.distance[2])
+        assert list(frame.travel_time) == [
+            datetime.timedelta(0),
+            datetime.timedelta(minutes=7),
+            datetime.timedelta(minutes=20),
+        ]
+        assert frame.wait_time[1] == datetime.timedelta(minutes=2)
+        assert frame.route_id[1] == "route"
+        assert frame.geometry[1].equals(trips[0].legs[1].geometry)
+        assert frame.geometry[2] is None
+
+    def test_categorical_columns(self, itinerary_columns):
+        frame = itinerary_columns.to_frame()
+
+        for column in [
+            "transport_mode",
+            "feed",
+            "agency_id",
+            "route_id",
+            "start_stop_id",
+            "end_stop_id",
+        ]:
+            assert isinstance(frame[column].dtype, pandas.CategoricalDtype)
+        assert list(frame.transport_mode.cat.categories) == [
+            r5py.TransportMode.WALK,
+            r5py.TransportMode.BUS,
+        ]
+        assert frame.route_id.isna().tolist() == [True, False, True]
+
+    def test_wkb(self, itinerary_columns, trips):
+        frame = itinerary_columns.to_frame(wkb=True)
+        assert frame.geometry[1] == shapely.to_wkb(trips[0].legs[1].geometry)
+        assert frame.geometry[2] is None
+
+    def test_same_as_trip_table(self, itinerary_columns, trips):
+        # as the per-pair tables of earlier r5py versions
+        expected = pandas.DataFrame(
+            [
+                [1, 2, option] + segment
+                for option, trip in enumerate(trips)
+                for segment in trip.as_table()
+            ],
+            columns=r5py.r5.ItineraryColumns.COLUMNS,
+        )
+        frame = itinerary_columns.to_frame()
+        frame = frame.astype(
+            {
+                column: frame[column].cat.categories.dtype
+                for column in frame.columns
+                if isinstance(frame[column].dtype, pandas.CategoricalDtype)
+            }
+        )
+        pandas.testing.assert_frame_equal(
+            frame.drop(columns=["geometry"]),
+            expected.drop(columns=["geometry"]),
+        )
+
+    def test_extend(self, itinerary_columns, trips):
+        other = r5py.r5.ItineraryColumns()
+        other.append(3, 4, trips[1:])
+        itinerary_columns.extend(other)
+        frame = itinerary_columns.to_frame()
+        assert len(frame) == 4
+        assert list(frame.from_id) == [1, 1, 1, 3]
+
+    def test_extend_merges_categories(self, itinerary_columns, trips):
+        other = r5py.r5.ItineraryColumns()
+        other.append(3, 4, trips[::-1])  # other categories, in another order
+        other.extend(itinerary_columns)
+
+        frame = other.to_frame(wkb=True)
+        expected = pandas.concat(
+            [
+                self._frame(3, 4, trips[::-1]).to_frame(wkb=True),
+                itinerary_columns.to_frame(wkb=True),
+            ],
+            ignore_index=True,
+        )
+        assert list(frame.from_id) == [3, 3, 3, 1, 1, 1]
+        pandas.testing.assert_frame_equal(frame.astype(object), expected.astype(object))
+
+    @staticmethod
+    def _frame(from_id, to_id, trips):
+        itinerary_columns = r5py.r5.ItineraryColumns()
+        itinerary_columns.append(from_id, to_id, trips)
+        return itinerary_columns
+
+    def test_append_fields(self, trips):
+        midnight = datetime.datetime(2022, 2, 22)
+        trip_fields = [
+            tuple(
+                r5py.r5.LegFields(
+                    leg.__class__,
+                    leg.transport_mode,
+                    (
+                        round((leg.departure_time - midnight).total_seconds())
+                        if isinstance(leg.departure_time, datetime.datetime)
+                        else None
+                    ),
+                    leg.distance,
+                    round(leg.travel_time.total_seconds()),
+                    round(leg.wait_time.total_seconds()),
+                    leg.feed,
+                    leg.agency_id,
+                    leg.route_id,
+                    leg.start_stop_id,
+                    leg.end_stop_id,
+                    leg.wkb,
+                )
+                for leg in trip.legs
+            )
+            for trip in trips
+        ]
+
+        itinerary_columns = r5py.r5.ItineraryColumns()
+        itinerary_columns.append_fields(1, 2, trip_fields, midnight)
+
+        pandas.testing.assert_frame_equal(
+            itinerary_columns.to_frame(wkb=True),
+            self._frame(1, 2, trips).to_frame(wkb=True),
+        )
+
+        # … and `r5py.r5.Trip`s only on request
+        views = [
+            r5py.r5.Trip([leg.as_trip_leg(midnight) for leg in legs])
+            for legs in trip_fields
+        ]
+        assert [view.signature for view in views] == [trip.signature for trip in trips]
+        assert [type(leg) for leg in views[0].legs] == [
+            type(leg) for leg in trips[0].legs
+        ]
+
+    def test_timezone(self):
+        timezone = datetime.timezone(datetime.timedelta(hours=2))
+        itinerary_columns = r5py.r5.ItineraryColumns()
+        itinerary_columns.append(
+            1,
+            2,
+            [
+                r5py.r5.Trip(
+                    [
+                        r5py.r5.TransitLeg(
+                            departure_time=datetime.datetime(
+                                2022, 2, 22, 8, 35, tzinfo=timezone
+                            )
+                        )
+                    ]
+                )
+            ],
+        )
+        frame = itinerary_columns.to_frame()
+        assert frame.departure_time[0] == datetime.datetime(
+            2022, 2, 22, 8, 35, tzinfo=timezone
+        )
+
+    def test_empty(self):
+        frame = r5py.r5.ItineraryColumns().to_frame()
+        assert frame.empty
+        assert list(frame.columns) == r5py.r5.ItineraryColumns.COLUMNS
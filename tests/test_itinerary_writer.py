@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import datetime
+import sys
+
+import geopandas
+import pytest
+import shapely
+
+import r5py
+
+
+class TestItineraryWriter:
+    @pytest.fixture
+    def itineraries(self):
+        itineraries = r5py.r5.ItineraryColumns()
+        itineraries.append(
+            1,
+            2,
+            [
+                r5py.r5.Trip(
+                    [
+                        r5py.r5.trip_leg.TripLeg(
+                            transport_mode=r5py.TransportMode.WALK,
+                            distance=123.4,
+                            travel_time=datetime.timedelta(minutes=2),
+                            geometry=shapely.LineString([(0, 0), (0, 1)]),
+                        ),
+                        r5py.r5.TransitLeg(
+                            transport_mode=r5py.TransportMode.BUS,
+                            departure_time=datetime.datetime(2022, 2, 22, 8, 35),
+                            distance=1234.5,
+                            travel_time=datetime.timedelta(minutes=7),
+                            wait_time=datetime.timedelta(minutes=2),
+                            feed="feed",
+                            agency_id="agency",
+                            route_id="route",
+                            start_stop_id="stop 1",
+                            end_stop_id="stop 2",
+                            geometry=shapely.LineString([(0, 1), (1, 1)]),
+                        ),
+                    ]
+                )
+            ],
+        )
+        yield itineraries
+
+    @pytest.mark.parametrize("rows_per_batch", [1, 100])
+    def test_write(self, itineraries, tmp_path, rows_per_batch):
+        path = tmp_path / "itineraries.parquet"
+
+        with r5py.r5.ItineraryWriter(path, rows_per_batch) as writer:
+            writer.write(itineraries)
+            writer.write(itineraries)
+
+        result = geopandas.read_parquet(path)
+        expected = itineraries.to_frame()
+
+        assert len(result) == 2 * len(expected)
+        assert list(result.columns) == r5py.r5.ItineraryColumns.COLUMNS
+        assert result.crs.to_epsg() == 4326
+        assert list(result.transport_mode[:2]) == ["WALK", "BUS"]
+        assert result.route_id[1] == "route"
+        assert result.departure_time[1] == expected.departure_time[1]
+        assert result.travel_time[1] == datetime.timedelta(minutes=7)
+        assert result.geometry[1].equals(expected.geometry[1])
+
+    def test_empty(self, tmp_path):
+        path = tmp_path / "itineraries.parquet"
+
+        r5py.r5.ItineraryWriter(path).close()
+
+        result = geopandas.read_parquet(path)
+        assert result.empty
+        assert list(result.columns) == r5py.r5.ItineraryColumns.COLUMNS
+
+    @pytest.mark.parametrize("module", ["pyarrow", "pyarrow.parquet"])
+    def test_missing_pyarrow(self, tmp_path, monkeypatch, module):
+        monkeypatch.setitem(sys.modules, module, None)  # `import` fails
+        path = tmp_path / "itineraries.parquet"
+
+        with pytest.raises(ImportError, match="requires `pyarrow`"):
+            r5py.r5.ItineraryWriter(path)
+        assert not path.exists()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+
+import time
+
+import pandas
+import pytest
+
+import r5py.util
+from r5py.util.retained_size import estimated_retained_size
+
+
+class TestJvmMetrics:
+    def test_jvm_metrics(self):
+        jvm_metrics = r5py.util.jvm_metrics()
+        assert 0 < jvm_metrics["heap_used"] <= jvm_metrics["heap_committed"]
+        assert jvm_metrics["heap_committed"] <= jvm_metrics["heap_max"]
+        assert jvm_metrics["non_heap_used"] > 0
+        assert jvm_metrics["gc_count"] == sum(
+            garbage_collector["count"]
+            for garbage_collector in jvm_metrics["garbage_collectors"].values()
+        )
+        assert jvm_metrics["gc_time"] >= 0.0
+
+    def test_heap_max_is_max_memory(self):
+        from r5py.util.memory_footprint import max_jvm_memory
+
+        assert r5py.util.jvm_metrics()["heap_max"] == pytest.approx(
+            max_jvm_memory(), rel=0.1
+        )
+
+    def test_gc_count_increases(self):
+        import java.lang
+
+        gc_count = r5py.util.jvm_metrics()["gc_count"]
+        java.lang.System.gc()
+        assert r5py.util.jvm_metrics()["gc_count"] > gc_count
+
+
+class TestJvmMetricsRecorder:
+    def test_recorder(self):
+        with r5py.util.JvmMetricsRecorder(0.05) as jvm_metrics_recorder:
+            time.sleep(0.5)
+        metrics = jvm_metrics_recorder.metrics
+        assert isinstance(metrics, pandas.DataFrame)
+        assert len(metrics) > 3
+        assert "garbage_collectors" not in metrics.columns
+        assert {"elapsed", "heap_used", "gc_count", "gc_time"} <= set(metrics.columns)
+        assert metrics["elapsed"].is_monotonic_increasing
+
+    @pytest.mark.parametrize(["interval"], [(0,), (-1.0,)])
+    def test_invalid_interval(self, interval):
+        with pytest.raises(ValueError, match="interval"):
+            r5py.util.JvmMetricsRecorder(interval)
+
+
+class TestEstimatedRetainedSize:
+    def test_primitive_array(self):
+        import jpype
+
+        assert estimated_retained_size(jpype.JArray(jpype.JInt)(1000)) == 16 + 4000
+
+    def test_shared_objects_counted_once(self):
+        import java.util
+        import jpype
+
+        array = jpype.JArray(jpype.JLong)(1000)
+        arrays = java.util.ArrayList()
+        arrays.add(array)
+        assert estimated_retained_size(arrays) > estimated_retained_size(array)
+        arrays.add(array)
+        assert estimated_retained_size(arrays) < 2 * estimated_retained_size(array)
+
+    def test_exclude(self):
+        import java.util
+        import jpype
+
+        array = jpype.JArray(jpype.JLong)(1000)
+        arrays = java.util.ArrayList()
+        arrays.add(array)
+        assert estimated_retained_size(arrays, exclude=[array]) < 8000
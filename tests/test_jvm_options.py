@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+
+import sys
+
+import pytest
+
+import r5py.util.config
+from r5py.util.jvm_options import JVM_PROFILES, jvm_options
+
+from .fresh_interpreter import run_in_fresh_interpreter
+
+
+class TestJvmOptions:
+    def test_default_profile_does_not_check_jni(self):
+        assert "-Xcheck:jni" not in jvm_options()
+        assert r5py.util.config.Config().arguments.jvm_profile == "default"
+
+    def test_debug_profile_checks_jni(self):
+        assert "-Xcheck:jni" in jvm_options("debug")
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError, match="Unknown `--jvm-profile`"):
+            jvm_options("definitely-not-a-profile")
+
+    @pytest.mark.parametrize(
+        ["additional_jvm_options", "expected"],
+        [
+            ("", []),
+            ("-XX:+AlwaysPreTouch", ["-XX:+AlwaysPreTouch"]),
+            ("-XX:+AlwaysPreTouch  -Xss4m", ["-XX:+AlwaysPreTouch", "-Xss4m"]),
+            ("'-Dfoo=bar baz'", ["-Dfoo=bar baz"]),
+        ],
+    )
+    def test_additional_jvm_options(self, additional_jvm_options, expected):
+        assert jvm_options("default", additional_jvm_options) == expected
+
+    def test_additional_jvm_options_come_last(self):
+        options = jvm_options("throughput", "-XX:+UseSerialGC")
+        assert options[-1] == "-XX:+UseSerialGC"
+
+    def test_config_options(self):
+        sys.argv.extend(["--jvm-profile", "throughput", "--jvm-options=-Xss4m"])
+        arguments = r5py.util.config.Config().arguments
+        assert arguments.jvm_profile == "throughput"
+        assert arguments.jvm_options == "-Xss4m"
+        sys.argv = sys.argv[:-3]
+
+    @pytest.mark.parametrize(["jvm_profile"], [(profile,) for profile in JVM_PROFILES])
+    def test_jvm_accepts_profile(self, jvm_profile):
+        output = run_in_fresh_interpreter(
+            "import jpype; "
+            "from r5py.util.jvm_options import jvm_options; "
+            f"jpype.startJVM(*jvm_options({jvm_profile!r})); "
+            "print(jpype.isJVMStarted())"
+        )
+        assert output == "True"
@@ -3,13 +3,29 @@
 
 import pytest
 
+import r5py.util.memory_footprint
 from r5py.util.memory_footprint import (
+    _cgroup_memory_limit,
     _get_max_memory,
     _interpret_power_of_two_units,
     _parse_value_and_unit,
     _share_of_ram,
+    _total_memory,
 )
-import psutil
+
+
+@pytest.fixture
+def fake_cgroup_root(tmp_path):
+    """Return an empty directory standing in for /sys/fs/cgroup."""
+    fake_cgroup_root = tmp_path / "sys" / "fs" / "cgroup"
+    fake_cgroup_root.mkdir(parents=True)
+    yield fake_cgroup_root
+
+
+@pytest.fixture
+def fake_proc_self_cgroup(tmp_path):
+    """Return the path of a file standing in for /proc/self/cgroup."""
+    yield tmp_path / "cgroup"
 
 
 class TestMemoryFootprint:
@@ -61,9 +77,9 @@ class TestMemoryFootprint:
     @pytest.mark.parametrize(
         ["share", "leave_at_least", "expected"],
         [
-            (0.8, 0, psutil.virtual_memory().total * 0.8),
-            (0.1, 0, psutil.virtual_memory().total * 0.1),
-            (1.0, 2000, psutil.virtual_memory().total - 2000),
+            (0.8, 0, _total_memory() * 0.8),
+            (0.1, 0, _total_memory() * 0.1),
+            (1.0, 2000, _total_memory() - 2000),
         ],
     )
     def test_share_of_ram_leaving_zero(self, share, leave_at_least, expected):
@@ -82,3 +98,113 @@ class TestMemoryFootprint:
     #      code 1:1, dynamically depending on available RAM
     #    - share_of_ram() with a leave_at_least > (total - share).
     #      Even more complicated ;)
+
+    @pytest.mark.parametrize(["processes"], [(1,), (2,), (4,)])
+    def test_share_of_ram_split_between_processes(self, processes):
+        assert _share_of_ram(0.5, 0, processes) == pytest.approx(
+            _total_memory() * 0.5 / processes, 100 * 1024**2
+        )
+
+    def test_share_of_ram_invalid_number_of_processes(self):
+        with pytest.raises(ValueError, match="Number of processes"):
+            _share_of_ram(0.5, 0, 0)
+
+    def test_get_max_memory_split_between_processes(self):
+        assert _get_max_memory("40%", 2) == pytest.approx(
+            _get_max_memory("20%"), 100 * 1024**2
+        )
+        # absolute values are not split
+        assert _get_max_memory("4G", 2) == 4 * 1024**3
+
+    def test_cgroup_v2_memory_limit(self, fake_cgroup_root, fake_proc_self_cgroup):
+        fake_proc_self_cgroup.write_text("0::/kubepods/pod1234\n")
+        control_group = fake_cgroup_root / "kubepods" / "pod1234"
+        control_group.mkdir(parents=True)
+        (control_group / "memory.max").write_text("1073741824\n")
+
+        assert _cgroup_memory_limit(fake_proc_self_cgroup, fake_cgroup_root) == (
+            1024**3
+        )
+
+    @pytest.mark.parametrize(
+        ["pod_limit", "container_limit", "expected_limit"],
+        [
+            ("1073741824\n", "max\n", 1024**3),
+            ("1073741824\n", "2147483648\n", 1024**3),
+            ("2147483648\n", "1073741824\n", 1024**3),
+        ],
+    )
+    def test_cgroup_v2_parent_memory_limit(
+        self,
+        fake_cgroup_root,
+        fake_proc_self_cgroup,
+        pod_limit,
+        container_limit,
+        expected_limit,
+    ):
+        # kubernetes sets pod-level limits on a parent control group
+        fake_proc_self_cgroup.write_text("0::/kubepods/pod1234/container5678\n")
+        pod = fake_cgroup_root / "kubepods" / "pod1234"
+        (pod / "container5678").mkdir(parents=True)
+        (pod / "memory.max").write_text(pod_limit)
+        (pod / "container5678" / "memory.max").write_text(container_limit)
+        (fake_cgroup_root / "kubepods" / "memory.max").write_text("max\n")
+
+        assert _cgroup_memory_limit(fake_proc_self_cgroup, fake_cgroup_root) == (
+            expected_limit
+        )
+
+    def test_cgroup_v1_parent_memory_limit(
+        self, fake_cgroup_root, fake_proc_self_cgroup
+    ):
+        fake_proc_self_cgroup.write_text("4:memory:/docker/abcd\n")
+        docker = fake_cgroup_root / "memory" / "docker"
+        (docker / "abcd").mkdir(parents=True)
+        (docker / "memory.limit_in_bytes").write_text("536870912\n")
+        (docker / "abcd" / "memory.limit_in_bytes").write_text("9223372036854771712\n")
+
+        assert _cgroup_memory_limit(fake_proc_self_cgroup, fake_cgroup_root) == (
+            512 * 1024**2
+        )
+
+    def test_cgroup_v2_no_memory_limit(self, fake_cgroup_root, fake_proc_self_cgroup):
+        fake_proc_self_cgroup.write_text("0::/\n")
+        (fake_cgroup_root / "memory.max").write_text("max\n")
+
+        assert _cgroup_memory_limit(fake_proc_self_cgroup, fake_cgroup_root) is None
+
+    def test_cgroup_v1_memory_limit(self, fake_cgroup_root, fake_proc_self_cgroup):
+        # docker without cgroup namespaces: the path in /proc/self/cgroup
+        # does not exist inside the container
+        fake_proc_self_cgroup.write_text(
+            "5:cpu,cpuacct:/docker/abcd\n4:memory:/docker/abcd\n0::/\n"
+        )
+        (fake_cgroup_root / "memory").mkdir()
+        (fake_cgroup_root / "memory" / "memory.limit_in_bytes").write_text(
+            "536870912\n"
+        )
+
+        assert _cgroup_memory_limit(fake_proc_self_cgroup, fake_cgroup_root) == (
+            512 * 1024**2
+        )
+
+    def test_cgroup_v1_no_memory_limit(self, fake_cgroup_root, fake_proc_self_cgroup):
+        fake_proc_self_cgroup.write_text("4:memory:/\n")
+        (fake_cgroup_root / "memory").mkdir()
+        (fake_cgroup_root / "memory" / "memory.limit_in_bytes").write_text(
+            "9223372036854771712\n"
+        )
+
+        assert _cgroup_memory_limit(fake_proc_self_cgroup, fake_cgroup_root) is None
+
+    def test_no_cgroups(self, fake_cgroup_root, fake_proc_self_cgroup):
+        # e.g., not running on Linux
+        assert _cgroup_memory_limit(fake_proc_self_cgroup, fake_cgroup_root) is None
+
+    def test_total_memory_respects_cgroup_memory_limit(self, monkeypatch):
+        monkeypatch.setattr(
+            r5py.util.memory_footprint, "_cgroup_memory_limit", lambda: 1024**3
+        )
+        assert _total_memory() == 1024**3
+        assert _share_of_ram(0.5, 0) == 512 * 1024**2
+        assert _share_of_ram(0.5, 0, 2) == 256 * 1024**2
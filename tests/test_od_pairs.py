@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import pandas
+import pytest
+
+import r5py
+
+
+class TestOdPairs:
+    @pytest.fixture
+    def origin_ids(self):
+        yield pandas.Series(["a", "b", "c"])
+
+    @pytest.fixture
+    def destination_ids(self):
+        yield pandas.Series([1, 2, 3])
+
+    @pytest.mark.parametrize(
+        ["all_to_all", "expected_len"],
+        [
+            (True, 9),
+            (False, 3),
+        ],
+    )
+    def test_len(self, origin_ids, destination_ids, all_to_all, expected_len):
+        od_pairs = r5py.r5.OdPairs(origin_ids, destination_ids, all_to_all)
+        assert len(od_pairs) == expected_len
+
+    def test_different_lengths(self, origin_ids, destination_ids):
+        with pytest.raises(ValueError, match="must be of the same length"):
+            r5py.r5.OdPairs(origin_ids, destination_ids[:2], all_to_all=False)
+
+    @pytest.mark.parametrize("all_to_all", [True, False])
+    def test_to_frame(self, origin_ids, destination_ids, all_to_all):
+        if all_to_all:
+            expected = pandas.DataFrame({"id": origin_ids}).join(
+                pandas.DataFrame({"id": destination_ids}),
+                how="cross",
+                lsuffix="_origin",
+                rsuffix="_destination",
+            )
+        else:
+            expected = pandas.DataFrame(
+                {"id_origin": origin_ids, "id_destination": destination_ids}
+            )
+
+        od_pairs = r5py.r5.OdPairs(origin_ids, destination_ids, all_to_all)
+        pandas.testing.assert_frame_equal(od_pairs.to_frame(), expected)
+
+    @pytest.mark.parametrize("all_to_all", [True, False])
+    def test_per_origin(self, origin_ids, destination_ids, all_to_all):
+        od_pairs = r5py.r5.OdPairs(origin_ids, destination_ids, all_to_all)
+        pairs = [
+            (from_id, to_id)
+            for from_id, to_ids in od_pairs.per_origin()
+            for to_id in to_ids
+        ]
+        assert pairs == list(od_pairs.to_frame().itertuples(index=False, name=None))
+
+    @pytest.mark.parametrize("all_to_all", [True, False])
+    @pytest.mark.parametrize("max_destinations", [1, 2, 3, 100])
+    def test_per_origin_max_destinations(
+        self, origin_ids, destination_ids, all_to_all, max_destinations
+    ):
+        od_pairs = r5py.r5.OdPairs(origin_ids, destination_ids, all_to_all)
+        parts = list(od_pairs.per_origin(max_destinations))
+
+        assert all(len(to_ids) <= max_destinations for _, to_ids in parts)
+        pairs = [(from_id, to_id) for from_id, to_ids in parts for to_id in to_ids]
+        assert pairs == list(od_pairs.to_frame().itertuples(index=False, name=None))
+
+    @pytest.mark.parametrize("max_destinations", [0, -1])
+    def test_per_origin_invalid_max_destinations(
+        self, origin_ids, destination_ids, max_destinations
+    ):
+        od_pairs = r5py.r5.OdPairs(origin_ids, destination_ids)
+        with pytest.raises(ValueError, match="`max_destinations` must be"):
+            list(od_pairs.per_origin(max_destinations))
+
+    @pytest.mark.parametrize("all_to_all", [True, False])
+    @pytest.mark.parametrize("chunk_size", [1, 2, 4, 100])
+    def test_chunks(self, origin_ids, destination_ids, all_to_all, chunk_size):
+        od_pairs = r5py.r5.OdPairs(origin_ids, destination_ids, all_to_all)
+        chunks = list(od_pairs.chunks(chunk_size))
+
+        pandas.testing.assert_frame_equal(
+            pandas.concat(chunks, ignore_index=True), od_pairs.to_frame()
+        )
+        # all pairs of an origin are in the same chunk
+        origins_in_chunks = [set(chunk.id_origin) for chunk in chunks]
+        assert sum(len(origins) for origins in origins_in_chunks) == len(origin_ids)
+
+    def test_empty(self, origin_ids):
+        od_pairs = r5py.r5.OdPairs(origin_ids, pandas.Series([], dtype=int))
+        assert len(od_pairs) == 0
+        assert list(od_pairs.per_origin()) == []
+        assert od_pairs.to_frame().empty
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+
+import sys
+
+import pytest
+
+import r5py.util.config
+from r5py.util.osm_database import IN_MEMORY, _parse_threshold, osm_database
+
+
+class TestOsmDatabase:
+    @pytest.mark.parametrize(
+        ["threshold", "expected"],
+        [
+            ("0", 0),
+            (0, 0),
+            ("1024", 1024),
+            ("64M", 64 * 1024**2),
+            ("1.5G", round(1.5 * 1024**3)),
+        ],
+    )
+    def test_parse_threshold(self, threshold, expected):
+        assert _parse_threshold(threshold) == expected
+
+    @pytest.mark.parametrize(["threshold"], [("64 MB",), ("-1",), ("64X",), ("M",)])
+    def test_invalid_threshold(self, threshold):
+        with pytest.raises(ValueError, match="--in-memory-osm-threshold"):
+            _parse_threshold(threshold)
+
+    def test_small_extract_in_memory(self, tmp_path):
+        osm_pbf = tmp_path / "small.osm.pbf"
+        osm_pbf.write_bytes(b"\0" * 1024)
+        assert osm_database(osm_pbf, "digest", "1M") == IN_MEMORY
+
+    def test_large_extract_on_disk(self, tmp_path):
+        osm_pbf = tmp_path / "large.osm.pbf"
+        osm_pbf.write_bytes(b"\0" * 2048)
+        assert osm_database(osm_pbf, "digest", "1K") == (
+            f"{r5py.util.config.Config().CACHE_DIR / 'digest.mapdb'}"
+        )
+
+    def test_zero_threshold_always_on_disk(self, tmp_path):
+        osm_pbf = tmp_path / "empty.osm.pbf"
+        osm_pbf.touch()
+        assert osm_database(osm_pbf, "digest", 0) != IN_MEMORY
+
+    def test_config_option(self, tmp_path):
+        osm_pbf = tmp_path / "small.osm.pbf"
+        osm_pbf.write_bytes(b"\0" * 1024)
+        assert osm_database(osm_pbf, "digest") == IN_MEMORY
+
+        sys.argv.extend(["--in-memory-osm-threshold", "0"])
+        assert r5py.util.config.Config().arguments.in_memory_osm_threshold == "0"
+        assert osm_database(osm_pbf, "digest") != IN_MEMORY
+        sys.argv = sys.argv[:-2]
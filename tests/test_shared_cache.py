@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+
+import concurrent.futures
+import threading
+import time
+
+import pytest
+
+from r5py.util import SharedCache
+
+
+class TestSharedCache:
+    def test_get(self):
+        shared_cache = SharedCache()
+        assert "a" not in shared_cache
+        assert shared_cache.get("a", lambda: 1) == 1
+        assert "a" in shared_cache
+        assert shared_cache.get("a", lambda: 2) == 1
+        assert shared_cache.get("b", lambda: 2) == 2
+        assert len(shared_cache) == 2
+
+    def test_compute_once_across_threads(self):
+        shared_cache = SharedCache()
+        calls = []
+        lock = threading.Lock()
+
+        def compute():
+            with lock:
+                calls.append(None)
+            time.sleep(0.05)
+            return object()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            values = list(
+                executor.map(lambda _: shared_cache.get("key", compute), range(16))
+            )
+
+        assert len(calls) == 1
+        assert all(value is values[0] for value in values)
+
+    def test_exception_is_not_cached(self):
+        shared_cache = SharedCache()
+
+        def fail():
+            raise ValueError()
+
+        with pytest.raises(ValueError):
+            shared_cache.get("key", fail)
+        assert "key" not in shared_cache
+        assert shared_cache.get("key", lambda: 1) == 1
+
+    def test_max_size(self):
+        shared_cache = SharedCache(max_size=2)
+        shared_cache.get("a", lambda: 1)
+        shared_cache.get("b", lambda: 2)
+        shared_cache.get("a", lambda: 1)  # "b" is now least recently used
+        shared_cache.get("c", lambda: 3)
+        assert len(shared_cache) == 2
+        assert "a" in shared_cache
+        assert "b" not in shared_cache
+        assert "c" in shared_cache
+
+    @pytest.mark.parametrize("max_size", [0, -1])
+    def test_invalid_max_size(self, max_size):
+        with pytest.raises(ValueError, match="`max_size` must be"):
+            SharedCache(max_size=max_size)
+
+    def test_items_and_update(self):
+        shared_cache = SharedCache()
+        shared_cache.update([("a", 1), ("b", 2)])
+        assert shared_cache.items() == [("a", 1), ("b", 2)]
+        assert shared_cache.get("a", lambda: 3) == 1
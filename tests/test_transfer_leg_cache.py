@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+
+import json
+import pickle
+
+import r5py
+from r5py.r5.transfer_leg_cache import TransferLegCache
+from r5py.util import Config
+
+from .fresh_interpreter import run_in_fresh_interpreter
+
+# Load a transport network from its cache file (first argument) in a fresh
+# interpreter (and JVM), load its transfer legs from a file (second
+# argument), and report them
+LOAD_TRANSFER_LEGS = """
+import json
+import pathlib
+import sys
+
+import r5py
+from r5py.r5.transfer_leg_cache import TransferLegCache
+
+transport_network = r5py.TransportNetwork.from_cache_file(sys.argv[1])
+transport_network.transfer_legs = TransferLegCache(pathlib.Path(sys.argv[2]))
+
+print(
+    json.dumps(
+        [
+            [
+                list(key),
+                type(leg).__name__,
+                leg.transport_mode.name,
+                leg.travel_time.total_seconds(),
+                leg.distance,
+                leg.geometry.wkt,
+            ]
+            for key, leg in transport_network.transfer_legs.items()
+        ]
+    )
+)
+"""
+
+
+class TestTransferLegCache:
+    def test_default_max_size(self):
+        transfer_legs = TransferLegCache()
+        assert transfer_legs.max_size == Config().arguments.transfer_leg_cache_size
+
+    def test_not_persisted(self):
+        transfer_legs = TransferLegCache(max_size=10)
+        transfer_legs.get((1, 2, 3.6, True), lambda: "leg")
+        transfer_legs.save()  # no-op
+        assert transfer_legs.path is None
+
+    def test_save_and_load(self, tmp_path):
+        path = tmp_path / "network.transfer_legs"
+
+        transfer_legs = TransferLegCache(path, max_size=10)
+        assert len(transfer_legs) == 0
+        transfer_legs.get((1, 2, 3.6, True), lambda: "leg 1-2")
+        transfer_legs.get((2, 1, 3.6, True), lambda: "leg 2-1")
+        transfer_legs.save()
+        assert path.exists()
+
+        transfer_legs = TransferLegCache(path, max_size=10)
+        assert len(transfer_legs) == 2
+        assert transfer_legs.get((1, 2, 3.6, True), lambda: "not cached") == "leg 1-2"
+
+    def test_save_only_when_modified(self, tmp_path):
+        path = tmp_path / "network.transfer_legs"
+        with path.open("wb") as f:
+            pickle.dump([((1, 2, 3.6, True), "leg 1-2")], f)
+        modified = path.stat().st_mtime_ns
+
+        transfer_legs = TransferLegCache(path, max_size=10)
+        transfer_legs.get((1, 2, 3.6, True), lambda: "not cached")
+        transfer_legs.save()
+        assert path.stat().st_mtime_ns == modified
+
+    def test_corrupt_file(self, tmp_path):
+        path = tmp_path / "network.transfer_legs"
+        path.write_bytes(b"")
+        transfer_legs = TransferLegCache(path, max_size=10)
+        assert len(transfer_legs) == 0
+
+    def test_save_merges_with_other_processes(self, tmp_path):
+        path = tmp_path / "network.transfer_legs"
+
+        # two processes (e.g., worker processes) share one file
+        transfer_legs_1 = TransferLegCache(path, max_size=10)
+        transfer_legs_2 = TransferLegCache(path, max_size=10)
+        transfer_legs_1.get((1, 2, 3.6, True), lambda: "leg 1-2")
+        transfer_legs_2.get((2, 1, 3.6, True), lambda: "leg 2-1")
+        transfer_legs_1.save()
+        transfer_legs_2.save()
+
+        transfer_legs = TransferLegCache(path, max_size=10)
+        assert len(transfer_legs) == 2
+        assert transfer_legs.get((1, 2, 3.6, True), lambda: "not cached") == "leg 1-2"
+        assert transfer_legs.get((2, 1, 3.6, True), lambda: "not cached") == "leg 2-1"
+
+    def test_save_merges_up_to_max_size(self, tmp_path):
+        path = tmp_path / "network.transfer_legs"
+        with path.open("wb") as f:
+            pickle.dump([((1, 2, 3.6, True), "leg 1-2")], f)
+
+        transfer_legs = TransferLegCache(path, max_size=1)
+        transfer_legs.get((2, 1, 3.6, True), lambda: "leg 2-1")
+        transfer_legs.save()
+
+        # the most recently used leg is kept
+        transfer_legs = TransferLegCache(path, max_size=10)
+        assert transfer_legs.items() == [((2, 1, 3.6, True), "leg 2-1")]
+
+    def test_persist_transfer_legs_of_detailed_itineraries(
+        self,
+        transport_network,
+        population_grid_points_first_three,
+        departure_datetime,
+        monkeypatch,
+        tmp_path,
+    ):
+        path = tmp_path / "network.transfer_legs"
+        transfer_legs = TransferLegCache(path)
+        monkeypatch.setattr(transport_network, "transfer_legs", transfer_legs)
+
+        r5py.DetailedItineraries(
+            transport_network,
+            origins=population_grid_points_first_three,
+            departure=departure_datetime,
+            transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+        )
+        assert len(transfer_legs) > 0
+        assert path.exists()  # (saved by DetailedItineraries)
+
+        reloaded = json.loads(
+            run_in_fresh_interpreter(
+                LOAD_TRANSFER_LEGS, f"{transport_network.cache_file}", f"{path}"
+            )
+        )
+        assert reloaded == [
+            [
+                list(key),
+                type(leg).__name__,
+                leg.transport_mode.name,
+                leg.travel_time.total_seconds(),
+                leg.distance,
+                leg.geometry.wkt,
+            ]
+            for key, leg in transfer_legs.items()
+        ]
+        assert all(
+            type(leg).__name__ == "TransferLeg" for _, leg in transfer_legs.items()
+        )
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 
+import concurrent.futures
+import datetime
 import hashlib
 import pathlib
 import random
 import shutil
 import string
+import time
 
 import geopandas
+import pandas
 import pytest
 import pytest_lazy_fixtures
 import shapely
@@ -313,3 +317,198 @@ class Test_TransportNetwork:
         assert (
             cache_directory / f"{transport_network_checksum}.transport_network"
         ).exists()
+
+    def test_from_cache_file(
+        self,
+        transport_network,
+        cache_directory,
+        transport_network_checksum,
+    ):
+        assert transport_network.cache_file == (
+            cache_directory / f"{transport_network_checksum}.transport_network"
+        )
+        cached_transport_network = r5py.TransportNetwork.from_cache_file(
+            transport_network.cache_file
+        )
+        assert isinstance(cached_transport_network, r5py.TransportNetwork)
+        assert cached_transport_network.extent.equals(transport_network.extent)
+        assert cached_transport_network.cache_file == transport_network.cache_file
+
+    @pytest.mark.parametrize(
+        ["attribute", "builder"],
+        [
+            ("edge_geometries", "EdgeGeometries"),
+            ("hop_geometries", "HopGeometryCache"),
+        ],
+    )
+    def test_geometries_are_built_once(
+        self, transport_network, attribute, builder, monkeypatch
+    ):
+        # (a new instance, on which no geometries have been built, yet)
+        transport_network = r5py.TransportNetwork.from_cache_file(
+            transport_network.cache_file
+        )
+
+        calls = []
+
+        def build(*args, **kwargs):
+            calls.append(args)
+            time.sleep(0.1)  # let the other threads catch up
+            return object()
+
+        monkeypatch.setattr(r5py.r5.transport_network, builder, build)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(lambda _: getattr(transport_network, attribute), range(8))
+            )
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+
+    def test_clip(
+        self,
+        transport_network,
+        transport_network_clipped_to_city_centre,
+        helsinki_city_centre_bbox,
+    ):
+        assert (
+            transport_network_clipped_to_city_centre.extent.area
+            < transport_network.extent.area
+        )
+        # ways crossing the boundary are kept completely, allow some slack
+        assert (
+            shapely.box(*helsinki_city_centre_bbox)
+            .buffer(0.01)
+            .contains(transport_network_clipped_to_city_centre.extent)
+        )
+        assert len(
+            transport_network_clipped_to_city_centre.transit_layer.trip_patterns
+        ) < len(transport_network.transit_layer.trip_patterns)
+
+    def test_clip_is_part_of_cache_digest(
+        self,
+        transport_network_files_tuple,
+        transport_network_clipped_to_city_centre,
+        helsinki_city_centre_bbox,
+        cache_directory,
+        transport_network_checksum,
+    ):
+        osm_pbf, gtfs = transport_network_files_tuple
+        # see src/r5py/r5/transport_network.py
+        digest = hashlib.sha256(
+            "".join(
+                [r5py.util.FileDigest(osm_pbf)]
+                + [r5py.util.FileDigest(path) for path in gtfs]
+                + ["False"]
+                + [
+                    shapely.to_wkb(
+                        r5py.util.clip_geometry(helsinki_city_centre_bbox), hex=True
+                    )
+                ]
+            ).encode("utf-8")
+        ).hexdigest()
+        assert digest != transport_network_checksum
+        assert (cache_directory / f"{digest}.transport_network").exists()
+
+    def test_clip_with_buffer(
+        self,
+        transport_network_files_tuple,
+        transport_network_clipped_to_city_centre,
+        helsinki_city_centre_bbox,
+    ):
+        transport_network = r5py.TransportNetwork(
+            *transport_network_files_tuple,
+            clip=helsinki_city_centre_bbox,
+            clip_buffer=1000.0,
+        )
+        assert transport_network.extent.contains(
+            transport_network_clipped_to_city_centre.extent
+        )
+
+    def test_service_dates(self, transport_network_files_tuple, transport_network):
+        transport_network_one_week = r5py.TransportNetwork(
+            *transport_network_files_tuple,
+            service_dates=(datetime.date(2022, 2, 21), datetime.date(2022, 2, 27)),
+        )
+        assert transport_network_one_week.transit_layer.covers(
+            datetime.date(2022, 2, 22)
+        )
+        assert len(transport_network_one_week.transit_layer.trip_patterns) <= len(
+            transport_network.transit_layer.trip_patterns
+        )
+
+    def test_route_types(self, transport_network_files_tuple, transport_network):
+        # trams only
+        transport_network_trams = r5py.TransportNetwork(
+            *transport_network_files_tuple,
+            route_types=[0],
+        )
+        assert (
+            0
+            < len(transport_network_trams.transit_layer.routes)
+            < len(transport_network.transit_layer.routes)
+        )
+
+    def test_routable_osm_only(self, transport_network_files_tuple, transport_network):
+        transport_network_routable_osm_only = r5py.TransportNetwork(
+            *transport_network_files_tuple,
+            routable_osm_only=True,
+        )
+        # the street network is exactly the same
+        street_layer = transport_network._transport_network.streetLayer
+        street_layer_routable_osm_only = (
+            transport_network_routable_osm_only._transport_network.streetLayer
+        )
+        assert (
+            street_layer_routable_osm_only.edgeStore.nEdges()
+            == street_layer.edgeStore.nEdges()
+        )
+        assert (
+            street_layer_routable_osm_only.getVertexCount()
+            == street_layer.getVertexCount()
+        )
+
+    def test_street_modes(
+        self,
+        transport_network_files_tuple,
+        transport_network,
+        population_grid_points_four,
+        departure_datetime,
+    ):
+        transport_network_walk_bicycle = r5py.TransportNetwork(
+            *transport_network_files_tuple,
+            street_modes={r5py.TransportMode.WALK, r5py.TransportMode.BICYCLE},
+        )
+        street_layer = transport_network._transport_network.streetLayer
+        street_layer_walk_bicycle = (
+            transport_network_walk_bicycle._transport_network.streetLayer
+        )
+        assert (
+            street_layer_walk_bicycle.edgeStore.nEdges()
+            < street_layer.edgeStore.nEdges()
+        )
+
+        # walking travel times are the same on both networks
+        travel_times = [
+            r5py.TravelTimeMatrix(
+                network,
+                origins=population_grid_points_four,
+                departure=departure_datetime,
+                transport_modes=[r5py.TransportMode.WALK],
+            )
+            for network in (transport_network, transport_network_walk_bicycle)
+        ]
+        pandas.testing.assert_frame_equal(*travel_times)
+
+    def test_memory_report(self, transport_network):
+        memory_report = transport_network.memory_report()
+        assert memory_report["heap_used"] > 0
+        for part in ("street_layer_size", "transit_layer_size", "linkage_cache_size"):
+            assert memory_report[part] >= 0
+        assert memory_report["street_layer_size"] > 1024**2
+        assert memory_report["transit_layer_size"] > 1024**2
+        assert (
+            memory_report["street_layer_size"] + memory_report["transit_layer_size"]
+            < memory_report["heap_used"]
+        )
@@ -588,3 +588,120 @@ class TestTravelTimeMatrix:
         assert travel_time_matrix["to_id"].max() == 91
         # There can be a bit of fluctuation in the maximum travel time
         assert travel_time_matrix["travel_time"].max() == pytest.approx(43, abs=3)
+
+    def test_jvm_metrics_not_recorded_by_default(
+        self,
+        transport_network,
+        population_grid_points,
+        origin_point,
+        departure_datetime,
+    ):
+        travel_time_matrix = r5py.TravelTimeMatrix(
+            transport_network,
+            origins=origin_point,
+            destinations=population_grid_points,
+            departure=departure_datetime,
+        )
+        assert travel_time_matrix.jvm_metrics is None
+
+    def test_jvm_metrics_interval(
+        self,
+        transport_network,
+        population_grid_points,
+        departure_datetime,
+    ):
+        travel_time_matrix = r5py.TravelTimeMatrix(
+            transport_network,
+            origins=population_grid_points,
+            departure=departure_datetime,
+            transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+            jvm_metrics_interval=0.1,
+        )
+        jvm_metrics = travel_time_matrix.jvm_metrics
+        assert isinstance(jvm_metrics, pandas.DataFrame)
+        assert len(jvm_metrics) >= 2  # (at least at start and at end)
+        assert jvm_metrics["elapsed"].is_monotonic_increasing
+        assert (jvm_metrics["heap_used"] > 0).all()
+        assert "jvm_metrics" not in travel_time_matrix.columns
+
+    def test_instrumentation_disabled_by_default(
+        self,
+        transport_network,
+        population_grid_points,
+        origin_point,
+        departure_datetime,
+    ):
+        travel_time_matrix = r5py.TravelTimeMatrix(
+            transport_network,
+            origins=origin_point,
+            destinations=population_grid_points,
+            departure=departure_datetime,
+        )
+        assert not travel_time_matrix.instrumentation.enabled
+        assert travel_time_matrix.instrumentation.records.empty
+
+    def test_instrumentation(
+        self,
+        transport_network,
+        population_grid_points_four,
+        population_grid_points,
+        departure_datetime,
+    ):
+        phase_timings = []
+        travel_time_matrix = r5py.TravelTimeMatrix(
+            transport_network,
+            origins=population_grid_points_four,
+            destinations=population_grid_points,
+            departure=departure_datetime,
+            transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+            instrumentation=r5py.util.Instrumentation(callbacks=[phase_timings.append]),
+        )
+        summary = travel_time_matrix.instrumentation.summary
+        for phase in (
+            "validate_origins_destinations",
+            "serialise_destinations",
+            "link_destinations",
+            "compute_travel_times",
+            "parse_results",
+            "concatenate_results",
+        ):
+            assert phase in summary.index
+        assert summary.loc["route_origin", "count"] == len(population_grid_points_four)
+        # (the first origin’s travel times are recorded as `link_destinations`)
+        assert summary.loc["link_destinations", "count"] == 1
+        assert (
+            summary.loc["compute_travel_times", "count"]
+            == len(population_grid_points_four) - 1
+        )
+        counts, _ = travel_time_matrix.instrumentation.histogram("route_origin")
+        assert counts.sum() == len(population_grid_points_four)
+        assert len(phase_timings) == len(travel_time_matrix.instrumentation.records)
+
+        # phases do not overlap in the summary
+        records = travel_time_matrix.instrumentation.records
+        assert set(records.loc[records.phase == "parse_results", "parent"]) == {
+            "route_origin"
+        }
+        assert summary.wall_time.sum() == pytest.approx(
+            records.loc[records.parent.isna(), "wall_time"].sum()
+        )
+
+    def test_instrumentation_does_not_change_results(
+        self,
+        transport_network,
+        population_grid_points_four,
+        population_grid_points,
+        departure_datetime,
+    ):
+        travel_time_matrices = [
+            r5py.TravelTimeMatrix(
+                transport_network,
+                origins=population_grid_points_four,
+                destinations=population_grid_points,
+                departure=departure_datetime,
+                transport_modes=[r5py.TransportMode.TRANSIT, r5py.TransportMode.WALK],
+                instrumentation=instrumentation,
+            )
+            for instrumentation in (False, True)
+        ]
+        pandas.testing.assert_frame_equal(*travel_time_matrices)
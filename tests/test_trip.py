@@ -99,3 +99,64 @@ class TestTrip:
             ]
         )
         assert trip.distance is None
+
+    def test_signature(self):
+        def trip(departure_time, geometry):
+            return r5py.r5.trip.Trip(
+                [
+                    r5py.r5.TransitLeg(
+                        transport_mode=r5py.TransportMode.BUS,
+                        departure_time=departure_time,
+                        distance=12.34,
+                        travel_time=datetime.timedelta(minutes=10),
+                        route_id="56A",
+                        geometry=geometry,
+                    ),
+                    r5py.r5.trip_leg.TripLeg(
+                        transport_mode=r5py.TransportMode.WALK,
+                        distance=float("nan"),
+                    ),
+                ]
+            )
+
+        departure_time = datetime.datetime(2023, 4, 25, 15, 30)
+        geometry = shapely.LineString([[0, 0], [1, 1]])
+
+        trip1 = trip(departure_time, geometry)
+        trip2 = trip(departure_time, None)
+        trip3 = trip(departure_time + datetime.timedelta(minutes=1), geometry)
+
+        assert hash(trip1.signature) == hash(trip2.signature)
+        assert trip1.signature == trip2.signature
+        assert trip1.signature != trip3.signature
+        assert len({trip1.signature, trip2.signature, trip3.signature}) == 2
+
+    @pytest.mark.parametrize(
+        ["transport_modes", "expected_transfers"],
+        [
+            ([r5py.TransportMode.WALK], 0),
+            ([r5py.TransportMode.WALK, r5py.TransportMode.BUS], 0),
+            (
+                [
+                    r5py.TransportMode.WALK,
+                    r5py.TransportMode.BUS,
+                    r5py.TransportMode.WALK,
+                    r5py.TransportMode.TRAM,
+                    r5py.TransportMode.WALK,
+                ],
+                1,
+            ),
+        ],
+    )
+    def test_transfers(self, transport_modes, expected_transfers):
+        trip = r5py.r5.trip.Trip(
+            [
+                (
+                    r5py.r5.TransitLeg(transport_mode=transport_mode)
+                    if transport_mode.is_transit_mode
+                    else r5py.r5.trip_leg.TripLeg(transport_mode=transport_mode)
+                )
+                for transport_mode in transport_modes
+            ]
+        )
+        assert trip.transfers == expected_transfers
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import datetime
+import pickle
 
 import pytest
 import shapely
@@ -145,3 +146,22 @@ class TestTripLeg:
         assert trip_leg1 <= trip_leg2
         assert trip_leg2 > trip_leg1
         assert trip_leg2 >= trip_leg1
+
+    def test_wkb(self):
+        geometry = shapely.LineString([[0, 0], [1, 1]])
+        trip_leg = r5py.r5.trip_leg.TripLeg(geometry=geometry)
+        assert trip_leg.wkb == shapely.to_wkb(geometry)
+        assert trip_leg.wkb is trip_leg.wkb  # computed once
+
+        trip_leg.geometry = shapely.LineString([[0, 0], [2, 2]])
+        assert trip_leg.wkb == shapely.to_wkb(trip_leg.geometry)
+
+        trip_leg.geometry = None
+        assert trip_leg.wkb is None
+
+    def test_wkb_is_not_pickled(self):
+        trip_leg = r5py.r5.trip_leg.TripLeg(
+            geometry=shapely.LineString([[0, 0], [1, 1]])
+        )
+        _ = trip_leg.wkb
+        assert "_wkb" not in pickle.loads(pickle.dumps(trip_leg)).__dict__
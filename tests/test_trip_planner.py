@@ -1,7 +1,11 @@
 #!/usr/bin/env python3
 
 
+import heapq
+import types
+
 import r5py
+from r5py.r5.trip_planner import TripPlanner
 
 
 class TestTripPlanner:
@@ -11,3 +15,102 @@ class TestTripPlanner:
         regional_task,
     ):
         _ = r5py.r5.trip_planner.TripPlanner(transport_network, regional_task)
+
+    def test_max_options_ranks_final_states_before_assembling(
+        self,
+        transport_network,
+        regional_task,
+        population_grid_points,
+        monkeypatch,
+    ):
+        destination = population_grid_points.at[4, "geometry"]
+        regional_task.transport_modes = [
+            r5py.TransportMode.TRANSIT,
+            r5py.TransportMode.WALK,
+        ]
+        regional_task._regional_task.toLat = destination.y
+        regional_task._regional_task.toLon = destination.x
+
+        ranks = []
+        final_state_rank = TripPlanner._final_state_rank
+
+        def record_final_state_rank(*args):
+            rank = final_state_rank(*args)
+            ranks.append(rank)
+            return rank
+
+        monkeypatch.setattr(
+            TripPlanner, "_final_state_rank", staticmethod(record_final_state_rank)
+        )
+
+        def rank(trip):
+            return (trip.travel_time + trip.wait_time, trip.transfers)
+
+        all_trips = TripPlanner(transport_network, regional_task).transit_paths
+        assert len(all_trips) > 0
+        assert ranks == []  # no ranking without `max_options`
+
+        trips = TripPlanner(
+            transport_network, regional_task, max_options=2
+        ).transit_paths
+
+        # the ranks of the final states are the ranks of their trips …
+        assert set(ranks) == {rank(trip) for trip in all_trips}
+        # … and only the best ones are assembled
+        assert [trip.signature for trip in trips] == [
+            trip.signature for trip in heapq.nsmallest(2, all_trips, key=rank)
+        ]
+
+    def test_final_state_per_departure_time(self):
+        def state(stop, pattern, time, back=None):
+            return types.SimpleNamespace(
+                stop=stop, pattern=pattern, time=time, back=back
+            )
+
+        access = state(1, -1, 100)
+        direct = state(-1, -1, 500, back=state(2, 7, 400, back=access))
+        with_transfer = state(
+            -1,
+            -1,
+            500,
+            back=state(
+                3, 8, 450, back=state(2, -1, 300, back=state(2, 6, 200, access))
+            ),
+        )
+        slower = state(-1, -1, 600, back=state(2, 9, 500, back=access))
+
+        final_states = TripPlanner._final_state_per_departure_time(
+            [
+                (60, slower),
+                (0, with_transfer),
+                (0, slower),
+                (0, direct),
+                (60, slower),
+            ]
+        )
+
+        # one state per departure time, the fastest one, with the fewest rides
+        assert final_states == [(0, direct), (60, slower)]
+
+    def test_trip_rank(self):
+        def leg(leg_type, travel_time, wait_time=0):
+            return r5py.r5.LegFields(
+                leg_type, None, None, None, travel_time, wait_time, *[None] * 6
+            )
+
+        walk = (leg(r5py.r5.DirectLeg, 900),)
+        bus = (
+            leg(r5py.r5.AccessLeg, 120),
+            leg(r5py.r5.TransitLeg, 300, 60),
+            leg(r5py.r5.TransferLeg, 60, 30),
+            leg(r5py.r5.TransitLeg, 240, 90),
+            leg(r5py.r5.EgressLeg, 0),
+        )
+
+        assert TripPlanner._trip_rank(walk) == (900, 0)
+        assert TripPlanner._trip_rank(bus) == (900, 1)
+
+        # the same rank as `TripPlanner.trips` used to compute from `Trip`s
+        trip = r5py.r5.Trip([fields.as_trip_leg(None) for fields in bus])
+        assert (trip.travel_time + trip.wait_time).total_seconds() == 900
+        assert trip.transfers == 1